@@ -0,0 +1,125 @@
+from datetime import date, timedelta
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+# Trailing days the rolling z-score and residual spread are measured over
+DEFAULT_WINDOW = 28
+# Span (days) of the exponentially weighted baseline used as the expected cost
+DEFAULT_EWMA_SPAN = 7
+# Same-weekday observations averaged into the seasonal baseline
+DEFAULT_SEASONAL_WEEKS = 4
+DEFAULT_Z_THRESHOLD = 3.0
+# Ignore deviations smaller than this many dollars, however unusual
+DEFAULT_MIN_IMPACT = 1.0
+
+# Spread floor (dollars) so perfectly flat series don't divide by zero
+STD_FLOOR = 0.01
+
+ANOMALY_COLUMNS = ['date', 'service', 'cost', 'expected_cost', 'impact', 'z_score', 'seasonal_z_score']
+
+def history_days(window: int = DEFAULT_WINDOW, seasonal_weeks: int = DEFAULT_SEASONAL_WEEKS) -> int:
+    """Days of history needed before the first scored day"""
+    return window + 7 * seasonal_weeks
+
+def cost_matrix(costs: pd.DataFrame, start: date, end: date) -> pd.DataFrame:
+    """Pivot daily (date, service, cost) rows into a days x services matrix, zero-filled"""
+    matrix = costs.pivot_table(index='date', columns='service', values='cost', aggfunc='sum')
+    return matrix.reindex(
+        pd.date_range(start, end - timedelta(days=1), freq='D'), fill_value=0.0
+    ).fillna(0.0)
+
+def detect_anomalies(matrix: pd.DataFrame, since: Optional[date] = None,
+                     window: int = DEFAULT_WINDOW, ewma_span: int = DEFAULT_EWMA_SPAN,
+                     seasonal_weeks: int = DEFAULT_SEASONAL_WEEKS,
+                     threshold: float = DEFAULT_Z_THRESHOLD,
+                     min_impact: float = DEFAULT_MIN_IMPACT) -> pd.DataFrame:
+    """Flag cost spikes in a days x services matrix (see cost_matrix).
+
+    Every day is scored against what preceded it, for all services at once:
+
+    - a rolling z-score against the trailing ``window`` days,
+    - an EWMA baseline, which is the reported expected cost,
+    - a day-of-week residual against the mean of the same weekday over the
+      previous ``seasonal_weeks`` weeks, z-scored by its own trailing spread.
+
+    A day is anomalous when both z-scores reach ``threshold`` and the cost is
+    at least ``min_impact`` above the EWMA baseline, so weekly patterns and
+    slow trends are not reported. Only days on or after ``since`` are
+    returned, largest impact first.
+    """
+    values = matrix.to_numpy(dtype='float64')
+    days = len(values)
+
+    mean, std = _trailing_mean_std(values, window)
+    z_score = (values - mean) / np.maximum(std, STD_FLOOR)
+
+    expected = _lagged_ewma(values, ewma_span)
+
+    lag_total = np.zeros_like(values)
+    lag_count = np.zeros((days, 1))
+    for week in range(1, seasonal_weeks + 1):
+        lag = 7 * week
+        if lag >= days:
+            break
+        lag_total[lag:] += values[:days - lag]
+        lag_count[lag:] += 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        seasonal = np.where(lag_count > 0, lag_total / lag_count, np.nan)
+    residual = values - seasonal
+    _, residual_std = _trailing_mean_std(residual, window)
+    seasonal_z_score = residual / np.maximum(residual_std, STD_FLOOR)
+
+    impact = values - expected
+    with np.errstate(invalid='ignore'):
+        flagged = (z_score >= threshold) & (seasonal_z_score >= threshold) & (impact >= min_impact)
+    if since is not None:
+        flagged[matrix.index < pd.Timestamp(since)] = False
+
+    rows, cols = np.nonzero(flagged)
+    anomalies = pd.DataFrame({
+        'date': matrix.index[rows],
+        'service': matrix.columns[cols],
+        'cost': values[rows, cols],
+        'expected_cost': expected[rows, cols],
+        'impact': impact[rows, cols],
+        'z_score': z_score[rows, cols],
+        'seasonal_z_score': seasonal_z_score[rows, cols]
+    }, columns=ANOMALY_COLUMNS)
+    return anomalies.sort_values('impact', ascending=False, ignore_index=True)
+
+def _trailing_mean_std(values: np.ndarray, window: int):
+    """Mean and sample std of the ``window`` rows before each row (NaN-aware, vectorized over columns)"""
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    sums = []
+    for column in (present, filled, filled * filled):
+        # Prefix sums minus the prefix sums `window` rows earlier = trailing window totals
+        prefix = np.zeros((len(values) + 1, values.shape[1]))
+        np.cumsum(column, axis=0, out=prefix[1:])
+        trailing = prefix[:-1].copy()
+        trailing[window:] -= prefix[:-1 - window] if window < len(values) else 0.0
+        sums.append(trailing)
+    n, s, s2 = sums
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = s / n
+        var = (s2 - s * mean) / (n - 1)
+    # Require half a window of history before scoring
+    mean[n < max(window // 2, 2)] = np.nan
+    std = np.sqrt(np.maximum(var, 0.0))
+    std[np.isnan(mean)] = np.nan
+    return mean, std
+
+def _lagged_ewma(values: np.ndarray, span: int) -> np.ndarray:
+    """EWMA of each column as of the previous row (row 0 has no baseline)"""
+    alpha = 2.0 / (span + 1)
+    expected = np.full_like(values, np.nan)
+    if len(values) < 2:
+        return expected
+    level = values[0].copy()
+    # One step per day, vectorized across every service
+    for day in range(1, len(values)):
+        expected[day] = level
+        level += alpha * (values[day] - level)
+    return expected
@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify
-from ..services.cost_analyzer import AWSCostAnalyzer
+from ..services.cost_analyzer import TIMEFRAMES, AWSCostAnalyzer
 from ..utils.auth import require_auth
 
 cost_routes = Blueprint('cost_routes', __name__)
@@ -26,6 +26,8 @@ def get_recommendations():
 @cost_routes.route('/api/v1/cost/<timeframe>', methods=['GET'])
 @require_auth
 def get_cost_details(timeframe):
+    if timeframe not in TIMEFRAMES:
+        return jsonify({'error': f'timeframe must be one of: {", ".join(TIMEFRAMES)}'}), 400
     try:
         details = cost_analyzer.get_cost_details(timeframe)
         return jsonify(details)
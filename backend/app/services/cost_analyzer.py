@@ -1,8 +1,25 @@
 import boto3
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List
 import os
+import threading
+import time
+
+# Timeframe -> (days covered, resampling rule, granularity reported to clients)
+TIMEFRAMES = {
+    'week': (7, 'D', 'DAILY'),
+    'month': (30, 'D', 'DAILY'),
+    'quarter': (91, 'W-MON', 'WEEKLY'),
+    'year': (365, 'MS', 'MONTHLY')
+}
+
+# One DAILY query covers every timeframe plus the month before it (month-over-month)
+DAILY_HISTORY_DAYS = max(days for days, _, _ in TIMEFRAMES.values()) + 31
+
+# Seconds the daily dataset is reused before Cost Explorer is queried again
+DAILY_COSTS_TTL = 3600
 
 class AWSCostAnalyzer:
     def __init__(self):
@@ -11,12 +28,14 @@ class AWSCostAnalyzer:
             aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
             region_name=os.environ.get('AWS_REGION', 'us-east-1')
         )
+        self._daily_costs = (0.0, None, None)
+        self._daily_costs_lock = threading.Lock()
 
     def get_cost_overview(self):
         end_date = datetime.now().strftime('%Y-%m-%d')
         start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-        
-        response = self.ce_client.get_cost_and_usage(
+
+        results = self._get_cost_and_usage(
             TimePeriod={
                 'Start': start_date,
                 'End': end_date
@@ -25,38 +44,126 @@ class AWSCostAnalyzer:
             Metrics=['UnblendedCost'],
             GroupBy=[{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
         )
-        
-        overview = {
-            'total_cost': 0,
-            'services': [],
-            'daily_costs': []
-        }
-        
-        for result in response['ResultsByTime']:
-            daily_cost = 0
-            for group in result['Groups']:
-                cost = float(group['Metrics']['UnblendedCost']['Amount'])
-                daily_cost += cost
-                
-                service = group['Keys'][0]
-                service_found = False
-                for s in overview['services']:
-                    if s['name'] == service:
-                        s['cost'] += cost
-                        service_found = True
-                        break
-                if not service_found:
-                    overview['services'].append({
-                        'name': service,
-                        'cost': cost
-                    })
-            
-            overview['daily_costs'].append({
-                'date': result['TimePeriod']['Start'],
-                'cost': daily_cost
-            })
-            overview['total_cost'] += daily_cost
-        
-        overview['services'].sort(key=lambda x: x['cost'], reverse=True)
-        
-        return overview
\ No newline at end of file
+
+        return summarize_cost_results(results)
+
+    def get_cost_details(self, timeframe: str) -> Dict:
+        """week/month/quarter/year view resampled from one cached DAILY dataset"""
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f'Unsupported timeframe: {timeframe}')
+        return summarize_cost_timeframe(*self._load_daily_costs(), timeframe)
+
+    def _load_daily_costs(self):
+        """(daily costs, exclusive end date) for the last DAILY_HISTORY_DAYS, refetched after DAILY_COSTS_TTL"""
+        with self._daily_costs_lock:
+            fetched_at, costs, end_date = self._daily_costs
+            if costs is None or time.monotonic() - fetched_at > DAILY_COSTS_TTL:
+                end_date = datetime.utcnow().date()
+                results = self._get_cost_and_usage(
+                    TimePeriod={
+                        'Start': (end_date - timedelta(days=DAILY_HISTORY_DAYS)).strftime('%Y-%m-%d'),
+                        'End': end_date.strftime('%Y-%m-%d')
+                    },
+                    Granularity='DAILY',
+                    Metrics=['UnblendedCost'],
+                    GroupBy=[{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
+                )
+                costs = _flatten_cost_results(results)
+                self._daily_costs = (time.monotonic(), costs, end_date)
+            return costs, end_date
+
+    def _get_cost_and_usage(self, **params) -> List[Dict]:
+        """ResultsByTime of every page, following NextPageToken"""
+        results = []
+        while True:
+            response = self.ce_client.get_cost_and_usage(**params)
+            results.extend(response['ResultsByTime'])
+            if not response.get('NextPageToken'):
+                return results
+            params['NextPageToken'] = response['NextPageToken']
+
+def summarize_cost_results(results_by_time: List[Dict], metric: str = 'UnblendedCost') -> Dict:
+    """Build the overview payload from DAILY ResultsByTime grouped by SERVICE.
+
+    The payload is flattened once into columns and totals, per-service sums
+    and the daily series come from group-by aggregations over them.
+    """
+    days = [result['TimePeriod']['Start'] for result in results_by_time]
+    costs = _flatten_cost_results(results_by_time, metric)
+
+    services = costs.groupby('service', sort=False)['cost'].sum() \
+        .sort_values(ascending=False, kind='stable')
+    # Days without any groups still appear in the series with zero cost
+    daily = costs.groupby('date', sort=False)['cost'].sum().reindex(days, fill_value=0.0)
+
+    return {
+        'total_cost': float(daily.sum()),
+        'services': [{'name': name, 'cost': float(cost)} for name, cost in services.items()],
+        'daily_costs': [{'date': day, 'cost': float(cost)} for day, cost in daily.items()]
+    }
+
+def summarize_cost_timeframe(costs: pd.DataFrame, end_date, timeframe: str) -> Dict:
+    """Resample flattened daily costs to a timeframe view with day-over-day and month-over-month deltas.
+
+    Costs are pivoted into one days x services matrix, so the deltas of
+    every service come out of the same column-wise arithmetic.
+    """
+    days, rule, granularity = TIMEFRAMES[timeframe]
+    matrix = costs.pivot_table(index='date', columns='service', values='cost', aggfunc='sum')
+    matrix.index = pd.to_datetime(matrix.index)
+    matrix = matrix.reindex(
+        pd.date_range(end_date - timedelta(days=DAILY_HISTORY_DAYS), end_date - timedelta(days=1), freq='D')
+    ).fillna(0.0)
+
+    window = matrix.iloc[-days:]
+    periods = window.resample(rule, label='left', closed='left').sum()
+    services = window.sum().sort_values(ascending=False, kind='stable')
+
+    last_day = matrix.index[-1]
+    month_start = last_day.replace(day=1)
+    previous_start = (month_start - timedelta(days=1)).replace(day=1)
+    previous_end = min(previous_start + (last_day - month_start), month_start - timedelta(days=1))
+    deltas = {
+        'day_over_day': (matrix.iloc[-1], matrix.iloc[-2]),
+        'month_over_month': (matrix.loc[month_start:].sum(), matrix.loc[previous_start:previous_end].sum())
+    }
+
+    return {
+        'timeframe': timeframe,
+        'granularity': granularity,
+        'total_cost': float(services.sum()),
+        'periods': [
+            {'start': period.strftime('%Y-%m-%d'), 'cost': float(cost)}
+            for period, cost in periods.sum(axis=1).items()
+        ],
+        **{name: _delta(current.sum(), previous.sum()) for name, (current, previous) in deltas.items()},
+        'services': [
+            {
+                'name': service,
+                'cost': float(services[service]),
+                'series': periods[service].tolist(),
+                **{name: _delta(current[service], previous[service]) for name, (current, previous) in deltas.items()}
+            }
+            for service in services.index
+        ]
+    }
+
+def _delta(current: float, previous: float) -> Dict:
+    return {
+        'current': float(current),
+        'previous': float(previous),
+        'change': float(current - previous),
+        # No percentage against a zero baseline
+        'percent': float((current - previous) / previous * 100) if previous else None
+    }
+
+def _flatten_cost_results(results_by_time: List[Dict], metric: str = 'UnblendedCost') -> pd.DataFrame:
+    days = [result['TimePeriod']['Start'] for result in results_by_time]
+    groups = [group for result in results_by_time for group in result['Groups']]
+
+    return pd.DataFrame({
+        'date': np.repeat(np.array(days, dtype=object), [len(result['Groups']) for result in results_by_time]),
+        'service': [group['Keys'][0] for group in groups],
+        'cost': np.array([group['Metrics'][metric]['Amount'] for group in groups],
+                         dtype=object).astype(np.float64)
+    })
@@ -0,0 +1,56 @@
+"""Compare per-request analyzer setup with and without the shared client registry.
+
+Before the registry every request built fresh boto3 clients (and with them
+new connection pools, so every request also paid new TLS handshakes). This
+times constructing the EC2 analyzer's three clients per simulated request
+both ways. No AWS calls are made, so handshake savings come on top of the
+numbers shown here.
+
+    python backend/benchmarks/bench_client_registry.py
+"""
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.dirname(BACKEND_DIR), BACKEND_DIR]
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'bench')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'bench')
+
+import boto3  # noqa: E402
+from backend.service_analyzers import EC2Analyzer  # noqa: E402
+
+REQUESTS = 50
+
+def legacy_setup():
+    # What EC2Analyzer.__init__ did on every request before the registry
+    session = boto3.session.Session(
+        aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
+        region_name=os.environ.get('AWS_REGION', 'us-east-1')
+    )
+    return (session.client('ec2'), session.client('cloudwatch'),
+            session.client('ce', region_name='us-east-1'))
+
+def registry_setup():
+    return EC2Analyzer()
+
+def timed(label, fn):
+    latencies = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f'  {label:<10} max {latencies[-1] * 1000:7.1f} ms'
+          f'  median {latencies[len(latencies) // 2] * 1000:7.2f} ms'
+          f'  total {sum(latencies) * 1000:8.1f} ms')
+
+def main():
+    print(f'{REQUESTS} requests, 3 clients per request')
+    timed('legacy', legacy_setup)
+    timed('registry', registry_setup)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Compare per-instance get_metric_statistics with batched GetMetricData.
+
+Runs EC2Analyzer metric collection against a stubbed CloudWatch client that
+counts API calls, for fleets of 10/100/1,000/5,000 instances. The batched
+averages and maxima are checked against the per-instance ones.
+
+    python backend/benchmarks/bench_cloudwatch_batching.py
+"""
+import math
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.dirname(BACKEND_DIR), BACKEND_DIR]
+
+from backend.service_analyzers.ec2_analyzer import EC2Analyzer, EC2_METRICS  # noqa: E402
+
+FLEET_SIZES = [10, 100, 1000, 5000]
+HOURS = 7 * 24
+# Typical CloudWatch round trip, used to estimate real-world wall time
+API_LATENCY_SECONDS = 0.05
+
+class StubCloudWatch:
+    def __init__(self):
+        self.calls = 0
+        self.meta = SimpleNamespace(region_name='us-east-1')
+        start = datetime.utcnow() - timedelta(hours=HOURS)
+        self.timestamps = [start + timedelta(hours=h) for h in range(HOURS)]
+        self.values = [float(h % 100) for h in range(HOURS)]
+
+    def get_metric_statistics(self, **kwargs):
+        self.calls += 1
+        return {'Datapoints': [
+            {'Timestamp': ts, 'Average': value, 'Maximum': value}
+            for ts, value in zip(self.timestamps, self.values)
+        ]}
+
+    def get_metric_data(self, MetricDataQueries, **kwargs):
+        self.calls += 1
+        return {'MetricDataResults': [
+            {'Id': query['Id'], 'Timestamps': self.timestamps, 'Values': self.values}
+            for query in MetricDataQueries
+        ]}
+
+def legacy_instance_metrics(cloudwatch, instance_id, days=7):
+    end_time = datetime.utcnow()
+    start_time = end_time - timedelta(days=days)
+
+    metrics = {}
+    for metric_name in EC2_METRICS:
+        response = cloudwatch.get_metric_statistics(
+            Namespace='AWS/EC2',
+            MetricName=metric_name,
+            Dimensions=[{'Name': 'InstanceId', 'Value': instance_id}],
+            StartTime=start_time,
+            EndTime=end_time,
+            Period=3600,
+            Statistics=['Average', 'Maximum']
+        )
+        if response['Datapoints']:
+            metrics[metric_name] = {
+                'average': sum(p['Average'] for p in response['Datapoints']) / len(response['Datapoints']),
+                'max': max(p['Maximum'] for p in response['Datapoints'])
+            }
+    return metrics
+
+def run(label, fn):
+    cloudwatch = StubCloudWatch()
+    start = time.perf_counter()
+    result = fn(cloudwatch)
+    elapsed = time.perf_counter() - start
+    estimated = elapsed + cloudwatch.calls * API_LATENCY_SECONDS
+    print(f'  {label:<10} calls={cloudwatch.calls:<7} cpu={elapsed:8.3f}s  '
+          f'est. wall @{API_LATENCY_SECONDS * 1000:.0f}ms/call={estimated:9.1f}s')
+    return result
+
+def same_summaries(batched, legacy):
+    """Batched summaries carry more fields and come from float32 series; compare average and max"""
+    return batched.keys() == legacy.keys() and all(
+        batched[i].keys() == legacy[i].keys() and all(
+            math.isclose(batched[i][metric][field], legacy[i][metric][field], rel_tol=1e-5)
+            for metric in legacy[i] for field in ('average', 'max')
+        )
+        for i in legacy
+    )
+
+def main():
+    for size in FLEET_SIZES:
+        instance_ids = [f'i-{n:017x}' for n in range(size)]
+        print(f'{size} instances')
+
+        legacy = run('legacy', lambda cw: {
+            instance_id: legacy_instance_metrics(cw, instance_id) for instance_id in instance_ids
+        })
+
+        def batched(cw):
+            analyzer = EC2Analyzer.__new__(EC2Analyzer)
+            analyzer.cloudwatch = cw
+            # A scope per fleet size, so the shared metric store does not serve earlier runs' series
+            analyzer.account_id = f'bench-{size}'
+            metrics, _ = analyzer._get_instance_metrics(instance_ids)
+            return metrics
+
+        assert same_summaries(run('batched', batched), legacy)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Compare the legacy nested-loop cost overview with the group-by version.
+
+Builds a synthetic DAILY Cost Explorer payload (365 days x 300 groups) and
+times both aggregations over it.
+
+    python backend/benchmarks/bench_cost_overview.py
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.dirname(BACKEND_DIR), BACKEND_DIR]
+
+from backend.app.services.cost_analyzer import summarize_cost_results  # noqa: E402
+from backend.cost_store import flatten_cost_results  # noqa: E402
+
+DAYS = 365
+GROUPS = 300
+REPEAT = 5
+
+def synthetic_results(days, groups):
+    rng = random.Random(42)
+    start = date(2024, 1, 1)
+    return [
+        {
+            'TimePeriod': {
+                'Start': (start + timedelta(days=d)).isoformat(),
+                'End': (start + timedelta(days=d + 1)).isoformat()
+            },
+            'Groups': [
+                {
+                    'Keys': [f'Service {g}'],
+                    'Metrics': {'UnblendedCost': {'Amount': f'{rng.uniform(0, 500):.10f}', 'Unit': 'USD'}}
+                }
+                for g in range(groups)
+            ]
+        }
+        for d in range(days)
+    ]
+
+def legacy_overview(results_by_time):
+    overview = {'total_cost': 0, 'services': [], 'daily_costs': []}
+    for result in results_by_time:
+        daily_cost = 0
+        for group in result['Groups']:
+            cost = float(group['Metrics']['UnblendedCost']['Amount'])
+            daily_cost += cost
+
+            service = group['Keys'][0]
+            service_found = False
+            for s in overview['services']:
+                if s['name'] == service:
+                    s['cost'] += cost
+                    service_found = True
+                    break
+            if not service_found:
+                overview['services'].append({'name': service, 'cost': cost})
+
+        overview['daily_costs'].append({'date': result['TimePeriod']['Start'], 'cost': daily_cost})
+        overview['total_cost'] += daily_cost
+
+    overview['services'].sort(key=lambda x: x['cost'], reverse=True)
+    return overview
+
+def store_overview(results_by_time):
+    costs = flatten_cost_results(results_by_time)
+    return (
+        costs['cost'].sum(),
+        costs.groupby('service', sort=False)['cost'].sum(),
+        costs.groupby('date')['cost'].sum()
+    )
+
+def timed(label, fn, payload):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = fn(payload)
+        best = min(best, time.perf_counter() - start)
+    print(f'  {label:<28} {best * 1000:9.1f} ms (best of {REPEAT})')
+    return result
+
+def main():
+    payload = synthetic_results(DAYS, GROUPS)
+    print(f'{DAYS} days x {GROUPS} groups = {DAYS * GROUPS:,} rows')
+
+    legacy = timed('legacy nested loop', legacy_overview, payload)
+    grouped = timed('group-by (app)', summarize_cost_results, payload)
+    timed('flatten + group-by (store)', store_overview, payload)
+
+    assert [s['name'] for s in legacy['services']] == [s['name'] for s in grouped['services']]
+    assert abs(legacy['total_cost'] - grouped['total_cost']) < 1e-6 * legacy['total_cost']
+    assert len(legacy['daily_costs']) == len(grouped['daily_costs'])
+
+if __name__ == '__main__':
+    main()
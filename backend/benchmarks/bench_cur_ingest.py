@@ -0,0 +1,78 @@
+"""Measure CUR 2.0 Parquet ingestion throughput (line items per second).
+
+Writes a synthetic CUR 2.0 export (BILLING_PERIOD=YYYY-MM partitions,
+the usual wide set of line item columns, row groups in usage-date order)
+to a temporary directory, then times CurReader aggregating it to daily
+cost per service: once for the whole export and once for the last three
+days, where partition and row-group statistics let most of the files be
+skipped.
+
+    python backend/benchmarks/bench_cur_ingest.py [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.dirname(BACKEND_DIR), BACKEND_DIR]
+
+from backend.cur_ingest import CurReader  # noqa: E402
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+MONTHS = ['2024-01', '2024-02']
+SERVICES = 150
+ROW_GROUP_SIZE = 500_000
+# Columns every CUR line item carries that the reader should never touch
+EXTRA_COLUMNS = ['line_item_resource_id', 'line_item_usage_type', 'line_item_operation',
+                 'product_region_code', 'pricing_unit', 'bill_payer_account_id']
+
+def write_export(root, rng):
+    services = np.array([f'AWSService{s}' for s in range(SERVICES)], dtype=object)
+    rows_per_month = ROWS // len(MONTHS)
+    for month in MONTHS:
+        first = np.datetime64(f'{month}-01T00:00:00', 'ms')
+        hours = np.sort(rng.integers(0, 28 * 24, rows_per_month))
+        table = pa.table({
+            'line_item_usage_start_date': pa.array(first + hours.astype('timedelta64[h]'),
+                                                   type=pa.timestamp('ms')),
+            'line_item_product_code': pa.array(services[rng.integers(0, SERVICES, rows_per_month)]),
+            'line_item_unblended_cost': pa.array(rng.gamma(1.5, 0.02, rows_per_month)),
+            **{
+                column: pa.array(np.char.add(f'{column}-', rng.integers(0, 1000, rows_per_month).astype(str)))
+                for column in EXTRA_COLUMNS
+            }
+        })
+        directory = os.path.join(root, f'BILLING_PERIOD={month}')
+        os.makedirs(directory)
+        pq.write_table(table, os.path.join(directory, 'part-0.parquet'), row_group_size=ROW_GROUP_SIZE)
+
+def timed(label, reader, start=None, end=None):
+    began = time.perf_counter()
+    rows = sum(batch.num_rows for batch in reader.iter_batches(start, end))
+    scanned = time.perf_counter() - began
+
+    began = time.perf_counter()
+    frame = reader.read_daily_costs(start, end)
+    elapsed = time.perf_counter() - began
+    print(f'  {label:<12} {rows:>11,} rows  scan {rows / scanned:>13,.0f} rows/s'
+          f'  aggregate {rows / elapsed:>13,.0f} rows/s  ({elapsed:.2f}s, {len(frame)} daily rows)')
+
+def main():
+    with tempfile.TemporaryDirectory() as root:
+        write_export(root, np.random.default_rng(42))
+        size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
+        print(f'{ROWS:,} line items, {len(MONTHS)} billing periods, {size / 2**20:.0f} MiB of Parquet')
+
+        reader = CurReader(root)
+        timed('full export', reader)
+        last_day = date(2024, 2, 28)
+        timed('last 3 days', reader, last_day - timedelta(days=2), last_day + timedelta(days=1))
+
+if __name__ == '__main__':
+    main()
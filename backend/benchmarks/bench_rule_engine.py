@@ -0,0 +1,75 @@
+"""Time bulk rule evaluation on a synthetic resource table.
+
+Builds a 50,000-row instance table shaped like the ec2_instances rule
+table and registers 200 declarative rules over it: the built-in EC2
+rules plus threshold variants sharing their conditions, the way rule
+files and plugins add rules. Times RuleEngine.evaluate over the whole
+table (best of REPEAT runs) and prints how many rules matched.
+
+    python backend/benchmarks/bench_rule_engine.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.dirname(BACKEND_DIR), BACKEND_DIR]
+
+from backend.recommendation_engine import DEFAULT_RULES  # noqa: E402
+from backend.rule_engine import RuleEngine  # noqa: E402
+
+RESOURCES = 50000
+RULES = 200
+REPEAT = 5
+PATTERNS = ['steady', 'idle', 'underutilized', 'scheduled', 'bursty', 'no_data']
+TYPES = ['m5.large', 'm5.xlarge', 'c5.2xlarge', 'r5.large', 't3.medium', 'm6g.large']
+
+def synthetic_table(rng):
+    monthly_cost = rng.gamma(2, 60, RESOURCES)
+    return pd.DataFrame({
+        'resource_id': [f'i-{i:017x}' for i in range(RESOURCES)],
+        'instance_type': rng.choice(TYPES, RESOURCES),
+        'state': rng.choice(['running', 'stopped'], RESOURCES, p=[0.9, 0.1]),
+        'cpu_pattern': rng.choice(PATTERNS, RESOURCES),
+        'cpu_p95': rng.uniform(0, 100, RESOURCES),
+        'cpu_p99': rng.uniform(0, 100, RESOURCES),
+        'cpu_active_share': rng.uniform(0, 1, RESOURCES),
+        'monthly_cost': monthly_cost,
+        'graviton_target': 'm6g.large',
+        'graviton_savings': np.where(rng.random(RESOURCES) < 0.5, monthly_cost * 0.2, np.nan),
+        'upgrade_target': 'm6i.large',
+        'upgrade_savings': np.where(rng.random(RESOURCES) < 0.3, monthly_cost * 0.1, np.nan),
+        'rightsizing_target': 'm5.large',
+        'rightsizing_savings': np.where(rng.random(RESOURCES) < 0.4, monthly_cost * 0.5, np.nan)
+    })
+
+def rules():
+    builtin = [spec for spec in DEFAULT_RULES if spec['table'] == 'ec2_instances']
+    specs = list(builtin)
+    for i in range(RULES - len(builtin)):
+        spec = dict(builtin[i % len(builtin)], id=f'variant-{i}')
+        spec['when'] = spec['when'] + [f'monthly_cost > {i % 50 * 10}']
+        specs.append(spec)
+    return specs
+
+def main():
+    table = synthetic_table(np.random.default_rng(42))
+    engine = RuleEngine()
+    for spec in rules():
+        engine.register(spec)
+
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        recommendations, errors = engine.evaluate(tables={'ec2_instances': table})
+        timings.append(time.perf_counter() - start)
+
+    print(f'{RULES} rules x {RESOURCES} resources')
+    print(f'  RuleEngine.evaluate  best {min(timings) * 1000:7.1f} ms  worst {max(timings) * 1000:7.1f} ms')
+    print(f'  {len(recommendations)} rules matched, {len(errors)} errors')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Time fleet-wide utilization profiling on a synthetic hourly CPU matrix.
+
+Builds 10,000 instances x 14 days of hourly CPU, one fifth each of
+steady, idle, underutilized, nightly batch and bursty workloads, with a
+few missing datapoints, and times UtilizationProfiles over the whole
+matrix (best of REPEAT runs). How many instances land in their intended
+pattern is printed as a sanity check.
+
+    python backend/benchmarks/bench_utilization_profiles.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.dirname(BACKEND_DIR), BACKEND_DIR]
+
+from backend.utilization_profiles import UtilizationProfiles  # noqa: E402
+
+INSTANCES = 10000
+HOURS = 14 * 24
+REPEAT = 5
+PATTERNS = ['steady', 'idle', 'underutilized', 'scheduled', 'bursty']
+
+def synthetic_fleet(rng):
+    timestamps = 1_700_000_000 // 3600 * 3600 + np.arange(HOURS, dtype=np.int64) * 3600
+    hour_of_day = (timestamps // 3600) % 24
+    kind = np.arange(INSTANCES) % len(PATTERNS)
+    # Noise proportional to the level, so idle instances stay near zero
+    noise = rng.normal(1, 0.1, (INSTANCES, HOURS))
+
+    values = np.empty((INSTANCES, HOURS))
+    values[kind == 0] = rng.uniform(55, 75, (kind == 0).sum())[:, None]
+    values[kind == 1] = rng.uniform(0.5, 2, (kind == 1).sum())[:, None]
+    values[kind == 2] = rng.uniform(10, 25, (kind == 2).sum())[:, None]
+    # Nightly batch: 4 busy hours a day at a random start hour
+    batch_start = rng.integers(0, 20, (kind == 3).sum())[:, None]
+    busy = (hour_of_day[None, :] >= batch_start) & (hour_of_day[None, :] < batch_start + 4)
+    values[kind == 3] = np.where(busy, 90, 3)
+    # Bursty: a low baseline with ~2% of hours near full CPU
+    bursts = rng.random(((kind == 4).sum(), HOURS)) < 0.02
+    values[kind == 4] = np.where(bursts, 95, 12)
+
+    values = np.clip(values * noise, 0, 100)
+    values[rng.random(values.shape) < 0.01] = np.nan
+    return [f'i-{i:017x}' for i in range(INSTANCES)], values.astype(np.float32), timestamps, kind
+
+def main():
+    resource_ids, values, timestamps, kind = synthetic_fleet(np.random.default_rng(42))
+
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        profiles = UtilizationProfiles(resource_ids, values, timestamps)
+        timings.append(time.perf_counter() - start)
+
+    print(f'{INSTANCES} instances x {HOURS} hours')
+    print(f'  UtilizationProfiles  best {min(timings) * 1000:7.1f} ms  worst {max(timings) * 1000:7.1f} ms')
+    for code, pattern in enumerate(PATTERNS):
+        matched = (profiles.patterns[kind == code] == pattern).sum()
+        print(f'  {pattern:<14} {matched}/{(kind == code).sum()} profiled as {pattern}')
+
+if __name__ == '__main__':
+    main()
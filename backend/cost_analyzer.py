@@ -1,77 +1,243 @@
-import boto3
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 import os
+import threading
+from . import anomaly_engine
+from .cost_trends import HISTORY_DAYS as TRENDS_HISTORY_DAYS, cost_trends
+from .cost_forecast import ForecastModel
+from .cost_store import CostIngestor, get_cost_store
+from .cur_ingest import CurIngestor, get_cur_reader
+from .utils.aws_utils import get_aws_client
+from .utils.ce_cache import CachedCostExplorerClient
+from .utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class AWSCostAnalyzer:
     def __init__(self):
-        self.ce_client = boto3.client('ce',
-            aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
-        self.cloudwatch = boto3.client('cloudwatch',
-            aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
-        self.ec2 = boto3.client('ec2',
-            aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
-        self.rds = boto3.client('rds',
-            aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
+        self.ce_client = CachedCostExplorerClient(get_aws_client('ce'))
+        self.cloudwatch = get_aws_client('cloudwatch')
+        self.ec2 = get_aws_client('ec2')
+        self.rds = get_aws_client('rds')
+        self.store = get_cost_store()
+        ingestion = {
+            'lookback_days': int(os.environ.get('COST_STORE_LOOKBACK_DAYS', 395)),
+            'restatement_days': int(os.environ.get('COST_STORE_RESTATEMENT_DAYS', 3))
+        }
+        if os.environ.get('COST_SOURCE', 'ce').lower() == 'cur':
+            # Fill the store from Cost and Usage Report files instead of Cost Explorer
+            self.ingestor = CurIngestor(get_cur_reader(), self.store, **ingestion)
+        else:
+            self.ingestor = CostIngestor(self.ce_client, self.store, **ingestion)
+        # (store data version, forecast payload); refitted only when new daily data lands
+        self._forecast = (None, None)
+        # (store data version, days x services matrix) every trends view is cut from
+        self._trends_matrix = (None, None)
+
+    def _load_daily_costs(self, start_date, end_date) -> pd.DataFrame:
+        """Daily cost rows for start_date <= date < end_date, served from the local store"""
+        self._sync_store(start_date)
+        return self.store.read(start_date, end_date)
+
+    def _sync_store(self, start_date):
+        """Serve what the store has and bring it up to date in the background.
+
+        Only an empty store makes the request wait, and only for the days it
+        asks for (at most the ingestor's lookback); the rest of the lookback
+        is backfilled by the background sync.
+        """
+        if self.store.synced_through() is None:
+            today = datetime.utcnow().date()
+            self.ingestor.sync(today, lookback_days=min((today - start_date).days, self.ingestor.lookback_days))
+        if self.ingestor.needs_sync():
+            _sync_in_background(self.ingestor)
 
     def get_cost_overview(self):
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-        
-        response = self.ce_client.get_cost_and_usage(
-            TimePeriod={
-                'Start': start_date,
-                'End': end_date
-            },
-            Granularity='DAILY',
-            Metrics=['UnblendedCost'],
-            GroupBy=[{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
-        )
-        
-        overview = {
-            'total_cost': 0,
-            'services': [],
-            'daily_costs': []
+        start_date, end_date = _last_days(30)
+        costs = self._load_daily_costs(start_date, end_date)
+
+        services = costs.groupby('service', sort=False)['cost'].sum().sort_values(ascending=False)
+        daily = _daily_totals(costs, start_date, end_date)
+
+        return {
+            'total_cost': float(costs['cost'].sum()),
+            'services': [
+                {'name': name, 'cost': float(cost)} for name, cost in services.items()
+            ],
+            'daily_costs': [
+                {'date': day.strftime('%Y-%m-%d'), 'cost': float(cost)} for day, cost in daily.items()
+            ]
+        }
+
+    def get_service_costs(self, service: str) -> Dict:
+        start_date, end_date = _last_days(30)
+        costs = self._load_daily_costs(start_date, end_date)
+        costs = costs[costs['service'] == service]
+        daily = _daily_totals(costs, start_date, end_date)
+
+        return {
+            'service': service,
+            'total_cost': float(costs['cost'].sum()),
+            'daily_costs': [
+                {'date': day.strftime('%Y-%m-%d'), 'cost': float(cost)} for day, cost in daily.items()
+            ]
         }
-        
-        for result in response['ResultsByTime']:
-            daily_cost = 0
-            for group in result['Groups']:
-                cost = float(group['Metrics']['UnblendedCost']['Amount'])
-                daily_cost += cost
-                
-                service = group['Keys'][0]
-                service_found = False
-                for s in overview['services']:
-                    if s['name'] == service:
-                        s['cost'] += cost
-                        service_found = True
-                        break
-                if not service_found:
-                    overview['services'].append({
-                        'name': service,
-                        'cost': cost
-                    })
-            
-            overview['daily_costs'].append({
-                'date': result['TimePeriod']['Start'],
-                'cost': daily_cost
+
+    def get_costs_by_service(self) -> Dict:
+        """Monthly cost by service, shaped like a Cost Explorer MONTHLY response"""
+        start_date, end_date = _last_days(30)
+        costs = self._load_daily_costs(start_date, end_date)
+        monthly = costs.groupby([costs['date'].dt.to_period('M'), 'service'])['cost'].sum()
+
+        results = []
+        for period, groups in monthly.groupby(level=0):
+            results.append({
+                'TimePeriod': {
+                    'Start': max(period.start_time.date(), start_date).strftime('%Y-%m-%d'),
+                    'End': min((period + 1).start_time.date(), end_date).strftime('%Y-%m-%d')
+                },
+                'Groups': [
+                    {
+                        'Keys': [service],
+                        'Metrics': {'UnblendedCost': {'Amount': str(cost), 'Unit': 'USD'}}
+                    }
+                    for (_, service), cost in groups.items()
+                ],
+                # The month is still accruing charges
+                'Estimated': (period + 1).start_time.date() > end_date
             })
-            overview['total_cost'] += daily_cost
-        
-        overview['services'].sort(key=lambda x: x['cost'], reverse=True)
-        
-        return overview
\ No newline at end of file
+
+        return {'ResultsByTime': results}
+
+    def get_cost_trends(self, time_range: str = 'month') -> Dict:
+        """Week/month/quarter/year view with day-over-day and month-over-month deltas per service"""
+        return cost_trends(self.daily_matrix(), time_range)
+
+    def daily_matrix(self) -> pd.DataFrame:
+        """Days x services matrix of recent history, rebuilt only when new daily data lands"""
+        start_date, end_date = _last_days(TRENDS_HISTORY_DAYS)
+        self._sync_store(start_date)
+        version = self.store.data_version()
+        cached_version, matrix = self._trends_matrix
+        if matrix is None or cached_version != version:
+            matrix = anomaly_engine.cost_matrix(self.store.read(start_date, end_date), start_date, end_date)
+            self._trends_matrix = (version, matrix)
+        return matrix
+
+    def get_cost_anomalies(self, days: int = 30, threshold: Optional[float] = None) -> Dict:
+        """Daily per-service cost spikes over the last `days` days (see anomaly_engine)"""
+        start_date, end_date = _last_days(days)
+        history_start = start_date - timedelta(days=anomaly_engine.history_days())
+        costs = self._load_daily_costs(history_start, end_date)
+
+        if threshold is None:
+            threshold = float(os.environ.get('ANOMALY_Z_THRESHOLD', anomaly_engine.DEFAULT_Z_THRESHOLD))
+
+        anomalies = anomaly_engine.detect_anomalies(
+            anomaly_engine.cost_matrix(costs, history_start, end_date),
+            since=start_date,
+            threshold=threshold,
+            min_impact=float(os.environ.get('ANOMALY_MIN_IMPACT', anomaly_engine.DEFAULT_MIN_IMPACT))
+        )
+
+        return {
+            'start_date': start_date.strftime('%Y-%m-%d'),
+            'end_date': end_date.strftime('%Y-%m-%d'),
+            'total_impact': float(anomalies['impact'].sum()),
+            'anomalies': [
+                {
+                    'date': row.date.strftime('%Y-%m-%d'),
+                    'service': row.service,
+                    'cost': float(row.cost),
+                    'expected_cost': float(row.expected_cost),
+                    'impact': float(row.impact),
+                    'z_score': float(row.z_score),
+                    'seasonal_z_score': float(row.seasonal_z_score)
+                }
+                for row in anomalies.itertuples(index=False)
+            ]
+        }
+
+    def get_cost_forecast(self) -> Dict:
+        """Month-end and next-quarter spend per service, projected from stored daily history"""
+        fit_days = int(os.environ.get('FORECAST_FIT_DAYS', 90))
+        start_date, end_date = _last_days(fit_days)
+        self._sync_store(start_date)
+        version = self.store.data_version()
+        cached_version, forecast = self._forecast
+        if forecast is not None and cached_version == version:
+            return forecast
+
+        costs = self.store.read(start_date, end_date)
+        model = ForecastModel.fit(anomaly_engine.cost_matrix(costs, start_date, end_date), fit_days)
+
+        month_start = end_date.replace(day=1)
+        month_end = _add_months(month_start, 1)
+        quarter_start = _add_months(month_start.replace(month=(month_start.month - 1) // 3 * 3 + 1), 3)
+        quarter_end = _add_months(quarter_start, 3)
+
+        month_to_date = costs[costs['date'] >= pd.Timestamp(month_start)].groupby('service')['cost'].sum()
+        month_end_costs = month_to_date.reindex(model.services, fill_value=0.0) + model.predict(end_date, month_end).sum()
+        next_quarter_costs = model.predict(quarter_start, quarter_end).sum()
+
+        forecast = {
+            'generated_through': (end_date - timedelta(days=1)).strftime('%Y-%m-%d'),
+            'month': {
+                'start': month_start.strftime('%Y-%m-%d'),
+                'end': month_end.strftime('%Y-%m-%d'),
+                'actual_to_date': float(month_to_date.sum()),
+                'projected_total': float(month_end_costs.sum())
+            },
+            'next_quarter': {
+                'start': quarter_start.strftime('%Y-%m-%d'),
+                'end': quarter_end.strftime('%Y-%m-%d'),
+                'projected_total': float(next_quarter_costs.sum())
+            },
+            'services': [
+                {
+                    'name': service,
+                    'month_actual_to_date': float(month_to_date.get(service, 0.0)),
+                    'month_end_projection': float(month_end_costs[service]),
+                    'next_quarter_projection': float(next_quarter_costs[service])
+                }
+                for service in month_end_costs.sort_values(ascending=False).index
+            ]
+        }
+        self._forecast = (version, forecast)
+        return forecast
+
+def _add_months(day, months: int):
+    """First day of the month `months` after the month of `day`"""
+    month = day.month - 1 + months
+    return day.replace(year=day.year + month // 12, month=month % 12 + 1, day=1)
+
+# One background sync per process at a time; the store's sync lock serializes workers
+_background_sync: Optional[threading.Thread] = None
+_background_sync_lock = threading.Lock()
+
+def _sync_in_background(ingestor):
+    global _background_sync
+    with _background_sync_lock:
+        if _background_sync is not None and _background_sync.is_alive():
+            return
+
+        def run():
+            try:
+                ingestor.sync()
+            except Exception as e:
+                logger.error(f'Background cost sync failed: {str(e)}')
+
+        _background_sync = threading.Thread(target=run, name='cost-sync', daemon=True)
+        _background_sync.start()
+
+def _last_days(days: int):
+    """[start, end) window of the last `days` closed UTC days"""
+    end_date = datetime.utcnow().date()
+    return end_date - timedelta(days=days), end_date
+
+def _daily_totals(costs: pd.DataFrame, start_date, end_date) -> pd.Series:
+    """Total cost per day over the window, with zero for days without charges"""
+    return costs.groupby('date')['cost'].sum().reindex(
+        pd.date_range(start_date, end_date - timedelta(days=1), freq='D'), fill_value=0.0
+    )
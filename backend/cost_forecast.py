@@ -0,0 +1,46 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+
+# Trailing days of daily history each service's model is fitted on
+DEFAULT_FIT_DAYS = 90
+
+class ForecastModel:
+    """Linear trend + day-of-week model fitted for every service at once.
+
+    All services share one design matrix (intercept, day index and six
+    weekday indicators), so a single least-squares solve with one
+    right-hand side per service fits the whole matrix.
+    """
+
+    def __init__(self, origin: pd.Timestamp, services: pd.Index, coefficients: np.ndarray):
+        self.origin = origin
+        self.services = services
+        self.coefficients = coefficients
+
+    @classmethod
+    def fit(cls, matrix: pd.DataFrame, fit_days: int = DEFAULT_FIT_DAYS) -> 'ForecastModel':
+        """Fit on the last ``fit_days`` rows of a days x services matrix (see anomaly_engine.cost_matrix)"""
+        history = matrix.iloc[-fit_days:]
+        origin = history.index[0]
+        coefficients, *_ = np.linalg.lstsq(
+            _design(history.index, origin), history.to_numpy(dtype='float64'), rcond=None
+        )
+        return cls(origin, history.columns, coefficients)
+
+    def predict(self, start: date, end: date) -> pd.DataFrame:
+        """Expected daily cost per service for start <= date < end (never negative)"""
+        # end is exclusive; inclusive='left' would still return start when start == end
+        days = pd.date_range(start, pd.Timestamp(end) - pd.Timedelta(days=1), freq='D')
+        predicted = _design(days, self.origin) @ self.coefficients
+        return pd.DataFrame(np.maximum(predicted, 0.0), index=days, columns=self.services)
+
+def _design(days: pd.DatetimeIndex, origin: pd.Timestamp) -> np.ndarray:
+    design = np.zeros((len(days), 8))
+    design[:, 0] = 1.0
+    design[:, 1] = (days - origin).days
+    weekday = days.dayofweek.to_numpy()
+    # Monday is the baseline; one indicator per other weekday
+    for day in range(1, 7):
+        design[:, day + 1] = weekday == day
+    return design
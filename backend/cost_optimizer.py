@@ -1,24 +1,72 @@
-import boto3
-from datetime import datetime, timedelta
 import os
+from datetime import datetime, timedelta
+from .utils.aws_utils import get_aws_client, paginate
+from .utils.ce_cache import CachedCostExplorerClient
+from .utils.concurrency import run_parallel
+from .utils.memo import ArtifactMemo
 
 class CostOptimizer:
     def __init__(self):
-        self.ce = boto3.client('ce',
-            aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
-        self.compute_optimizer = boto3.client('compute-optimizer')
+        self.ce = CachedCostExplorerClient(get_aws_client('ce'))
+        self.compute_optimizer = get_aws_client('compute-optimizer')
+        # Each AWS-derived artifact is computed once and shared by /recommendations and /overview
+        self.memo = ArtifactMemo(ttl=float(os.environ.get('OPTIMIZER_MEMO_TTL', 60)))
+
+    def _memoized(self, name, compute):
+        return lambda: self.memo.get_or_compute(name, compute)
 
     def get_recommendations(self):
+        # Cost Explorer, Compute Optimizer and the RI API are independent; query them concurrently
+        # and keep whatever sources answered in time, reporting the ones that did not
+        results, errors = _require_any(run_parallel({
+            'ec2_recommendations': self._memoized('ec2_recommendations', self._get_ec2_recommendations),
+            'cost_recommendations': self._memoized('cost_recommendations', self._get_cost_recommendations),
+            'ri_recommendations': self._memoized('ri_recommendations', self._get_ri_recommendations)
+        }))
+
+        recommendations = []
+        for source in ('ec2_recommendations', 'cost_recommendations', 'ri_recommendations'):
+            recommendations.extend(results.get(source, []))
+        return {'recommendations': recommendations, 'errors': errors}
+
+    def get_savings_overview(self):
         end_date = datetime.now().strftime('%Y-%m-%d')
         start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        time_period = {
+            'Start': start_date,
+            'End': end_date
+        }
+
+        # Savings Plans and Reserved Instance utilization, alongside the (shared) recommendations
+        results, errors = _require_any(run_parallel({
+            'sp_utilization': self._memoized(
+                'sp_utilization',
+                lambda: self.ce.get_savings_plans_utilization_details(TimePeriod=time_period)
+            ),
+            'ri_utilization': self._memoized(
+                'ri_utilization',
+                lambda: self.ce.get_reservation_utilization(TimePeriod=time_period)
+            ),
+            'recommendations': self.get_recommendations
+        }))
+        recommendations = results.get('recommendations', {'recommendations': [], 'errors': {}})
+        errors.update(recommendations['errors'])
+
+        overview = self._process_savings_overview(
+            results.get('sp_utilization', {}),
+            results.get('ri_utilization', {}),
+            recommendations['recommendations']
+        )
+        overview['errors'] = errors
+        return overview
 
-        recommendations = []
+    def _get_cost_recommendations(self):
+        end_date = datetime.now().strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
 
         # Get service cost data
-        cost_data = self.ce.get_cost_and_usage(
+        cost_results = paginate(
+            self.ce, 'get_cost_and_usage', 'ResultsByTime',
             TimePeriod={
                 'Start': start_date,
                 'End': end_date
@@ -27,56 +75,29 @@ class CostOptimizer:
             Metrics=['BlendedCost', 'UsageQuantity'],
             GroupBy=[{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
         )
+        return self._process_cost_recommendations(cost_results)
 
+    def _get_ec2_recommendations(self):
         # Get compute optimizer recommendations
-        try:
-            ec2_recommendations = self.compute_optimizer.get_ec2_instance_recommendations()
-            recommendations.extend(self._process_ec2_recommendations(ec2_recommendations))
-        except Exception as e:
-            print(f"Error getting compute optimizer recommendations: {str(e)}")
-
-        # Process cost data for recommendations
-        service_recommendations = self._process_cost_recommendations(cost_data)
-        recommendations.extend(service_recommendations)
-
-        # Get RI/SP recommendations
-        try:
-            ri_recommendations = self.ce.get_reservation_purchase_recommendation(
-                LookbackPeriodInDays=30,
-                TermInYears=1,
-                PaymentOption='NO_UPFRONT'
-            )
-            recommendations.extend(self._process_ri_recommendations(ri_recommendations))
-        except Exception as e:
-            print(f"Error getting RI recommendations: {str(e)}")
-
-        return recommendations
-
-    def get_savings_overview(self):
-        end_date = datetime.now().strftime('%Y-%m-%d')
-        start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-
-        # Get Savings Plans utilization
-        sp_utilization = self.ce.get_savings_plans_utilization_details(
-            TimePeriod={
-                'Start': start_date,
-                'End': end_date
-            }
+        ec2_recommendations = paginate(
+            self.compute_optimizer, 'get_ec2_instance_recommendations', 'instanceRecommendations'
         )
+        return self._process_ec2_recommendations(ec2_recommendations)
 
-        # Get Reserved Instance utilization
-        ri_utilization = self.ce.get_reservation_utilization(
-            TimePeriod={
-                'Start': start_date,
-                'End': end_date
-            }
+    def _get_ri_recommendations(self):
+        # Get RI/SP recommendations
+        ri_recommendations = paginate(
+            self.ce, 'get_reservation_purchase_recommendation', 'Recommendations',
+            Service='Amazon Elastic Compute Cloud - Compute',
+            LookbackPeriodInDays='THIRTY_DAYS',
+            TermInYears='ONE_YEAR',
+            PaymentOption='NO_UPFRONT'
         )
+        return self._process_ri_recommendations(ri_recommendations)
 
-        return self._process_savings_overview(sp_utilization, ri_utilization)
-
-    def _process_cost_recommendations(self, cost_data):
+    def _process_cost_recommendations(self, cost_results):
         recommendations = []
-        for result in cost_data['ResultsByTime']:
+        for result in cost_results:
             for group in result['Groups']:
                 service = group['Keys'][0]
                 cost = float(group['Metrics']['BlendedCost']['Amount'])
@@ -100,7 +121,7 @@ class CostOptimizer:
 
     def _process_ec2_recommendations(self, recommendations):
         processed = []
-        for rec in recommendations.get('instanceRecommendations', []):
+        for rec in recommendations:
             current_instance = rec['currentInstanceType']
             recommended_instance = rec['recommendationOptions'][0]['instanceType']
             
@@ -108,7 +129,7 @@ class CostOptimizer:
                 savings = rec['recommendationOptions'][0]['estimatedMonthlySavings']['value']
                 processed.append({
                     'title': 'EC2 Instance Right-sizing',
-                    'description': f'Resize {rec['instanceId']} from {current_instance} to {recommended_instance}',
+                    'description': f'Resize {rec["instanceId"]} from {current_instance} to {recommended_instance}',
                     'potentialSavings': round(float(savings), 2)
                 })
 
@@ -116,7 +137,7 @@ class CostOptimizer:
 
     def _process_ri_recommendations(self, recommendations):
         processed = []
-        for rec in recommendations.get('Recommendations', []):
+        for rec in recommendations:
             for detail in rec['RecommendationDetails']:
                 savings = detail['EstimatedMonthlySavings']
                 instance_type = detail['InstanceDetails']['EC2InstanceDetails']['InstanceType']
@@ -128,7 +149,7 @@ class CostOptimizer:
 
         return processed
 
-    def _process_savings_overview(self, sp_data, ri_data):
+    def _process_savings_overview(self, sp_data, ri_data, recommendations):
         total_savings = 0
         potential_savings = 0
 
@@ -145,5 +166,12 @@ class CostOptimizer:
         return {
             'realized_savings': round(total_savings, 2),
             'potential_additional_savings': round(potential_savings, 2),
-            'recommendations': self.get_recommendations()
-        }
\ No newline at end of file
+            'recommendations': recommendations
+        }
+
+def _require_any(outcome):
+    """run_parallel's (results, errors), raising when every source failed"""
+    results, errors = outcome
+    if not results and errors:
+        raise RuntimeError('All sources failed: ' + '; '.join(f'{name}: {error}' for name, error in errors.items()))
+    return results, errors
@@ -0,0 +1,260 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .utils.aws_utils import iter_pages
+from .utils.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts fall back to the thread lock
+    fcntl = None
+
+logger = get_logger(__name__)
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser('~'), '.aws-cost-analyzer', 'cost_store')
+
+COLUMNS = ['date', 'service', 'cost']
+
+def empty_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        'date': pd.Series(dtype='datetime64[ns]'),
+        'service': pd.Series(dtype=object),
+        'cost': pd.Series(dtype='float64')
+    })
+
+class CostStore:
+    """Local columnar store of daily cost per service.
+
+    Rows are kept as Parquet files partitioned by month
+    (``month=YYYY-MM/costs.parquet``) next to a small sync state file that
+    records the first day not yet ingested. Loaded partitions are cached in
+    memory until the file on disk changes, so repeated reads cost no I/O.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._partitions = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _partition_file(self, month: str) -> str:
+        return os.path.join(self.path, f'month={month}', 'costs.parquet')
+
+    def _state_file(self) -> str:
+        return os.path.join(self.path, '_sync.json')
+
+    def months(self) -> List[str]:
+        return sorted(
+            name.split('=', 1)[1] for name in os.listdir(self.path)
+            if name.startswith('month=') and os.path.exists(self._partition_file(name.split('=', 1)[1]))
+        )
+
+    def read_partition(self, month: str) -> pd.DataFrame:
+        file_path = self._partition_file(month)
+        try:
+            mtime = os.path.getmtime(file_path)
+        except OSError:
+            return empty_frame()
+
+        with self._lock:
+            cached = self._partitions.get(month)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        frame = pd.read_parquet(file_path, columns=COLUMNS)
+        with self._lock:
+            self._partitions[month] = (mtime, frame)
+        return frame
+
+    def read(self, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+        """Return daily rows with start <= date < end, reading only overlapping months"""
+        months = self.months()
+        if start:
+            months = [m for m in months if m >= start.strftime('%Y-%m')]
+        if end:
+            months = [m for m in months if m <= (end - timedelta(days=1)).strftime('%Y-%m')]
+
+        frames = [self.read_partition(month) for month in months]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return empty_frame()
+
+        frame = pd.concat(frames, ignore_index=True)
+        mask = pd.Series(True, index=frame.index)
+        if start:
+            mask &= frame['date'] >= pd.Timestamp(start)
+        if end:
+            mask &= frame['date'] < pd.Timestamp(end)
+        return frame[mask].reset_index(drop=True)
+
+    def replace_days(self, frame: pd.DataFrame, start: date, end: date):
+        """Replace every stored row with start <= date < end by the given rows"""
+        month = start.replace(day=1)
+        while month < end:
+            key = month.strftime('%Y-%m')
+            existing = self.read_partition(key)
+            existing = existing[
+                (existing['date'] < pd.Timestamp(start)) | (existing['date'] >= pd.Timestamp(end))
+            ]
+            incoming = frame[frame['date'].dt.strftime('%Y-%m') == key]
+
+            merged = pd.concat([existing, incoming], ignore_index=True)
+            merged = merged.sort_values(['date', 'service']).reset_index(drop=True)
+            self._write_partition(key, merged[COLUMNS])
+
+            month = (month + timedelta(days=32)).replace(day=1)
+
+    def _write_partition(self, month: str, frame: pd.DataFrame):
+        file_path = self._partition_file(month)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = f'{file_path}.{os.getpid()}.tmp'
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, file_path)
+
+    def synced_through(self) -> Optional[date]:
+        """First day (exclusive end) that has not been ingested yet"""
+        return self._state_date('synced_through')
+
+    def synced_from(self) -> Optional[date]:
+        """Earliest ingested day (None for stores synced before this was recorded: full lookback)"""
+        return self._state_date('synced_from')
+
+    def _state_date(self, key: str) -> Optional[date]:
+        try:
+            with open(self._state_file()) as f:
+                return datetime.strptime(json.load(f)[key], '%Y-%m-%d').date()
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def data_version(self) -> Optional[int]:
+        """Token that changes whenever a sync writes new rows (None for an empty store)"""
+        try:
+            return os.stat(self._state_file()).st_mtime_ns
+        except OSError:
+            return None
+
+    def mark_synced(self, start: date, end: date):
+        tmp_path = f'{self._state_file()}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'synced_from': start.strftime('%Y-%m-%d'),
+                'synced_through': end.strftime('%Y-%m-%d'),
+                'synced_at': datetime.utcnow().isoformat()
+            }, f)
+        os.replace(tmp_path, self._state_file())
+
+    @contextmanager
+    def sync_lock(self):
+        """Serialize ingestion across threads and gunicorn workers"""
+        with self._sync_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.path, '.lock'), 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class CostIngestor:
+    """Incrementally pulls DAILY cost by SERVICE from Cost Explorer into a CostStore.
+
+    Only days after the last sync are fetched, plus ``restatement_days``
+    already-stored days that are re-pulled to pick up late-arriving charges.
+    An empty store is backfilled ``lookback_days`` into the past; a sync with
+    a shorter ``lookback_days`` (a request waiting on an empty store) leaves
+    the older days to be backfilled by the next full sync.
+    """
+
+    def __init__(self, ce_client, store: CostStore, lookback_days: int = 395,
+                 restatement_days: int = 3):
+        self.ce = ce_client
+        self.store = store
+        self.lookback_days = lookback_days
+        self.restatement_days = restatement_days
+
+    def needs_sync(self, today: Optional[date] = None, lookback_days: Optional[int] = None) -> bool:
+        today = today or datetime.utcnow().date()
+        synced_through = self.store.synced_through()
+        synced_from = self.store.synced_from()
+        earliest = today - timedelta(days=lookback_days or self.lookback_days)
+        return synced_through is None or synced_through < today or \
+            (synced_from is not None and synced_from > earliest)
+
+    def sync(self, today: Optional[date] = None, lookback_days: Optional[int] = None) -> Dict:
+        today = today or datetime.utcnow().date()
+        with self.store.sync_lock():
+            # Another worker may have finished the sync while we waited for the lock
+            if not self.needs_sync(today, lookback_days):
+                return {'start': None, 'end': None, 'rows': 0}
+
+            earliest = today - timedelta(days=lookback_days or self.lookback_days)
+            synced_through = self.store.synced_through()
+            synced_from = self.store.synced_from()
+            if synced_through and (synced_from is None or synced_from <= earliest):
+                start = max(earliest, synced_through - timedelta(days=self.restatement_days))
+                synced_from = synced_from or earliest
+            else:
+                # Empty store, or older days still to backfill
+                start = earliest
+                synced_from = min(earliest, synced_from or earliest)
+
+            frame = self._fetch_daily_costs(start, today)
+            self.store.replace_days(frame, start, today)
+            self.store.mark_synced(synced_from, today)
+
+        logger.info(f'Ingested {len(frame)} cost rows for {start} to {today}')
+        return {'start': start.isoformat(), 'end': today.isoformat(), 'rows': len(frame)}
+
+    def _fetch_daily_costs(self, start: date, end: date) -> pd.DataFrame:
+        pages = iter_pages(
+            self.ce, 'get_cost_and_usage',
+            TimePeriod={
+                'Start': start.strftime('%Y-%m-%d'),
+                'End': end.strftime('%Y-%m-%d')
+            },
+            Granularity='DAILY',
+            Metrics=['UnblendedCost'],
+            GroupBy=[{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
+        )
+        return pd.concat(
+            [flatten_cost_results(page['ResultsByTime']) for page in pages],
+            ignore_index=True
+        )
+
+def flatten_cost_results(results_by_time: List[Dict], metric: str = 'UnblendedCost') -> pd.DataFrame:
+    """Flatten grouped ResultsByTime into date/service/cost columns in one pass"""
+    groups = [group for result in results_by_time for group in result['Groups']]
+    # Parse each day once and repeat it for every group of that day
+    days = pd.to_datetime([result['TimePeriod']['Start'] for result in results_by_time],
+                          format='%Y-%m-%d').values.astype('datetime64[ns]')
+
+    return pd.DataFrame({
+        'date': np.repeat(days, [len(result['Groups']) for result in results_by_time]),
+        'service': pd.Series([group['Keys'][0] for group in groups], dtype=object),
+        'cost': np.array([group['Metrics'][metric]['Amount'] for group in groups],
+                         dtype=object).astype(np.float64)
+    }, columns=COLUMNS)
+
+def get_cost_store() -> CostStore:
+    return CostStore(os.environ.get('COST_STORE_PATH') or DEFAULT_STORE_PATH)
+
+if __name__ == '__main__':
+    # Scheduled ingestion entry point: python -m backend.cost_store
+    from .utils.aws_utils import get_aws_client
+    from .utils.ce_cache import CachedCostExplorerClient
+
+    ingestor = CostIngestor(
+        CachedCostExplorerClient(get_aws_client('ce')),
+        get_cost_store(),
+        lookback_days=int(os.environ.get('COST_STORE_LOOKBACK_DAYS', 395)),
+        restatement_days=int(os.environ.get('COST_STORE_RESTATEMENT_DAYS', 3))
+    )
+    print(json.dumps(ingestor.sync()))
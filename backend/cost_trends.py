@@ -0,0 +1,89 @@
+from datetime import timedelta
+from typing import Dict
+import numpy as np
+import pandas as pd
+
+# Time range -> (days covered, resampling rule, granularity reported to clients)
+TIME_RANGES = {
+    'week': (7, 'D', 'DAILY'),
+    'month': (30, 'D', 'DAILY'),
+    'quarter': (91, 'W-MON', 'WEEKLY'),
+    'year': (365, 'MS', 'MONTHLY')
+}
+
+# Daily history a trends view can need: the longest range plus the month before it for MoM
+HISTORY_DAYS = max(days for days, _, _ in TIME_RANGES.values()) + 31
+
+def cost_trends(matrix: pd.DataFrame, time_range: str) -> Dict:
+    """Trend view of a days x services matrix ending on its last day (see anomaly_engine.cost_matrix).
+
+    The range is cut from the same daily matrix and resampled to its
+    granularity, and day-over-day (last day vs the one before) and
+    month-over-month (month to date vs the same days of the previous
+    month) deltas are computed for every service at once.
+    """
+    if time_range not in TIME_RANGES:
+        raise ValueError(f'Unsupported time range: {time_range}')
+    days, rule, granularity = TIME_RANGES[time_range]
+
+    window = matrix.iloc[-days:]
+    # Weekly buckets start on the Monday that opens them
+    periods = window.resample(rule, label='left', closed='left').sum()
+    services = window.sum().sort_values(ascending=False)
+
+    last_day = matrix.index[-1]
+    previous_day = matrix.iloc[-2] if len(matrix) > 1 else matrix.iloc[-1] * 0.0
+
+    month_start = last_day.replace(day=1)
+    previous_start = (month_start - timedelta(days=1)).replace(day=1)
+    elapsed = (last_day - month_start).days + 1
+    previous_end = min(previous_start + timedelta(days=elapsed), month_start)
+
+    day_over_day = _deltas(matrix.iloc[-1], previous_day)
+    month_over_month = _deltas(
+        matrix.loc[month_start:].sum(),
+        matrix.loc[previous_start:previous_end - timedelta(days=1)].sum()
+    )
+
+    return {
+        'time_range': time_range,
+        'granularity': granularity,
+        'start_date': window.index[0].strftime('%Y-%m-%d'),
+        'end_date': (last_day + timedelta(days=1)).strftime('%Y-%m-%d'),
+        'total_cost': float(services.sum()),
+        'periods': [
+            {'start': period.strftime('%Y-%m-%d'), 'cost': float(cost)}
+            for period, cost in periods.sum(axis=1).items()
+        ],
+        'day_over_day': _delta_record(_total(day_over_day)),
+        'month_over_month': _delta_record(_total(month_over_month)),
+        'services': [
+            {
+                'name': service,
+                'cost': float(services[service]),
+                'series': periods[service].tolist(),
+                'day_over_day': _delta_record(day_over_day.loc[service]),
+                'month_over_month': _delta_record(month_over_month.loc[service])
+            }
+            for service in services.index
+        ]
+    }
+
+def _deltas(current: pd.Series, previous: pd.Series) -> pd.DataFrame:
+    """current/previous/change/percent per service, computed for all services at once"""
+    change = current - previous
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # No percentage against a zero baseline
+        percent = np.where(previous != 0, change / previous * 100, np.nan)
+    return pd.DataFrame({'current': current, 'previous': previous, 'change': change, 'percent': percent})
+
+def _total(deltas: pd.DataFrame) -> pd.Series:
+    return _deltas(pd.Series([deltas['current'].sum()]), pd.Series([deltas['previous'].sum()])).iloc[0]
+
+def _delta_record(delta: pd.Series) -> Dict:
+    return {
+        'current': float(delta['current']),
+        'previous': float(delta['previous']),
+        'change': float(delta['change']),
+        'percent': None if np.isnan(delta['percent']) else float(delta['percent'])
+    }
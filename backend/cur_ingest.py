@@ -0,0 +1,157 @@
+import json
+import os
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+from .cost_store import COLUMNS, CostIngestor, CostStore, empty_frame
+from .resource_costs import ROW_COLUMNS as RESOURCE_COLUMNS
+from .utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# CUR 2.0 columns; only these are read from the Parquet files
+USAGE_START_COLUMN = 'line_item_usage_start_date'
+COST_COLUMN = 'line_item_unblended_cost'
+DEFAULT_SERVICE_COLUMN = 'line_item_product_code'
+RESOURCE_ID_COLUMN = 'line_item_resource_id'
+# Hive partition CUR 2.0 exports are written under (BILLING_PERIOD=YYYY-MM)
+BILLING_PERIOD_FIELD = 'BILLING_PERIOD'
+
+DEFAULT_BATCH_SIZE = 1 << 20
+
+class CurReader:
+    """Streams daily cost per service out of CUR 2.0 Parquet files.
+
+    ``source`` is a local directory or an ``s3://bucket/prefix`` URI. Only
+    the usage date, cost and service columns are read, billing period
+    partitions and row groups outside the requested days are skipped using
+    partition values and Parquet statistics, and rows are aggregated batch
+    by batch, so memory stays bounded by the batch size however large the
+    month is.
+    """
+
+    def __init__(self, source: str, service_column: str = DEFAULT_SERVICE_COLUMN,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.source = source
+        self.service_column = service_column
+        self.batch_size = batch_size
+
+    def dataset(self) -> ds.Dataset:
+        if '://' in self.source:
+            filesystem, path = fs.FileSystem.from_uri(self.source)
+        else:
+            filesystem, path = fs.LocalFileSystem(), os.path.abspath(self.source)
+        return ds.dataset(path, format='parquet', filesystem=filesystem, partitioning='hive',
+                          exclude_invalid_files=True)
+
+    def iter_batches(self, start: Optional[date] = None, end: Optional[date] = None,
+                     columns: Optional[List[str]] = None) -> Iterator[pa.RecordBatch]:
+        dataset = self.dataset()
+        return dataset.to_batches(
+            columns=columns or [USAGE_START_COLUMN, self.service_column, COST_COLUMN],
+            filter=self._filter(dataset.schema, start, end),
+            batch_size=self.batch_size
+        )
+
+    def read_daily_costs(self, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+        """Daily (date, service, cost) rows for start <= date < end, shaped like the cost store"""
+        frame = self._read_aggregated({'service': self.service_column}, start, end)
+        return empty_frame() if frame is None else frame[COLUMNS]
+
+    def read_resource_costs(self, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+        """Daily (date, resource_id, service, cost) rows of line items that name a resource"""
+        frame = self._read_aggregated(
+            {'resource_id': RESOURCE_ID_COLUMN, 'service': self.service_column}, start, end
+        )
+        if frame is None:
+            return pd.DataFrame({column: [] for column in RESOURCE_COLUMNS}).astype({'cost': 'float64'})
+        return frame[frame['resource_id'] != ''][RESOURCE_COLUMNS].reset_index(drop=True)
+
+    def _read_aggregated(self, keys: Dict[str, str], start: Optional[date], end: Optional[date]) -> Optional[pd.DataFrame]:
+        """Sum cost per day and ``keys`` (output name -> CUR column), one record batch at a time"""
+        group_by = ['date'] + list(keys)
+        partials = []
+        rows = 0
+        for batch in self.iter_batches(start, end, [USAGE_START_COLUMN, COST_COLUMN] + list(keys.values())):
+            rows += batch.num_rows
+            if batch.num_rows:
+                partials.append(_aggregate(pa.table({
+                    'date': pc.floor_temporal(batch.column(USAGE_START_COLUMN), unit='day'),
+                    **{name: batch.column(column) for name, column in keys.items()},
+                    'cost': batch.column(COST_COLUMN)
+                }), group_by))
+        logger.info(f'Aggregated {rows} CUR line items from {self.source}')
+        if not partials:
+            return None
+
+        frame = _aggregate(pa.concat_tables(partials), group_by).to_pandas()
+        # CUR timestamps are UTC; the store keeps naive UTC days
+        frame['date'] = pd.to_datetime(frame['date'], utc=True).dt.tz_localize(None).astype('datetime64[ns]')
+        for name in keys:
+            frame[name] = frame[name].fillna('').astype(object)
+        return frame.sort_values(group_by).reset_index(drop=True)
+
+    def _filter(self, schema: pa.Schema, start: Optional[date], end: Optional[date]) -> Optional[ds.Expression]:
+        usage_type = schema.field(USAGE_START_COLUMN).type
+        conditions = []
+        if start:
+            conditions.append(ds.field(USAGE_START_COLUMN) >= _timestamp(start, usage_type))
+            if BILLING_PERIOD_FIELD in schema.names:
+                conditions.append(ds.field(BILLING_PERIOD_FIELD) >= start.strftime('%Y-%m'))
+        if end:
+            conditions.append(ds.field(USAGE_START_COLUMN) < _timestamp(end, usage_type))
+            if BILLING_PERIOD_FIELD in schema.names:
+                conditions.append(ds.field(BILLING_PERIOD_FIELD) <= (end - timedelta(days=1)).strftime('%Y-%m'))
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+def _aggregate(table: pa.Table, group_by: List[str]) -> pa.Table:
+    grouped = table.group_by(group_by).aggregate([('cost', 'sum')])
+    return grouped.rename_columns([
+        'cost' if name == 'cost_sum' else name for name in grouped.column_names
+    ])
+
+def _timestamp(day: date, usage_type: pa.DataType) -> pa.Scalar:
+    tz = getattr(usage_type, 'tz', None)
+    return pa.scalar(pd.Timestamp(day, tz=tz), type=usage_type)
+
+class CurIngestor(CostIngestor):
+    """CostIngestor that fills the CostStore from CUR files instead of Cost Explorer.
+
+    Same incremental contract (new days plus ``restatement_days`` re-read,
+    which also picks up CUR restatements as the month is finalized); no
+    Cost Explorer calls are made.
+    """
+
+    def __init__(self, reader: CurReader, store: CostStore, lookback_days: int = 395,
+                 restatement_days: int = 3):
+        super().__init__(None, store, lookback_days=lookback_days, restatement_days=restatement_days)
+        self.reader = reader
+
+    def _fetch_daily_costs(self, start: date, end: date) -> pd.DataFrame:
+        return self.reader.read_daily_costs(start, end)
+
+def get_cur_reader() -> CurReader:
+    source = os.environ.get('CUR_PATH')
+    if not source:
+        raise ValueError('CUR_PATH must point at a CUR 2.0 Parquet directory or s3:// prefix')
+    return CurReader(source, service_column=os.environ.get('CUR_SERVICE_COLUMN') or DEFAULT_SERVICE_COLUMN)
+
+if __name__ == '__main__':
+    # Scheduled ingestion entry point: python -m backend.cur_ingest
+    from .cost_store import get_cost_store
+
+    ingestor = CurIngestor(
+        get_cur_reader(),
+        get_cost_store(),
+        lookback_days=int(os.environ.get('COST_STORE_LOOKBACK_DAYS', 395)),
+        restatement_days=int(os.environ.get('COST_STORE_RESTATEMENT_DAYS', 3))
+    )
+    print(json.dumps(ingestor.sync()))
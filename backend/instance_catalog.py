@@ -0,0 +1,267 @@
+import argparse
+import gzip
+import json
+import os
+import re
+import threading
+from typing import Callable, Dict, Iterable, Optional
+import numpy as np
+import pandas as pd
+from .utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Price List bulk files (trimmed, see `trim` below) bundled with the backend
+BUNDLED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'price_list')
+
+HOURS_PER_MONTH = 730
+
+# Rightsized instances should run at or below this p95 CPU
+TARGET_P95_UTILIZATION = 60.0
+
+# RDS Engine -> Price List databaseEngine
+RDS_ENGINES = {
+    'mysql': 'MySQL',
+    'mariadb': 'MariaDB',
+    'postgres': 'PostgreSQL'
+}
+
+# Catalog variant priced for EC2 instances
+EC2_VARIANT = 'Linux'
+
+CATALOG_COLUMNS = [
+    'region', 'variant', 'instance_type', 'family', 'generation', 'category', 'vcpu',
+    'memory_gib', 'architecture', 'current_generation', 'burstable', 'hourly_price'
+]
+
+def _ec2_variant(product: Dict) -> Optional[str]:
+    """Shared-tenancy Linux on-demand capacity without pre-installed software"""
+    attributes = product.get('attributes', {})
+    if (product.get('productFamily') == 'Compute Instance'
+            and attributes.get('operatingSystem') == 'Linux'
+            and attributes.get('tenancy') == 'Shared'
+            and attributes.get('preInstalledSw') == 'NA'
+            and attributes.get('capacitystatus') == 'Used'):
+        return EC2_VARIANT
+    return None
+
+def _rds_variant(product: Dict) -> Optional[str]:
+    """Open-source engines without a license, per deployment: 'MySQL Single-AZ'"""
+    attributes = product.get('attributes', {})
+    if (product.get('productFamily') == 'Database Instance'
+            and attributes.get('databaseEngine') in RDS_ENGINES.values()
+            and attributes.get('deploymentOption') in ('Single-AZ', 'Multi-AZ')):
+        return f"{attributes['databaseEngine']} {attributes['deploymentOption']}"
+    return None
+
+# Offer code -> product filter returning the catalog variant (None drops the product)
+OFFERS: Dict[str, Callable[[Dict], Optional[str]]] = {
+    'AmazonEC2': _ec2_variant,
+    'AmazonRDS': _rds_variant
+}
+
+def rds_variant(engine: str, multi_az: bool) -> Optional[str]:
+    """Catalog variant of an RDS instance (None for engines the catalog does not price)"""
+    engine = RDS_ENGINES.get(engine)
+    return f"{engine} {'Multi-AZ' if multi_az else 'Single-AZ'}" if engine else None
+
+class InstanceCatalog:
+    """Instance types with vCPU, memory, architecture, generation and hourly on-demand price.
+
+    Rows are held as columns sorted by price and partitioned by (region,
+    variant); a variant is the priced configuration (``Linux`` for EC2,
+    engine and deployment for RDS). Lookups are a dict access and "cheapest
+    type satisfying X" is one boolean mask over the partition, whose first
+    match is the answer.
+    """
+
+    def __init__(self, rows: pd.DataFrame):
+        rows = rows.sort_values(['hourly_price', 'instance_type'], kind='stable').reset_index(drop=True)
+        self.rows = rows
+        self._columns = {column: rows[column].to_numpy() for column in CATALOG_COLUMNS}
+        self._partitions: Dict[tuple, np.ndarray] = \
+            dict(rows.groupby(['region', 'variant'], sort=False).indices) if len(rows) else {}
+        self._positions = {
+            (region, variant, instance_type): position
+            for position, (region, variant, instance_type) in enumerate(
+                zip(rows['region'], rows['variant'], rows['instance_type'])
+            )
+        }
+
+    def __len__(self):
+        return len(self.rows)
+
+    def regions(self):
+        return sorted({region for region, _ in self._partitions})
+
+    def get(self, instance_type: str, region: str, variant: str) -> Optional[Dict]:
+        position = self._positions.get((region, variant, instance_type))
+        return None if position is None else self._record(position)
+
+    def cheapest(self, region: str, variant: str, min_vcpu: float = 0, min_memory_gib: float = 0,
+                 below_price: float = np.inf, **equal) -> Optional[Dict]:
+        """Cheapest type with at least ``min_vcpu``/``min_memory_gib``, cheaper than ``below_price``.
+
+        ``equal`` pins columns (``architecture='arm64'``, ``category=...``);
+        ``min_generation`` keeps newer generations only.
+        """
+        positions = self._partitions.get((region, variant))
+        if positions is None:
+            return None
+        columns = {name: values[positions] for name, values in self._columns.items()}
+        mask = (columns['vcpu'] >= min_vcpu) & (columns['memory_gib'] >= min_memory_gib) \
+            & (columns['hourly_price'] < below_price)
+        min_generation = equal.pop('min_generation', None)
+        if min_generation is not None:
+            mask &= columns['generation'] >= min_generation
+        for name, value in equal.items():
+            mask &= columns[name] == value
+        matches = np.flatnonzero(mask)
+        return self._record(positions[matches[0]]) if len(matches) else None
+
+    def rightsizing_target(self, instance_type: str, region: str, variant: str,
+                           p95_cpu: float) -> Optional[Dict]:
+        """Cheapest type keeping p95 CPU under TARGET_P95_UTILIZATION, with a monthly saving.
+
+        vCPU and memory shrink by the same factor (no memory metrics are
+        collected), within the same category and architecture; burstable
+        types are only proposed for burstable instances.
+        """
+        current = self.get(instance_type, region, variant)
+        if current is None:
+            return None
+        factor = min(max(p95_cpu, 0.0) / TARGET_P95_UTILIZATION, 1.0)
+        return self._saving(current, self.cheapest(
+            region, variant,
+            min_vcpu=current['vcpu'] * factor,
+            min_memory_gib=current['memory_gib'] * factor,
+            below_price=current['hourly_price'],
+            category=current['category'],
+            architecture=current['architecture'],
+            burstable=current['burstable']
+        ))
+
+    def graviton_target(self, instance_type: str, region: str, variant: str) -> Optional[Dict]:
+        """Cheapest Graviton (arm64) type at least as large, when it saves money"""
+        current = self.get(instance_type, region, variant)
+        if current is None or current['architecture'] == 'arm64':
+            return None
+        return self._saving(current, self.cheapest(
+            region, variant, current['vcpu'], current['memory_gib'], current['hourly_price'],
+            category=current['category'], architecture='arm64', burstable=current['burstable']
+        ))
+
+    def upgrade_target(self, instance_type: str, region: str, variant: str) -> Optional[Dict]:
+        """Cheapest newer-generation type of the same architecture at least as large"""
+        current = self.get(instance_type, region, variant)
+        if current is None:
+            return None
+        return self._saving(current, self.cheapest(
+            region, variant, current['vcpu'], current['memory_gib'], current['hourly_price'],
+            min_generation=current['generation'] + 1, category=current['category'],
+            architecture=current['architecture'], burstable=current['burstable']
+        ))
+
+    def _saving(self, current: Dict, target: Optional[Dict]) -> Optional[Dict]:
+        if target is None:
+            return None
+        hourly_saving = current['hourly_price'] - target['hourly_price']
+        return {
+            'current': current,
+            'target': target,
+            'monthly_cost': current['hourly_price'] * HOURS_PER_MONTH,
+            'monthly_savings': hourly_saving * HOURS_PER_MONTH,
+            'savings_percent': hourly_saving / current['hourly_price'] * 100
+        }
+
+    def _record(self, position: int) -> Dict:
+        return {column: _python(self._columns[column][position]) for column in CATALOG_COLUMNS}
+
+def _python(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+def load_price_list(path: str, offer: str) -> pd.DataFrame:
+    """Catalog rows from a Price List bulk offer file (.json or .json.gz)"""
+    price_list = _read_json(path)
+    on_demand = price_list.get('terms', {}).get('OnDemand', {})
+    records = []
+    for sku, product in price_list.get('products', {}).items():
+        variant = OFFERS[offer](product)
+        price = _hourly_price(on_demand.get(sku, {}))
+        if variant is None or not price:
+            continue
+        attributes = product['attributes']
+        instance_type = attributes['instanceType']
+        family = instance_type.removeprefix('db.').split('.')[0]
+        generation = re.match(r'[a-z]+(\d+)', family)
+        records.append((
+            attributes['regionCode'], variant, instance_type, family,
+            int(generation.group(1)) if generation else 0,
+            attributes.get('instanceFamily', ''),
+            int(attributes['vcpu']),
+            float(attributes['memory'].split()[0].replace(',', '')),
+            'arm64' if 'Graviton' in attributes.get('physicalProcessor', '') else 'x86_64',
+            attributes.get('currentGeneration') == 'Yes',
+            bool(re.match(r't\d', family)),
+            price
+        ))
+    return pd.DataFrame.from_records(records, columns=CATALOG_COLUMNS)
+
+def _hourly_price(terms: Dict) -> Optional[float]:
+    for term in terms.values():
+        for dimension in term.get('priceDimensions', {}).values():
+            if dimension.get('unit') == 'Hrs':
+                return float(dimension['pricePerUnit']['USD'])
+    return None
+
+def _read_json(path: str) -> Dict:
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+def _offer_path(directory: str, offer: str) -> str:
+    for name in (f'{offer}.json.gz', f'{offer}.json'):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f'No {offer} price list in {directory}')
+
+_catalogs: Dict[str, InstanceCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+def get_instance_catalog(offer: str = 'AmazonEC2') -> InstanceCatalog:
+    """Process-wide catalog of one offer, loaded once from INSTANCE_CATALOG_DIR or the bundled snapshot"""
+    with _catalogs_lock:
+        if offer not in _catalogs:
+            path = _offer_path(os.environ.get('INSTANCE_CATALOG_DIR') or BUNDLED_DIR, offer)
+            _catalogs[offer] = InstanceCatalog(load_price_list(path, offer))
+            logger.info(f'Loaded {len(_catalogs[offer])} {offer} catalog rows from {path}')
+        return _catalogs[offer]
+
+def trim(offer: str, sources: Iterable[str], output: str) -> int:
+    """Merge regional Price List offer files into one file holding only the catalog's products"""
+    trimmed = None
+    for source in sources:
+        price_list = _read_json(source)
+        if trimmed is None:
+            trimmed = {key: value for key, value in price_list.items() if key not in ('products', 'terms')}
+            trimmed.update(products={}, terms={'OnDemand': {}})
+        on_demand = price_list.get('terms', {}).get('OnDemand', {})
+        for sku, product in price_list.get('products', {}).items():
+            if OFFERS[offer](product) is not None and sku in on_demand:
+                trimmed['products'][sku] = product
+                trimmed['terms']['OnDemand'][sku] = on_demand[sku]
+
+    with gzip.open(output, 'wt', encoding='utf-8') as f:
+        json.dump(trimmed or {}, f)
+    return len(trimmed['products']) if trimmed else 0
+
+if __name__ == '__main__':
+    # Refresh the bundled snapshot from downloaded regional offer files:
+    # python -m backend.instance_catalog AmazonEC2 us-east-1.json eu-west-1.json -o backend/data/price_list/AmazonEC2.json.gz
+    parser = argparse.ArgumentParser(description='Trim AWS Price List offer files into an instance catalog snapshot')
+    parser.add_argument('offer', choices=sorted(OFFERS))
+    parser.add_argument('sources', nargs='+')
+    parser.add_argument('-o', '--output', required=True)
+    args = parser.parse_args()
+    print(json.dumps({'offer': args.offer, 'products': trim(args.offer, args.sources, args.output)}))
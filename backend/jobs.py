@@ -0,0 +1,243 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+from .service_analyzers import EC2Analyzer, RDSAnalyzer, S3Analyzer
+from .service_analyzers.database_analyzer import DatabaseAnalyzer
+from .utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_JOB_STORE_PATH = os.path.join(os.path.expanduser('~'), '.aws-cost-analyzer', 'jobs.sqlite3')
+
+# Job type -> runner(progress) returning the analysis; progress(processed, total)
+JOB_TYPES: Dict[str, Callable[[Callable[[int, int], None]], Any]] = {
+    'ec2': lambda progress: EC2Analyzer(progress=progress).analyze(),
+    'rds': lambda progress: RDSAnalyzer(progress=progress).analyze(),
+    's3': lambda progress: S3Analyzer(progress=progress).analyze_buckets(),
+    'databases': lambda progress: DatabaseAnalyzer(progress=progress).analyze_all_databases()
+}
+
+IN_FLIGHT = ('queued', 'running')
+
+# Minimum seconds between persisted progress updates of one job
+PROGRESS_INTERVAL = 1.0
+
+class JobStore:
+    """Job state and results, stored in SQLite so every gunicorn worker sees them.
+
+    Results are kept zlib-compressed for ``result_ttl`` seconds after the job
+    finishes. Each job records the host and pid executing it and a heartbeat
+    refreshed on every progress update, so an in-flight job whose process died,
+    or that has gone ``max_runtime`` seconds without a heartbeat, is
+    recognised as abandoned instead of blocking deduplication forever.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOB_STORE_PATH, result_ttl: int = 24 * 3600,
+                 max_runtime: int = 3600):
+        self.path = path
+        self.result_ttl = result_ttl
+        self.max_runtime = max_runtime
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' id TEXT PRIMARY KEY,'
+                ' type TEXT NOT NULL,'
+                ' status TEXT NOT NULL,'
+                ' processed INTEGER,'
+                ' total INTEGER,'
+                ' result BLOB,'
+                ' error TEXT,'
+                ' host TEXT NOT NULL,'
+                ' pid INTEGER NOT NULL,'
+                ' created_at REAL NOT NULL,'
+                ' started_at REAL,'
+                ' heartbeat_at REAL,'
+                ' finished_at REAL)'
+            )
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+            if 'heartbeat_at' not in columns:
+                conn.execute('ALTER TABLE jobs ADD COLUMN heartbeat_at REAL')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_type_status ON jobs (type, status)')
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps this safe across threads and processes
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def create_or_join(self, job_type: str) -> Tuple[str, bool]:
+        """Return (job_id, created); an in-flight job of the same type is joined instead of duplicated"""
+        now = time.time()
+        with self._connect() as conn:
+            # IMMEDIATE takes the write lock up front, so two workers cannot both miss and insert
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = conn.execute(
+                    'SELECT id, host, pid, COALESCE(heartbeat_at, started_at, created_at)'
+                    ' FROM jobs WHERE type = ? AND status IN '
+                    f"({', '.join('?' * len(IN_FLIGHT))})",
+                    (job_type, *IN_FLIGHT)
+                ).fetchall()
+                for job_id, host, pid, heartbeat_at in rows:
+                    # Restarted containers reuse hostnames and pids, so a silent job is dead either way
+                    if now - heartbeat_at > self.max_runtime:
+                        error = f'abandoned: no progress for {self.max_runtime} seconds'
+                    elif not _process_alive(host, pid):
+                        error = 'abandoned: worker process exited'
+                    else:
+                        conn.execute('COMMIT')
+                        return job_id, False
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                        (error, now, job_id)
+                    )
+
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    'INSERT INTO jobs (id, type, status, host, pid, created_at, heartbeat_at)'
+                    " VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                    (job_id, job_type, socket.gethostname(), os.getpid(), now, now)
+                )
+                conn.execute('DELETE FROM jobs WHERE finished_at < ?', (now - self.result_ttl,))
+                conn.execute('COMMIT')
+                return job_id, True
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def mark_running(self, job_id: str):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, heartbeat_at = ? WHERE id = ?",
+                (now, now, job_id)
+            )
+
+    def update_progress(self, job_id: str, processed: int, total: int):
+        with self._connect() as conn:
+            conn.execute('UPDATE jobs SET processed = ?, total = ?, heartbeat_at = ? WHERE id = ?',
+                         (processed, total, time.time(), job_id))
+
+    def finish(self, job_id: str, result: Any):
+        payload = zlib.compress(json.dumps(result, default=str).encode())
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'succeeded', result = ?, finished_at = ? WHERE id = ?",
+                (payload, time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT id, type, status, processed, total, error, created_at, started_at, finished_at'
+                ' FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            'job_id': row[0],
+            'type': row[1],
+            'status': row[2],
+            'progress': {'processed': row[3], 'total': row[4]},
+            'error': row[5],
+            'created_at': row[6],
+            'started_at': row[7],
+            'finished_at': row[8]
+        }
+
+    def result(self, job_id: str) -> Optional[Any]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM jobs WHERE id = ? AND status = 'succeeded'", (job_id,)
+            ).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+class JobManager:
+    """Runs analyses in the background on a bounded worker pool.
+
+    Submitting returns a job ID straight away; a job of the same type already
+    in flight (in any worker process) is joined instead, so many dashboard
+    users asking for the same scan share a single run.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = 4):
+        self.store = store
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+
+    def submit(self, job_type: str) -> Tuple[Dict, bool]:
+        """Return (job, deduplicated)"""
+        if job_type not in JOB_TYPES:
+            raise ValueError(f'Unsupported job type: {job_type}')
+
+        job_id, created = self.store.create_or_join(job_type)
+        if created:
+            self._pool.submit(self._execute, job_id, job_type)
+        return self.store.get(job_id), not created
+
+    def _execute(self, job_id: str, job_type: str):
+        last_update = [0.0]
+
+        def progress(processed, total):
+            # Throttle writes, but always record completion of the last resource
+            now = time.monotonic()
+            if processed >= total or now - last_update[0] >= PROGRESS_INTERVAL:
+                last_update[0] = now
+                self.store.update_progress(job_id, processed, total)
+
+        try:
+            # Inside the try, so a job that cannot start is failed instead of staying queued
+            self.store.mark_running(job_id)
+            self.store.finish(job_id, JOB_TYPES[job_type](progress))
+            logger.info(f'Job {job_id} ({job_type}) succeeded')
+        except Exception as e:
+            logger.error(f'Job {job_id} ({job_type}) failed: {str(e)}')
+            self.store.fail(job_id, str(e))
+
+def _process_alive(host: str, pid: int) -> bool:
+    if host != socket.gethostname():
+        # Can't check a process on another host; assume it is still working
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_job_manager() -> JobManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(
+                JobStore(
+                    os.environ.get('JOB_STORE_PATH') or DEFAULT_JOB_STORE_PATH,
+                    result_ttl=int(os.environ.get('JOB_RESULT_TTL', 24 * 3600)),
+                    max_runtime=int(os.environ.get('JOB_MAX_RUNTIME', 3600))
+                ),
+                max_workers=int(os.environ.get('JOB_WORKERS', 4))
+            )
+        return _manager
@@ -0,0 +1,287 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+import numpy as np
+from .utils.cloudwatch import get_metric_series
+from .utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL = 3600
+
+# (scope, namespace, dimension name, metric name, period, days, statistics)
+BlockKey = Tuple[Hashable, str, str, str, int, int, Tuple[str, ...]]
+
+class MetricBlock:
+    """One metric for many resources on a shared hourly (``period``) grid.
+
+    ``values`` is a contiguous float32 array of resources x periods x
+    statistics with NaN where CloudWatch returned no datapoint, so every
+    resource's series lines up with ``timestamps`` (epoch seconds, period
+    starts) and fleet-wide reductions are single array operations. Rows are
+    appended as resources are fetched; capacity doubles so appends stay
+    amortized O(1).
+    """
+
+    def __init__(self, statistics: Sequence[str], start: int, periods: int, period: int):
+        self.statistics = tuple(statistics)
+        self.period = period
+        self.timestamps = start + np.arange(periods, dtype=np.int64) * period
+        self.rows: Dict[str, int] = {}
+        self._values = np.empty((0, periods, len(self.statistics)), dtype=np.float32)
+
+    @property
+    def start(self) -> int:
+        return int(self.timestamps[0]) if len(self.timestamps) else 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._values.nbytes + self.timestamps.nbytes
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values[:len(self.rows)]
+
+    def __contains__(self, resource_id: str) -> bool:
+        return resource_id in self.rows
+
+    def add(self, resource_id: str, series: Dict[str, Tuple[List[datetime], List[float]]]):
+        """Place one resource's get_metric_series columns on the grid (an all-NaN row when empty)"""
+        if resource_id in self.rows:
+            return
+        if len(self.rows) == len(self._values):
+            grown = np.empty((max(16, 2 * len(self._values)),) + self._values.shape[1:], dtype=np.float32)
+            grown[:len(self._values)] = self._values
+            self._values = grown
+
+        row = self._values[len(self.rows)]
+        row.fill(np.nan)
+        for column, statistic in enumerate(self.statistics):
+            timestamps, values = series.get(statistic, ((), ()))
+            if not timestamps:
+                continue
+            seconds = np.fromiter((t.timestamp() for t in timestamps), dtype=np.int64, count=len(timestamps))
+            slots = (seconds - self.start) // self.period
+            inside = (slots >= 0) & (slots < len(self.timestamps))
+            row[slots[inside], column] = np.asarray(values, dtype=np.float32)[inside]
+        self.rows[resource_id] = len(self.rows)
+
+    def view(self, resource_ids: Sequence[str]) -> 'MetricView':
+        return MetricView(list(resource_ids), self.values[[self.rows[r] for r in resource_ids]],
+                          self.timestamps, self.statistics)
+
+class MetricView:
+    """The rows of a MetricBlock for a list of resources, with vectorized reductions.
+
+    Every reduction returns one value per resource (in ``resource_ids``
+    order) and ignores missing datapoints; resources without any datapoint
+    get NaN.
+    """
+
+    def __init__(self, resource_ids: List[str], values: np.ndarray, timestamps: np.ndarray,
+                 statistics: Tuple[str, ...]):
+        self.resource_ids = resource_ids
+        self.values = values
+        self.timestamps = timestamps
+        self.statistics = statistics
+
+    def __len__(self):
+        return len(self.resource_ids)
+
+    def matrix(self, statistic: str = 'Average') -> np.ndarray:
+        """resources x periods values of one statistic"""
+        return self.values[:, :, self.statistics.index(statistic)]
+
+    def count(self, statistic: str = 'Average') -> np.ndarray:
+        return (~np.isnan(self.matrix(statistic))).sum(axis=1)
+
+    def mean(self, statistic: str = 'Average') -> np.ndarray:
+        values = self.matrix(statistic)
+        present = ~np.isnan(values)
+        counts = present.sum(axis=1)
+        totals = np.where(present, values, 0).sum(axis=1, dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, totals / counts, np.nan)
+
+    def total(self, statistic: str = 'Sum') -> np.ndarray:
+        values = self.matrix(statistic)
+        present = ~np.isnan(values)
+        totals = np.where(present, values, 0).sum(axis=1, dtype=np.float64)
+        return np.where(present.any(axis=1), totals, np.nan)
+
+    def max(self, statistic: str = 'Maximum') -> np.ndarray:
+        values = self.matrix(statistic)
+        present = ~np.isnan(values)
+        highest = np.where(present, values, -np.inf).max(axis=1, initial=-np.inf).astype(np.float64)
+        return np.where(present.any(axis=1), highest, np.nan)
+
+    def min(self, statistic: str = 'Minimum') -> np.ndarray:
+        values = self.matrix(statistic)
+        present = ~np.isnan(values)
+        lowest = np.where(present, values, np.inf).min(axis=1, initial=np.inf).astype(np.float64)
+        return np.where(present.any(axis=1), lowest, np.nan)
+
+    def percentile(self, q, statistic: str = 'Average') -> np.ndarray:
+        """Percentile(s) per resource; ``q`` may be a list (one column each)"""
+        return nan_percentile(self.matrix(statistic), q)
+
+    def summaries(self) -> Dict[str, Dict]:
+        """Per-resource summary of the available statistics, for resources with datapoints"""
+        columns = {}
+        if 'Average' in self.statistics:
+            columns['average'] = self.mean('Average')
+            columns['p95'] = self.percentile(95, 'Average')
+        if 'Maximum' in self.statistics:
+            columns['max'] = self.max('Maximum')
+        if 'Minimum' in self.statistics:
+            columns['min'] = self.min('Minimum')
+        if 'Sum' in self.statistics:
+            columns['sum'] = self.total('Sum')
+        counts = self.count(self.statistics[0])
+
+        return {
+            resource_id: {
+                **{name: float(column[i]) for name, column in columns.items()},
+                'datapoints': int(counts[i])
+            }
+            for i, resource_id in enumerate(self.resource_ids)
+            if counts[i]
+        }
+
+def nan_percentile(values: np.ndarray, q) -> np.ndarray:
+    """Linear-interpolated percentile(s) of each row ignoring NaN (NaN for empty rows).
+
+    Rows are sorted once (NaN last) and every percentile is read from the
+    sorted rows, instead of np.nanpercentile's per-row Python fallback.
+    """
+    ordered = np.sort(values, axis=1)
+    counts = (~np.isnan(ordered)).sum(axis=1)
+    last = np.maximum(counts - 1, 0)[:, None]
+    qs = np.atleast_1d(np.asarray(q, dtype=np.float64))
+    position = last * (qs[None, :] / 100)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, last)
+    low = np.take_along_axis(ordered, lower, axis=1).astype(np.float64)
+    high = np.take_along_axis(ordered, upper, axis=1).astype(np.float64)
+    result = low + (high - low) * (position - lower)
+    result[counts == 0] = np.nan
+    return result if np.ndim(q) else result[:, 0]
+
+class MetricStore:
+    """Process-wide cache of CloudWatch series as MetricBlocks.
+
+    Blocks are keyed by scope (region/account), namespace, dimension,
+    metric, period, window length and statistics, and kept for ``ttl``
+    seconds, so resources fetched by one request are served from memory to
+    the next and only resources not yet in a block are requested from
+    CloudWatch. The total array footprint is bounded by ``max_bytes``: least
+    recently used blocks are evicted first.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._blocks: 'OrderedDict[BlockKey, Tuple[float, MetricBlock]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fetch(self, cloudwatch, namespace: str, dimension_name: str, resource_ids: Sequence[str],
+              metric_names: Sequence[str], days: int, period: int = 3600,
+              statistics: Sequence[str] = ('Average', 'Maximum'),
+              scope: Optional[Hashable] = None) -> Dict[str, MetricView]:
+        """Views of ``metric_names`` for ``resource_ids`` over the last ``days``, fetching what is missing.
+
+        All missing (resource, metric) pairs go out in one batched
+        get_metric_series call. ``scope`` must tell apart clients of
+        different accounts; it defaults to the client's region.
+        """
+        resource_ids = list(dict.fromkeys(resource_ids))
+        if scope is None:
+            scope = cloudwatch.meta.region_name
+        blocks = {
+            metric_name: self._block((scope, namespace, dimension_name, metric_name, period, days, tuple(statistics)))
+            for metric_name in metric_names
+        }
+
+        with self._lock:
+            missing = [
+                (resource_id, metric_name)
+                for metric_name, block in blocks.items()
+                for resource_id in resource_ids
+                if resource_id not in block
+            ]
+
+        # Blocks created in different periods have different windows; fetch each window separately
+        windows: Dict[int, List[Tuple[str, str]]] = {}
+        for resource_id, metric_name in missing:
+            windows.setdefault(blocks[metric_name].start, []).append((resource_id, metric_name))
+
+        for start, pairs in windows.items():
+            periods = len(blocks[pairs[0][1]].timestamps)
+            series = get_metric_series(
+                cloudwatch,
+                [
+                    ((resource_id, metric_name), namespace, metric_name,
+                     [{'Name': dimension_name, 'Value': resource_id}])
+                    for resource_id, metric_name in pairs
+                ],
+                datetime.fromtimestamp(start, timezone.utc),
+                datetime.fromtimestamp(start + periods * period, timezone.utc),
+                period, statistics
+            )
+            with self._lock:
+                for (resource_id, metric_name), metric_series in series.items():
+                    blocks[metric_name].add(resource_id, metric_series)
+                self._evict()
+
+        with self._lock:
+            return {metric_name: block.view(resource_ids) for metric_name, block in blocks.items()}
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(block.nbytes for _, block in self._blocks.values())
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+
+    def _block(self, key: BlockKey) -> MetricBlock:
+        _, _, _, _, period, days, statistics = key
+        now = time.time()
+        with self._lock:
+            entry = self._blocks.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._blocks.move_to_end(key)
+                return entry[1]
+
+            # Grid of whole periods ending at the last period boundary
+            end = int(now) // period * period
+            periods = days * 86400 // period
+            block = MetricBlock(statistics, end - periods * period, periods, period)
+            self._blocks[key] = (time.monotonic() + self.ttl, block)
+            return block
+
+    def _evict(self):
+        total = sum(block.nbytes for _, block in self._blocks.values())
+        # Keep the most recent block even when it alone exceeds the budget
+        while total > self.max_bytes and len(self._blocks) > 1:
+            key, (_, block) = self._blocks.popitem(last=False)
+            total -= block.nbytes
+            logger.info(f'Evicted metric block {key[1:4]} ({block.nbytes} bytes)')
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_metric_store() -> MetricStore:
+    """Process-wide metric store sized by METRIC_STORE_MAX_BYTES, kept for METRIC_STORE_TTL seconds"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MetricStore(
+                max_bytes=int(os.environ.get('METRIC_STORE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+                ttl=float(os.environ.get('METRIC_STORE_TTL', DEFAULT_TTL))
+            )
+        return _store
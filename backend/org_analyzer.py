@@ -0,0 +1,112 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from .service_analyzers import EC2Analyzer, RDSAnalyzer, analyze_regions
+from .utils.aws_utils import get_aws_client, paginate
+from .utils.ce_cache import CachedCostExplorerClient
+from .utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SERVICE_ANALYZERS = {
+    'ec2': EC2Analyzer,
+    'rds': RDSAnalyzer
+}
+
+# Per-resource lists left out of account rollups; counters, histograms and opportunities are kept
+DETAIL_KEYS = ('instances',)
+
+class OrganizationAnalyzer:
+    """Runs the service analyzers across every active account of an AWS Organization.
+
+    Member accounts are entered through ORG_ROLE_NAME (a read-only role that
+    trusts the management account) by the shared client registry; the
+    management account itself uses the default credentials. Cost per account
+    comes from a single payer-level Cost Explorer query grouped by
+    LINKED_ACCOUNT, and the per-account service analyses run on a pool
+    bounded by ORG_MAX_WORKERS.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.organizations = get_aws_client('organizations')
+        self.ce = CachedCostExplorerClient(get_aws_client('ce', 'us-east-1'))
+        self.max_workers = max_workers or int(os.environ.get('ORG_MAX_WORKERS', 10))
+
+    def list_accounts(self) -> List[Dict]:
+        return [
+            {'id': account['Id'], 'name': account['Name']}
+            for account in paginate(self.organizations, 'list_accounts', 'Accounts')
+            if account['Status'] == 'ACTIVE'
+        ]
+
+    def analyze(self, services: Optional[List[str]] = None, accounts: Optional[List[str]] = None,
+                regions: Optional[List[str]] = None) -> Dict:
+        services = services or list(SERVICE_ANALYZERS)
+        members = self.list_accounts()
+        if accounts:
+            members = [account for account in members if account['id'] in accounts]
+        costs = self.get_costs_by_account()
+
+        rollups = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(members)))) as pool:
+            futures = {
+                pool.submit(self._analyze_account, account['id'], services, regions): account
+                for account in members
+            }
+            for future in as_completed(futures):
+                account = futures[future]
+                rollup = {
+                    'name': account['name'],
+                    'total_cost': costs.get(account['id'], 0.0)
+                }
+                try:
+                    rollup.update(status='ok', services=future.result())
+                except Exception as e:
+                    logger.error(f'Organization analysis failed for {account["id"]}: {str(e)}')
+                    rollup.update(status='error', error=str(e))
+                rollups[account['id']] = rollup
+
+        return {
+            'total_accounts': len(members),
+            'failed_accounts': sum(1 for rollup in rollups.values() if rollup['status'] == 'error'),
+            'total_cost': sum(rollup['total_cost'] for rollup in rollups.values()),
+            'accounts': dict(sorted(rollups.items(), key=lambda item: item[1]['total_cost'], reverse=True))
+        }
+
+    def get_costs_by_account(self, days: int = 30) -> Dict[str, float]:
+        end_date = datetime.now().strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+        costs = {}
+        for result in paginate(
+            self.ce, 'get_cost_and_usage', 'ResultsByTime',
+            TimePeriod={
+                'Start': start_date,
+                'End': end_date
+            },
+            Granularity='MONTHLY',
+            Metrics=['UnblendedCost'],
+            GroupBy=[{'Type': 'DIMENSION', 'Key': 'LINKED_ACCOUNT'}]
+        ):
+            for group in result['Groups']:
+                account_id = group['Keys'][0]
+                costs[account_id] = costs.get(account_id, 0.0) + float(group['Metrics']['UnblendedCost']['Amount'])
+        return costs
+
+    def _analyze_account(self, account_id: str, services: List[str],
+                         regions: Optional[List[str]]) -> Dict:
+        results = {}
+        for service in services:
+            analyzer_cls = SERVICE_ANALYZERS[service]
+            if regions:
+                analysis = analyze_regions(analyzer_cls, regions, account_id=account_id)
+            else:
+                analysis = analyzer_cls(account_id=account_id).analyze()
+            results[service] = _rollup(analysis)
+        return results
+
+def _rollup(analysis: Dict) -> Dict:
+    rollup = {key: value for key, value in analysis.items() if key not in DETAIL_KEYS}
+    rollup['optimization_count'] = len(analysis.get('optimization_opportunities', []))
+    return rollup
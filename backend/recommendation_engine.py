@@ -1,109 +1,399 @@
-from typing import List, Dict
-from datetime import datetime, timedelta
+import os
+import threading
+from datetime import timedelta
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .cost_analyzer import AWSCostAnalyzer
+from .instance_catalog import EC2_VARIANT, HOURS_PER_MONTH, InstanceCatalog, get_instance_catalog, rds_variant
+from .rule_engine import RuleEngine
+from .service_analyzers.ec2_analyzer import EC2Analyzer
+from .service_analyzers.rds_analyzer import RDSAnalyzer
+from .service_analyzers.s3_analyzer import S3Analyzer
+from .utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# S3 Standard storage, first 50 TB (USD per GB-month)
+S3_STANDARD_GB_MONTH = 0.023
+
+# Days compared by the service cost tables: the last window against the one before
+SERVICE_WINDOW_DAYS = 30
+
+PROFILE_FIELDS = ['mean', 'p50', 'p95', 'p99', 'peak_to_mean', 'active_share']
 
 class RecommendationEngine:
-    def __init__(self):
-        self.service_specific_rules = {
-            'EC2': self._get_ec2_recommendations,
-            'RDS': self._get_rds_recommendations,
-            'S3': self._get_s3_recommendations,
-            'Lambda': self._get_lambda_recommendations
-        }
-    
+    """Recommendations from the rule engine's registered rules (see get_rule_engine)"""
+
+    def __init__(self, engine: Optional[RuleEngine] = None):
+        self.engine = engine or get_rule_engine()
+
     def generate_recommendations(self) -> List[Dict]:
-        recommendations = []
-        for service, rule_func in self.service_specific_rules.items():
-            service_recommendations = rule_func()
-            recommendations.extend(service_recommendations)
+        recommendations, errors = self.engine.evaluate()
+        for source, error in errors.items():
+            logger.warning(f'Recommendations from {source} skipped: {error}')
         return recommendations
-    
-    def _get_ec2_recommendations(self) -> List[Dict]:
-        return [
-            {
-                'service': 'EC2',
-                'type': 'cost_optimization',
-                'title': 'Consider Graviton Migration',
-                'description': 'Migrate compatible workloads to Graviton instances for up to 40% cost savings',
-                'impact': 'High',
-                'effort': 'Medium',
-                'savings_potential': '20-40%',
-                'implementation_steps': [
-                    'Identify compatible workloads',
-                    'Test applications on Graviton',
-                    'Plan migration schedule',
-                    'Monitor performance post-migration'
-                ]
-            },
-            {
-                'service': 'EC2',
-                'type': 'rightsizing',
-                'title': 'Instance Rightsizing Opportunity',
-                'description': 'Several instances showing consistent low CPU utilization',
-                'impact': 'Medium',
-                'effort': 'Low',
-                'savings_potential': '15-30%',
-                'implementation_steps': [
-                    'Review CloudWatch metrics',
-                    'Identify underutilized instances',
-                    'Select right-sized instance types',
-                    'Schedule instance modifications'
-                ]
-            }
+
+    def list_rules(self) -> List[Dict]:
+        return [rule.to_dict() for rule in self.engine.rules.values()]
+
+# Resource tables: one row per resource, keyed by resource_id
+
+def ec2_instance_table() -> pd.DataFrame:
+    """EC2 instances with CPU profile, monthly cost and catalog-priced target savings"""
+    analyzer = EC2Analyzer()
+    instances = analyzer.analyze()['instances']
+    frame = pd.DataFrame({
+        'resource_id': [i['id'] for i in instances],
+        'instance_type': [i['type'] for i in instances],
+        'state': [i['state'] for i in instances],
+        'platform': [i['platform'] for i in instances],
+        'region': analyzer.ec2.meta.region_name,
+        'monthly_cost': _monthly_costs(instances),
+        **_profile_columns(instances)
+    })
+    frame['variant'] = np.where(frame['platform'] == 'linux', EC2_VARIANT, None)
+    return _with_catalog_targets(frame, get_instance_catalog('AmazonEC2'))
+
+def rds_instance_table() -> pd.DataFrame:
+    """RDS instances with CPU profile, connections, monthly cost and catalog-priced rightsizing"""
+    analyzer = RDSAnalyzer()
+    instances = analyzer.analyze()['instances']
+    frame = pd.DataFrame({
+        'resource_id': [i['identifier'] for i in instances],
+        'instance_type': [i['size'] for i in instances],
+        'engine': [i['engine'] for i in instances],
+        'state': [i['status'] for i in instances],
+        'multi_az': [bool(i['multi_az']) for i in instances],
+        'storage_gib': [i['storage'] for i in instances],
+        'max_connections': [
+            i['metrics'].get('DatabaseConnections', {}).get('max', np.nan) for i in instances
+        ],
+        'region': analyzer.rds.meta.region_name,
+        'monthly_cost': _monthly_costs(instances),
+        **_profile_columns(instances)
+    })
+    frame['variant'] = [rds_variant(i['engine'], i['multi_az']) for i in instances]
+    return _with_catalog_targets(frame, get_instance_catalog('AmazonRDS'))
+
+def s3_bucket_table() -> pd.DataFrame:
+    """S3 buckets with lifecycle status and STANDARD storage size and cost"""
+    buckets = [b for b in S3Analyzer().analyze_buckets()['bucket_details'] if 'error' not in b]
+    frame = pd.DataFrame({
+        'resource_id': [b['name'] for b in buckets],
+        'region': [b['region'] for b in buckets],
+        'has_lifecycle': [bool(b['has_lifecycle']) for b in buckets],
+        'object_count': [b['object_count'] for b in buckets],
+        'size_gib': np.array([b['size'] for b in buckets], dtype=np.float64) / 1024 ** 3,
+        'standard_gib': np.array(
+            [b['storage_classes'].get('STANDARD', 0) for b in buckets], dtype=np.float64
+        ) / 1024 ** 3
+    })
+    frame['standard_monthly_cost'] = frame['standard_gib'] * S3_STANDARD_GB_MONTH
+    return frame
+
+def service_cost_table() -> pd.DataFrame:
+    """Services with their cost over the last SERVICE_WINDOW_DAYS days and the window before"""
+    matrix = AWSCostAnalyzer().daily_matrix()
+    if matrix.empty:
+        return pd.DataFrame(columns=['resource_id', 'service', 'monthly_cost', 'previous_monthly_cost',
+                                     'change_percent'])
+    latest = matrix.index.max()
+    current_start = latest - timedelta(days=SERVICE_WINDOW_DAYS - 1)
+    previous_start = current_start - timedelta(days=SERVICE_WINDOW_DAYS)
+    current = matrix[matrix.index >= current_start].sum()
+    previous = matrix[(matrix.index >= previous_start) & (matrix.index < current_start)].sum()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        change = np.where(previous > 0, (current - previous) / previous * 100, np.nan)
+    return pd.DataFrame({
+        'resource_id': matrix.columns,
+        'service': matrix.columns,
+        'monthly_cost': current.to_numpy(),
+        'previous_monthly_cost': previous.to_numpy(),
+        'change_percent': change
+    })
+
+def _monthly_costs(instances: List[Dict]) -> np.ndarray:
+    return np.array(
+        [(i['cost'] or {}).get('monthly_estimate', np.nan) for i in instances], dtype=np.float64
+    )
+
+def _profile_columns(instances: List[Dict]) -> Dict[str, list]:
+    profiles = [i['utilization_profile'] or {} for i in instances]
+    columns = {'cpu_pattern': [p.get('pattern', 'no_data') for p in profiles]}
+    for field in PROFILE_FIELDS:
+        columns[f'cpu_{field}'] = np.array(
+            [p.get(field) if p.get(field) is not None else np.nan for p in profiles], dtype=np.float64
+        )
+    return columns
+
+def _with_catalog_targets(frame: pd.DataFrame, catalog: InstanceCatalog) -> pd.DataFrame:
+    """Add catalog columns and target savings, each computed once per distinct configuration.
+
+    Fleets run few distinct (type, region, variant) combinations, so the
+    catalog is searched per combination (and per whole p95 percent for
+    rightsizing) and the results are joined back onto every instance.
+    Instances the catalog does not price get NaN. Without a cost from the
+    resource cost index, running instances are costed at on-demand price.
+    """
+    keys = ['instance_type', 'region', 'variant']
+    configurations = []
+    for instance_type, region, variant in frame[keys].drop_duplicates().itertuples(index=False):
+        current = catalog.get(instance_type, region, variant) if variant else None
+        graviton = catalog.graviton_target(instance_type, region, variant) if current else None
+        upgrade = catalog.upgrade_target(instance_type, region, variant) if current else None
+        configurations.append({
+            'instance_type': instance_type, 'region': region, 'variant': variant,
+            'hourly_price': current['hourly_price'] if current else np.nan,
+            'vcpu': current['vcpu'] if current else np.nan,
+            'memory_gib': current['memory_gib'] if current else np.nan,
+            'architecture': current['architecture'] if current else None,
+            'generation': current['generation'] if current else np.nan,
+            'graviton_target': graviton['target']['instance_type'] if graviton else None,
+            'graviton_savings': graviton['monthly_savings'] if graviton else np.nan,
+            'upgrade_target': upgrade['target']['instance_type'] if upgrade else None,
+            'upgrade_savings': upgrade['monthly_savings'] if upgrade else np.nan
+        })
+    frame = frame.merge(pd.DataFrame(configurations, columns=_CONFIGURATION_COLUMNS), on=keys, how='left')
+
+    frame['cpu_p95_ceil'] = np.ceil(frame['cpu_p95'])
+    sizings = []
+    for instance_type, region, variant, p95 in \
+            frame[keys + ['cpu_p95_ceil']].dropna().drop_duplicates().itertuples(index=False):
+        target = catalog.rightsizing_target(instance_type, region, variant, p95)
+        sizings.append({
+            'instance_type': instance_type, 'region': region, 'variant': variant, 'cpu_p95_ceil': p95,
+            'rightsizing_target': target['target']['instance_type'] if target else None,
+            'rightsizing_savings': target['monthly_savings'] if target else np.nan
+        })
+    frame = frame.merge(pd.DataFrame(sizings, columns=_SIZING_COLUMNS),
+                        on=keys + ['cpu_p95_ceil'], how='left').drop(columns='cpu_p95_ceil')
+
+    on_demand = np.where(frame['state'].isin(['running', 'available']),
+                         frame['hourly_price'] * HOURS_PER_MONTH, np.nan)
+    frame['monthly_cost'] = frame['monthly_cost'].fillna(pd.Series(on_demand, index=frame.index))
+    return frame
+
+_CONFIGURATION_COLUMNS = [
+    'instance_type', 'region', 'variant', 'hourly_price', 'vcpu', 'memory_gib', 'architecture',
+    'generation', 'graviton_target', 'graviton_savings', 'upgrade_target', 'upgrade_savings'
+]
+_SIZING_COLUMNS = [
+    'instance_type', 'region', 'variant', 'cpu_p95_ceil', 'rightsizing_target', 'rightsizing_savings'
+]
+
+TABLES = {
+    'ec2_instances': ec2_instance_table,
+    'rds_instances': rds_instance_table,
+    's3_buckets': s3_bucket_table,
+    'services': service_cost_table
+}
+
+# Built-in rules, in the same declarative form as RULES_PATH files
+DEFAULT_RULES = [
+    {
+        'id': 'ec2-graviton-migration',
+        'table': 'ec2_instances',
+        'when': ["state == 'running'", 'graviton_savings > 0'],
+        'savings': 'graviton_savings',
+        'columns': ['instance_type', 'graviton_target', 'monthly_cost'],
+        'service': 'EC2',
+        'type': 'cost_optimization',
+        'title': 'Consider Graviton Migration',
+        'description': '{resource_count} running instances have a cheaper Graviton equivalent',
+        'impact': 'High',
+        'effort': 'Medium',
+        'implementation_steps': [
+            'Identify compatible workloads',
+            'Test applications on Graviton',
+            'Plan migration schedule',
+            'Monitor performance post-migration'
+        ]
+    },
+    {
+        'id': 'ec2-rightsizing',
+        'table': 'ec2_instances',
+        'when': ["state == 'running'", "cpu_pattern == 'underutilized'", 'rightsizing_savings > 0'],
+        'savings': 'rightsizing_savings',
+        'columns': ['instance_type', 'rightsizing_target', 'cpu_p95', 'cpu_p99'],
+        'service': 'EC2',
+        'type': 'rightsizing',
+        'title': 'Instance Rightsizing Opportunity',
+        'description': '{resource_count} instances have p95 and p99 CPU that fit a smaller instance type',
+        'impact': 'Medium',
+        'effort': 'Low',
+        'implementation_steps': [
+            'Review CloudWatch metrics',
+            'Identify underutilized instances',
+            'Select right-sized instance types',
+            'Schedule instance modifications'
+        ]
+    },
+    {
+        'id': 'ec2-idle',
+        'table': 'ec2_instances',
+        'when': ["state == 'running'", "cpu_pattern == 'idle'"],
+        'savings': 'monthly_cost',
+        'columns': ['instance_type', 'cpu_p99', 'monthly_cost'],
+        'service': 'EC2',
+        'type': 'cost_optimization',
+        'title': 'Stop Idle Instances',
+        'description': '{resource_count} running instances stayed under 5% CPU for the whole period',
+        'impact': 'High',
+        'effort': 'Low',
+        'implementation_steps': [
+            'Confirm the instances are no longer needed',
+            'Snapshot attached volumes',
+            'Stop or terminate the instances'
         ]
-    
-    def _get_rds_recommendations(self) -> List[Dict]:
-        return [
-            {
-                'service': 'RDS',
-                'type': 'modernization',
-                'title': 'Evaluate Aurora Serverless v2',
-                'description': 'Consider migrating compatible RDS instances to Aurora Serverless v2 for better cost optimization',
-                'impact': 'High',
-                'effort': 'High',
-                'savings_potential': '30-50%',
-                'implementation_steps': [
-                    'Assess database workload patterns',
-                    'Compare costs with current setup',
-                    'Plan migration strategy',
-                    'Test application compatibility'
-                ]
-            }
+    },
+    {
+        'id': 'ec2-previous-generation',
+        'table': 'ec2_instances',
+        'when': ["state == 'running'", 'upgrade_savings > 0'],
+        'savings': 'upgrade_savings',
+        'columns': ['instance_type', 'upgrade_target', 'monthly_cost'],
+        'service': 'EC2',
+        'type': 'modernization',
+        'title': 'Upgrade Previous-Generation Instances',
+        'description': '{resource_count} instances have a cheaper newer-generation equivalent',
+        'impact': 'Medium',
+        'effort': 'Low',
+        'implementation_steps': [
+            'Check AMI and driver support for the newer generation',
+            'Change the instance type during a maintenance window',
+            'Monitor performance post-migration'
         ]
-    
-    def _get_s3_recommendations(self) -> List[Dict]:
-        return [
-            {
-                'service': 'S3',
-                'type': 'storage_optimization',
-                'title': 'Optimize Storage Classes',
-                'description': 'Implement lifecycle policies to move infrequently accessed data to cheaper storage tiers',
-                'impact': 'Medium',
-                'effort': 'Low',
-                'savings_potential': '40-70%',
-                'implementation_steps': [
-                    'Analyze access patterns',
-                    'Define lifecycle rules',
-                    'Implement transitions',
-                    'Monitor storage costs'
-                ]
-            }
+    },
+    {
+        'id': 'ec2-scheduled-workloads',
+        'table': 'ec2_instances',
+        'when': ["state == 'running'", "cpu_pattern == 'scheduled'"],
+        'savings': 'monthly_cost * (1 - cpu_active_share)',
+        'columns': ['instance_type', 'cpu_active_share', 'monthly_cost'],
+        'service': 'EC2',
+        'type': 'cost_optimization',
+        'title': 'Schedule Part-Time Workloads',
+        'description': '{resource_count} instances are only busy at recurring hours of the day',
+        'impact': 'Medium',
+        'effort': 'Medium',
+        'implementation_steps': [
+            'Review the hour-of-week utilization heatmap',
+            'Stop instances outside their busy hours with a schedule',
+            'Consider moving batch jobs to Spot or AWS Batch'
         ]
-    
-    def _get_lambda_recommendations(self) -> List[Dict]:
-        return [
-            {
-                'service': 'Lambda',
-                'type': 'performance_optimization',
-                'title': 'Optimize Lambda Memory Settings',
-                'description': 'Adjust memory settings based on function execution patterns',
-                'impact': 'Low',
-                'effort': 'Low',
-                'savings_potential': '10-20%',
-                'implementation_steps': [
-                    'Review execution metrics',
-                    'Test different memory configurations',
-                    'Update function settings',
-                    'Monitor performance impact'
-                ]
-            }
-        ]
\ No newline at end of file
+    },
+    {
+        'id': 'rds-aurora-serverless',
+        'table': 'rds_instances',
+        'when': ["engine in ['mysql', 'postgres']", "cpu_pattern in ['idle', 'scheduled', 'bursty']"],
+        'savings': 'monthly_cost * 0.3',
+        'columns': ['instance_type', 'engine', 'cpu_pattern', 'monthly_cost'],
+        'service': 'RDS',
+        'type': 'modernization',
+        'title': 'Evaluate Aurora Serverless v2',
+        'description': '{resource_count} databases have intermittent load that Aurora Serverless v2 can scale with',
+        'impact': 'High',
+        'effort': 'High',
+        'implementation_steps': [
+            'Assess database workload patterns',
+            'Compare costs with current setup',
+            'Plan migration strategy',
+            'Test application compatibility'
+        ]
+    },
+    {
+        'id': 'rds-rightsizing',
+        'table': 'rds_instances',
+        'when': ["cpu_pattern == 'underutilized'", 'rightsizing_savings > 0'],
+        'savings': 'rightsizing_savings',
+        'columns': ['instance_type', 'rightsizing_target', 'cpu_p95', 'cpu_p99'],
+        'service': 'RDS',
+        'type': 'rightsizing',
+        'title': 'Database Rightsizing Opportunity',
+        'description': '{resource_count} databases have p95 and p99 CPU that fit a smaller instance class',
+        'impact': 'Medium',
+        'effort': 'Medium',
+        'implementation_steps': [
+            'Review CPU, memory and connection metrics',
+            'Select right-sized instance classes',
+            'Modify instances during a maintenance window'
+        ]
+    },
+    {
+        'id': 's3-lifecycle-policies',
+        'table': 's3_buckets',
+        'when': ['has_lifecycle == False', 'standard_gib > 100'],
+        'savings': 'standard_monthly_cost * 0.4',
+        'columns': ['region', 'standard_gib', 'standard_monthly_cost'],
+        'service': 'S3',
+        'type': 'storage_optimization',
+        'title': 'Optimize Storage Classes',
+        'description': '{resource_count} buckets hold over 100 GiB in STANDARD without lifecycle rules',
+        'impact': 'Medium',
+        'effort': 'Low',
+        'implementation_steps': [
+            'Analyze access patterns',
+            'Define lifecycle rules',
+            'Implement transitions',
+            'Monitor storage costs'
+        ]
+    },
+    {
+        'id': 'lambda-memory-settings',
+        'table': 'services',
+        'when': ["service == 'AWS Lambda'", 'monthly_cost > 100'],
+        'savings': 'monthly_cost * 0.1',
+        'columns': ['monthly_cost'],
+        'service': 'Lambda',
+        'type': 'performance_optimization',
+        'title': 'Optimize Lambda Memory Settings',
+        'description': 'Adjust memory settings based on function execution patterns',
+        'impact': 'Low',
+        'effort': 'Low',
+        'implementation_steps': [
+            'Review execution metrics',
+            'Test different memory configurations',
+            'Update function settings',
+            'Monitor performance impact'
+        ]
+    },
+    {
+        'id': 'service-cost-growth',
+        'table': 'services',
+        'when': ['monthly_cost > 1000', 'change_percent > 50'],
+        'columns': ['monthly_cost', 'previous_monthly_cost', 'change_percent'],
+        'service': 'Cost Explorer',
+        'type': 'cost_review',
+        'title': 'Review Fast-Growing Service Costs',
+        'description': '{resource_count} services cost over 50% more than in the previous 30 days',
+        'impact': 'Medium',
+        'effort': 'Low',
+        'implementation_steps': [
+            'Break the service cost down by usage type',
+            'Identify the resources behind the growth',
+            'Set a budget alert for the service'
+        ]
+    }
+]
+
+_engine: Optional[RuleEngine] = None
+_engine_lock = threading.Lock()
+
+def get_rule_engine() -> RuleEngine:
+    """Process-wide rule engine with the built-in tables and rules, RULES_PATH rules and RULE_PLUGINS"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            engine = RuleEngine(input_ttl=float(os.environ.get('RULE_INPUT_TTL', 900)))
+            for name, builder in TABLES.items():
+                engine.register_table(name, builder)
+            for spec in DEFAULT_RULES:
+                engine.register(spec)
+            if os.environ.get('RULES_PATH'):
+                count = engine.load_rules(os.environ['RULES_PATH'])
+                logger.info(f"Loaded {count} rules from {os.environ['RULES_PATH']}")
+            plugins = [m.strip() for m in os.environ.get('RULE_PLUGINS', '').split(',') if m.strip()]
+            engine.load_plugins(plugins)
+            _engine = engine
+        return _engine
@@ -0,0 +1,161 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .utils.aws_utils import get_aws_client, iter_pages
+from .utils.ce_cache import CachedCostExplorerClient
+from .utils.logger import get_logger
+from .utils.memo import ArtifactMemo
+
+logger = get_logger(__name__)
+
+# Cost Explorer keeps resource-level daily cost for the last 14 days
+RESOURCE_COST_DAYS = 14
+RESOURCE_COST_SERVICES = [
+    'Amazon Elastic Compute Cloud - Compute',
+    'Amazon Relational Database Service',
+    'Amazon DynamoDB'
+]
+
+ROW_COLUMNS = ['date', 'resource_id', 'service', 'cost']
+
+DAYS_PER_MONTH = 30
+
+class ResourceCostIndex:
+    """Hash map from resource ID to its daily cost array over the last days.
+
+    Resource IDs are what Cost Explorer and CUR report: the instance ID for
+    EC2 (``i-...``) and the ARN for other services, so analyzers join with
+    ``InstanceId``, ``DBInstanceArn`` or ``TableArn`` in one dict lookup.
+    """
+
+    def __init__(self, rows: pd.DataFrame):
+        resource_codes, resources = pd.factorize(rows['resource_id'])
+        day_codes, self.days = pd.factorize(rows['date'], sort=True)
+        # One bincount lays every (resource, day) cost into a resources x days matrix
+        matrix = np.bincount(
+            resource_codes * len(self.days) + day_codes,
+            weights=rows['cost'].to_numpy(dtype='float64'),
+            minlength=len(resources) * len(self.days)
+        ).reshape(len(resources), len(self.days))
+        self._daily: Dict[str, np.ndarray] = dict(zip(resources, matrix))
+        self._window = {
+            'start_date': self.days[0].strftime('%Y-%m-%d') if len(self.days) else None,
+            'end_date': (self.days[-1] + timedelta(days=1)).strftime('%Y-%m-%d') if len(self.days) else None
+        }
+
+    def __len__(self):
+        return len(self._daily)
+
+    def __contains__(self, resource_id: str) -> bool:
+        return resource_id in self._daily
+
+    def daily(self, resource_id: str) -> Optional[np.ndarray]:
+        return self._daily.get(resource_id)
+
+    def monthly_cost(self, resource_id: str) -> Optional[float]:
+        """Average daily cost over the window, scaled to a 30-day month"""
+        daily = self._daily.get(resource_id)
+        return float(daily.sum()) / len(daily) * DAYS_PER_MONTH if daily is not None else None
+
+    def summary(self, resource_id: str) -> Optional[Dict]:
+        """Cost block attached to analyzer records (None when the resource has no cost data)"""
+        daily = self._daily.get(resource_id)
+        if daily is None:
+            return None
+        total = float(daily.sum())
+        return {
+            'total': total,
+            'days': len(daily),
+            'daily_average': total / len(daily),
+            'monthly_estimate': total / len(daily) * DAYS_PER_MONTH,
+            **self._window
+        }
+
+def savings_amount(monthly_cost: Optional[float], percent: str) -> Optional[float]:
+    """Dollar savings per month for a '20-40%' style estimate, taking the low end"""
+    match = re.match(r'\s*(\d+(?:\.\d+)?)', percent or '')
+    if monthly_cost is None or not match:
+        return None
+    return monthly_cost * float(match.group(1)) / 100
+
+def cost_resource_id(arn: str) -> str:
+    """Resource ARN -> the ID Cost Explorer reports it under (instance ID for EC2, else the ARN)"""
+    if arn.startswith('arn:aws:ec2:') and ':instance/' in arn:
+        return arn.rsplit('/', 1)[-1]
+    return arn
+
+def fetch_resource_costs(ce, services: List[str] = RESOURCE_COST_SERVICES,
+                         days: int = RESOURCE_COST_DAYS) -> pd.DataFrame:
+    """Daily cost per resource from Cost Explorer (requires resource-level data to be enabled)"""
+    end_date = datetime.utcnow().date()
+    start_date = end_date - timedelta(days=days - 1)
+    pages = iter_pages(
+        ce, 'get_cost_and_usage_with_resources',
+        TimePeriod={
+            'Start': start_date.strftime('%Y-%m-%d'),
+            'End': end_date.strftime('%Y-%m-%d')
+        },
+        Granularity='DAILY',
+        Metrics=['UnblendedCost'],
+        Filter={'Dimensions': {'Key': 'SERVICE', 'Values': services}},
+        GroupBy=[{'Type': 'DIMENSION', 'Key': 'SERVICE'}, {'Type': 'DIMENSION', 'Key': 'RESOURCE_ID'}]
+    )
+    records = [
+        (result['TimePeriod']['Start'], group['Keys'][1], group['Keys'][0],
+         group['Metrics']['UnblendedCost']['Amount'])
+        for page in pages
+        for result in page['ResultsByTime']
+        for group in result['Groups']
+    ]
+    rows = pd.DataFrame.from_records(records, columns=ROW_COLUMNS)
+    rows['date'] = pd.to_datetime(rows['date'], format='%Y-%m-%d')
+    rows['cost'] = rows['cost'].astype('float64')
+    return rows
+
+def load_resource_costs(days: int = RESOURCE_COST_DAYS) -> pd.DataFrame:
+    """Resource-day cost rows from CUR line items (COST_SOURCE=cur) or Cost Explorer"""
+    if os.environ.get('COST_SOURCE', 'ce').lower() == 'cur':
+        from .cur_ingest import get_cur_reader
+
+        end_date = datetime.utcnow().date()
+        return get_cur_reader().read_resource_costs(end_date - timedelta(days=days), end_date)
+    return fetch_resource_costs(CachedCostExplorerClient(get_aws_client('ce', 'us-east-1')), days=days)
+
+def build_resource_cost_index() -> ResourceCostIndex:
+    index = ResourceCostIndex(load_resource_costs())
+    logger.info(f'Built resource cost index for {len(index)} resources')
+    return index
+
+def empty_resource_cost_index() -> ResourceCostIndex:
+    return ResourceCostIndex(pd.DataFrame({column: [] for column in ROW_COLUMNS}).astype({'cost': 'float64'}))
+
+_memo = None
+_memo_lock = threading.Lock()
+# Monotonic time until which a failed load is not retried
+_failed_until = 0.0
+
+def get_resource_cost_index() -> ResourceCostIndex:
+    """Process-wide resource cost index, reloaded once RESOURCE_COST_TTL seconds have passed.
+
+    When loading fails, analyzers get an empty index (and fall back to their
+    estimates) for RESOURCE_COST_RETRY_TTL seconds; the failure is not kept
+    for the full RESOURCE_COST_TTL.
+    """
+    global _memo, _failed_until
+    with _memo_lock:
+        if _memo is None:
+            _memo = ArtifactMemo(ttl=float(os.environ.get('RESOURCE_COST_TTL', 3600)))
+        if time.monotonic() < _failed_until:
+            return empty_resource_cost_index()
+    try:
+        return _memo.get_or_compute('resource_cost_index', build_resource_cost_index)
+    except Exception as e:
+        logger.error(f'Error loading resource costs: {str(e)}')
+        with _memo_lock:
+            _failed_until = time.monotonic() + float(os.environ.get('RESOURCE_COST_RETRY_TTL', 60))
+        return empty_resource_cost_index()
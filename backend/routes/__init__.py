@@ -1,9 +1,19 @@
 from flask import Blueprint
+from ..snapshots import init_snapshot_scheduler
+from ..utils.instrumentation import init_upstream_call_metrics
 from .cost_routes import cost_routes
 from .service_routes import service_routes
 from .optimization_routes import optimization_routes
+from .organization_routes import organization_routes
+from .job_routes import job_routes
+from .allocation_routes import allocation_routes
 
 def init_routes(app):
+    init_upstream_call_metrics(app)
+    init_snapshot_scheduler(app)
     app.register_blueprint(cost_routes)
     app.register_blueprint(service_routes)
-    app.register_blueprint(optimization_routes)
\ No newline at end of file
+    app.register_blueprint(optimization_routes)
+    app.register_blueprint(organization_routes)
+    app.register_blueprint(job_routes)
+    app.register_blueprint(allocation_routes)
\ No newline at end of file
@@ -0,0 +1,35 @@
+from flask import Blueprint, jsonify, request
+from ..tag_allocation import get_tag_index, parse_tag_filters, tag_allocation_keys
+
+allocation_routes = Blueprint('allocation_routes', __name__)
+
+@allocation_routes.route('/api/v1/cost/allocation')
+def get_cost_allocation():
+    # ?tag=team:payments&tag=env:prod&groupBy=team; repeat a key to OR its values, "team:" for untagged
+    try:
+        filters = parse_tag_filters(request.args.getlist('tag'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    group_by = request.args.get('groupBy')
+    for key in list(filters) + ([group_by] if group_by else []):
+        if key not in tag_allocation_keys():
+            return jsonify({'error': f'Tag key must be one of: {", ".join(tag_allocation_keys())}'}), 400
+
+    try:
+        return jsonify(get_tag_index().query(filters, group_by=group_by))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@allocation_routes.route('/api/v1/cost/allocation/untagged')
+def get_untagged_costs():
+    try:
+        return jsonify(get_tag_index().untagged())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@allocation_routes.route('/api/v1/cost/allocation/tags')
+def get_tag_values():
+    try:
+        return jsonify(get_tag_index().tag_values())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,13 +1,46 @@
 from flask import Blueprint, jsonify, request
 from ..cost_analyzer import AWSCostAnalyzer
+from ..cost_trends import TIME_RANGES
+from ..snapshots import get_snapshot_service, snapshot_response
 
 cost_routes = Blueprint('cost_routes', __name__)
 cost_analyzer = AWSCostAnalyzer()
 
+# Dashboard payloads are precomputed and served from snapshots
+get_snapshot_service().register('cost_overview', cost_analyzer.get_cost_overview)
+get_snapshot_service().register('costs_by_service', cost_analyzer.get_costs_by_service)
+
 @cost_routes.route('/api/v1/cost/overview')
 def get_cost_overview():
     try:
-        return jsonify(cost_analyzer.get_cost_overview())
+        return snapshot_response('cost_overview')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@cost_routes.route('/api/v1/cost/by-service')
+def get_costs_by_service():
+    try:
+        return snapshot_response('costs_by_service')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@cost_routes.route('/api/v1/cost/anomalies')
+def get_cost_anomalies():
+    days = request.args.get('days', 30, type=int)
+    if days <= 0:
+        return jsonify({'error': 'days must be a positive integer'}), 400
+    try:
+        return jsonify(cost_analyzer.get_cost_anomalies(
+            days=days,
+            threshold=request.args.get('threshold', type=float)
+        ))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@cost_routes.route('/api/v1/cost/forecast')
+def get_cost_forecast():
+    try:
+        return jsonify(cost_analyzer.get_cost_forecast())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -21,6 +54,8 @@ def get_service_costs(service):
 @cost_routes.route('/api/v1/cost/trends')
 def get_cost_trends():
     time_range = request.args.get('timeRange', 'month')
+    if time_range not in TIME_RANGES:
+        return jsonify({'error': f'timeRange must be one of: {", ".join(TIME_RANGES)}'}), 400
     try:
         return jsonify(cost_analyzer.get_cost_trends(time_range))
     except Exception as e:
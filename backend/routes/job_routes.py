@@ -0,0 +1,42 @@
+from flask import Blueprint, jsonify, request, url_for
+from ..jobs import JOB_TYPES, get_job_manager
+
+job_routes = Blueprint('job_routes', __name__)
+
+@job_routes.route('/api/v1/jobs', methods=['POST'])
+def submit_job():
+    try:
+        job_type = (request.get_json(silent=True) or {}).get('type') or request.args.get('type')
+        if job_type not in JOB_TYPES:
+            return jsonify({'error': f'type must be one of: {", ".join(JOB_TYPES)}'}), 400
+
+        job, deduplicated = get_job_manager().submit(job_type)
+        response = jsonify({**job, 'deduplicated': deduplicated})
+        response.status_code = 202
+        response.headers['Location'] = url_for('job_routes.get_job', job_id=job['job_id'])
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@job_routes.route('/api/v1/jobs/<job_id>')
+def get_job(job_id):
+    try:
+        job = get_job_manager().store.get(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@job_routes.route('/api/v1/jobs/<job_id>/result')
+def get_job_result(job_id):
+    try:
+        store = get_job_manager().store
+        job = store.get(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job['status'] != 'succeeded':
+            return jsonify(job), 409 if job['status'] == 'failed' else 202
+        return jsonify(store.result(job_id))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
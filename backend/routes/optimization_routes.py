@@ -1,13 +1,30 @@
+import os
 from flask import Blueprint, jsonify
 from ..cost_optimizer import CostOptimizer
+from ..recommendation_engine import RecommendationEngine
+from ..snapshots import get_snapshot_service, snapshot_response
 
 optimization_routes = Blueprint('optimization_routes', __name__)
 optimizer = CostOptimizer()
 
+# Dashboard payload, precomputed and served from snapshots
+get_snapshot_service().register('optimization_recommendations', optimizer.get_recommendations)
+
+def _rule_recommendations():
+    recommendations, errors = RecommendationEngine().engine.evaluate()
+    return {'recommendations': recommendations, 'errors': errors}
+
+# A full EC2/RDS/S3 scan: only built once someone asks for it, and refreshed less often
+get_snapshot_service().register(
+    'rule_recommendations', _rule_recommendations,
+    stale_after=float(os.environ.get('RULE_SNAPSHOT_STALE_AFTER', 3600)),
+    on_demand=True
+)
+
 @optimization_routes.route('/api/v1/optimization/recommendations')
 def get_recommendations():
     try:
-        return jsonify(optimizer.get_recommendations())
+        return snapshot_response('optimization_recommendations')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -16,4 +33,18 @@ def get_savings_overview():
     try:
         return jsonify(optimizer.get_savings_overview())
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@optimization_routes.route('/api/v1/optimization/rules')
+def list_rules():
+    try:
+        return jsonify({'rules': RecommendationEngine().list_rules()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@optimization_routes.route('/api/v1/optimization/rules/recommendations')
+def get_rule_recommendations():
+    try:
+        return snapshot_response('rule_recommendations')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
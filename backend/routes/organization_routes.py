@@ -0,0 +1,30 @@
+from flask import Blueprint, jsonify, request
+from ..org_analyzer import SERVICE_ANALYZERS, OrganizationAnalyzer
+from ..utils.validators import validate_aws_account
+
+organization_routes = Blueprint('organization_routes', __name__)
+
+def _list_arg(name):
+    value = request.args.get(name)
+    return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
+@organization_routes.route('/api/v1/organization/analysis')
+def get_organization_analysis():
+    try:
+        services = _list_arg('services')
+        accounts = _list_arg('accounts')
+        for service in services or []:
+            if service not in SERVICE_ANALYZERS:
+                return jsonify({'error': f'Unsupported service: {service}'}), 400
+        for account_id in accounts or []:
+            valid, error = validate_aws_account(account_id)
+            if not valid:
+                return jsonify({'error': error}), 400
+
+        return jsonify(OrganizationAnalyzer().analyze(
+            services=services,
+            accounts=accounts,
+            regions=_list_arg('regions')
+        ))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,20 +1,67 @@
-from flask import Blueprint, jsonify
-from ..service_analyzers import EC2Analyzer, RDSAnalyzer
+import json
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from ..service_analyzers import EC2Analyzer, RDSAnalyzer, S3Analyzer, analyze_regions, iter_region_records
 
 service_routes = Blueprint('service_routes', __name__)
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+def _requested_regions():
+    # ?regions=all fans out over every enabled region (empty list), ?regions=a,b over the listed ones;
+    # None means the default region only
+    regions = request.args.get('regions')
+    if not regions:
+        return None
+    if regions == 'all':
+        return []
+    return [region.strip() for region in regions.split(',') if region.strip()]
+
+def _wants_stream():
+    # Opt in with ?stream=1 or an explicit Accept: application/x-ndjson (wildcards don't count)
+    if request.args.get('stream', '').lower() in ('1', 'true', 'ndjson'):
+        return True
+    return any(mimetype == NDJSON_MIMETYPE for mimetype, _ in request.accept_mimetypes)
+
+def _ndjson(records):
+    try:
+        for kind, record in records:
+            yield json.dumps({'type': kind, 'data': record}, default=str) + '\n'
+    except Exception as e:
+        # The status line is already sent, so failures are reported in-band
+        yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+
+def _analysis_response(analyzer_cls):
+    regions = _requested_regions()
+    if _wants_stream():
+        # Instances and opportunities are written as they are analyzed, the summary last
+        if regions is None:
+            records = analyzer_cls().iter_analysis()
+        else:
+            records = iter_region_records(analyzer_cls, regions or None)
+        return Response(stream_with_context(_ndjson(records)), mimetype=NDJSON_MIMETYPE,
+                        headers={'X-Accel-Buffering': 'no'})
+
+    if regions is None:
+        return jsonify(analyzer_cls().analyze())
+    return jsonify(analyze_regions(analyzer_cls, regions or None))
+
 @service_routes.route('/api/v1/services/ec2')
 def get_ec2_analysis():
     try:
-        analyzer = EC2Analyzer()
-        return jsonify(analyzer.analyze())
+        return _analysis_response(EC2Analyzer)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @service_routes.route('/api/v1/services/rds')
 def get_rds_analysis():
     try:
-        analyzer = RDSAnalyzer()
-        return jsonify(analyzer.analyze())
+        return _analysis_response(RDSAnalyzer)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@service_routes.route('/api/v1/services/s3')
+def get_s3_analysis():
+    try:
+        return jsonify(S3Analyzer().analyze_buckets())
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
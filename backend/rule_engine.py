@@ -0,0 +1,227 @@
+import importlib
+import json
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from .utils.logger import get_logger
+from .utils.memo import ArtifactMemo
+
+logger = get_logger(__name__)
+
+# A condition is a pandas expression over the table's columns ("cpu_p95 < 40")
+# or a vectorized function of the whole table returning one boolean per row
+Condition = Union[str, Callable[[pd.DataFrame], Union[np.ndarray, pd.Series]]]
+
+# Matching resources listed per recommendation, highest savings first
+RESOURCES_PER_RULE = 50
+
+class Rule:
+    """A recommendation declared as conditions over one resource table.
+
+    ``when`` is a condition or a list of conditions that must all hold;
+    ``savings`` is an optional expression (or function) giving each
+    matching row's monthly dollar savings. ``columns`` are copied into the
+    listed resources as evidence. ``description`` may use
+    ``{resource_count}`` and ``{estimated_monthly_savings}``.
+    """
+
+    def __init__(self, rule_id: str, table: str, when: Union[Condition, Sequence[Condition]],
+                 title: str, service: str, type: str = 'cost_optimization', description: str = '',
+                 savings: Optional[Condition] = None, columns: Sequence[str] = (),
+                 impact: str = 'Medium', effort: str = 'Medium',
+                 implementation_steps: Sequence[str] = ()):
+        self.rule_id = rule_id
+        self.table = table
+        self.when = [when] if isinstance(when, str) or callable(when) else list(when)
+        self.title = title
+        self.service = service
+        self.type = type
+        self.description = description
+        self.savings = savings
+        self.columns = list(columns)
+        self.impact = impact
+        self.effort = effort
+        self.implementation_steps = list(implementation_steps)
+
+    @classmethod
+    def from_dict(cls, spec: Dict) -> 'Rule':
+        """Rule from its declarative form ({'id': ..., 'table': ..., 'when': [...], ...})"""
+        spec = dict(spec)
+        return cls(spec.pop('id'), spec.pop('table'), spec.pop('when'), **spec)
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.rule_id,
+            'table': self.table,
+            'when': [_describe(condition) for condition in self.when],
+            'savings': _describe(self.savings) if self.savings is not None else None,
+            'title': self.title,
+            'service': self.service,
+            'type': self.type,
+            'impact': self.impact,
+            'effort': self.effort
+        }
+
+class RuleEngine:
+    """Evaluates registered rules in bulk over columnar resource tables.
+
+    Tables are registered as builders (analyzer output -> DataFrame with a
+    ``resource_id`` column) and memoized for ``input_ttl`` seconds, so the
+    analyzers behind them run once for every rule and request in that
+    window. Within an evaluation every distinct condition is computed once
+    per table as a boolean array and shared by the rules that use it; a
+    rule's matches are the AND of its conditions' arrays.
+    """
+
+    def __init__(self, input_ttl: float = 300):
+        self.rules: Dict[str, Rule] = {}
+        self.tables: Dict[str, Callable[[], pd.DataFrame]] = {}
+        self.memo = ArtifactMemo(ttl=input_ttl)
+        self._lock = threading.Lock()
+
+    def register_table(self, name: str, builder: Callable[[], pd.DataFrame]):
+        self.tables[name] = builder
+
+    def register(self, rule: Union[Rule, Dict]) -> Rule:
+        """Add (or replace, by id) a rule"""
+        if isinstance(rule, dict):
+            rule = Rule.from_dict(rule)
+        with self._lock:
+            self.rules[rule.rule_id] = rule
+        return rule
+
+    def rule(self, rule_id: str, table: str, **metadata) -> Callable:
+        """Decorator registering a vectorized function of the table as a rule's condition"""
+        def decorator(condition):
+            self.register(Rule(rule_id, table, condition, **metadata))
+            return condition
+        return decorator
+
+    def load_rules(self, path: str) -> int:
+        """Register the rules of a JSON file holding a list of declarative rules"""
+        with open(path) as f:
+            specs = json.load(f)
+        for spec in specs:
+            self.register(spec)
+        return len(specs)
+
+    def load_plugins(self, modules: Iterable[str]):
+        """Import plugin modules and call their ``register(engine)``"""
+        for module_name in modules:
+            importlib.import_module(module_name).register(self)
+            logger.info(f'Loaded rule plugin {module_name}')
+
+    def table(self, name: str) -> pd.DataFrame:
+        if name not in self.tables:
+            raise ValueError(f'Unknown rule table: {name}')
+        return self.memo.get_or_compute(('table', name), self.tables[name])
+
+    def evaluate(self, rule_ids: Optional[Iterable[str]] = None,
+                 tables: Optional[Dict[str, pd.DataFrame]] = None) -> Tuple[List[Dict], Dict[str, str]]:
+        """Recommendations of every matching rule, and the errors of tables that failed to build.
+
+        ``tables`` supplies prebuilt tables by name instead of the registered builders.
+        """
+        with self._lock:
+            rules = list(self.rules.values()) if rule_ids is None else [self.rules[r] for r in rule_ids]
+
+        by_table: Dict[str, List[Rule]] = {}
+        for rule in rules:
+            by_table.setdefault(rule.table, []).append(rule)
+
+        recommendations = []
+        errors = {}
+        for name, table_rules in by_table.items():
+            try:
+                frame = (tables or {}).get(name)
+                if frame is None:
+                    frame = self.table(name)
+            except Exception as e:
+                logger.error(f'Error building rule table {name}: {str(e)}')
+                errors[name] = str(e)
+                continue
+
+            columns = _ColumnCache(frame)
+            for rule in table_rules:
+                try:
+                    recommendation = self._apply(rule, frame, columns)
+                except Exception as e:
+                    logger.error(f'Error evaluating rule {rule.rule_id}: {str(e)}')
+                    errors[rule.rule_id] = str(e)
+                    continue
+                if recommendation:
+                    recommendations.append(recommendation)
+
+        recommendations.sort(key=lambda r: r['estimated_monthly_savings'] or 0, reverse=True)
+        return recommendations, errors
+
+    def _apply(self, rule: Rule, frame: pd.DataFrame, columns: '_ColumnCache') -> Optional[Dict]:
+        mask = np.ones(len(frame), dtype=bool)
+        for condition in rule.when:
+            mask &= columns.mask(condition)
+        matched = np.flatnonzero(mask)
+        if not len(matched):
+            return None
+
+        savings = columns.values(rule.savings)[matched] if rule.savings is not None else None
+        total = float(np.nansum(savings)) if savings is not None else None
+        order = np.arange(len(matched))
+        if savings is not None:
+            order = np.argsort(-np.nan_to_num(savings, nan=0.0), kind='stable')
+        order = order[:RESOURCES_PER_RULE]
+        evidence = frame.iloc[matched[order]][['resource_id'] + rule.columns].to_dict('records')
+        if savings is not None:
+            for record, saving in zip(evidence, savings[order]):
+                record['estimated_monthly_savings'] = saving
+
+        return {
+            'rule_id': rule.rule_id,
+            'service': rule.service,
+            'type': rule.type,
+            'title': rule.title,
+            'description': rule.description.format(
+                resource_count=len(matched), estimated_monthly_savings=total or 0.0
+            ),
+            'impact': rule.impact,
+            'effort': rule.effort,
+            'savings_potential': f'${total:,.2f}/month' if total is not None else None,
+            'estimated_monthly_savings': total,
+            'resource_count': int(len(matched)),
+            'resources': [_jsonable(record) for record in evidence],
+            'implementation_steps': rule.implementation_steps
+        }
+
+class _ColumnCache:
+    """Condition and savings columns of one table, each computed once per evaluation"""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self._columns: Dict = {}
+
+    def mask(self, condition: Condition) -> np.ndarray:
+        values = self._compute(condition)
+        # Comparisons against missing values do not match
+        return pd.Series(values).fillna(False).to_numpy(dtype=bool) if values.dtype == object else values.astype(bool)
+
+    def values(self, expression: Condition) -> np.ndarray:
+        return np.asarray(self._compute(expression), dtype=np.float64)
+
+    def _compute(self, expression: Condition) -> np.ndarray:
+        key = expression if isinstance(expression, str) else id(expression)
+        if key not in self._columns:
+            result = self.frame.eval(expression) if isinstance(expression, str) else expression(self.frame)
+            values = np.asarray(result)
+            if values.ndim == 0:
+                # Constant expressions apply to every row
+                values = np.full(len(self.frame), values.item())
+            self._columns[key] = values
+        return self._columns[key]
+
+def _describe(condition: Condition) -> str:
+    return condition if isinstance(condition, str) else getattr(condition, '__name__', repr(condition))
+
+def _jsonable(record: Dict) -> Dict:
+    """NumPy scalars as Python values, NaN as None"""
+    values = {key: value.item() if isinstance(value, np.generic) else value for key, value in record.items()}
+    return {key: None if isinstance(value, float) and np.isnan(value) else value for key, value in values.items()}
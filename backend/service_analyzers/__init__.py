@@ -1,4 +1,6 @@
 from .ec2_analyzer import EC2Analyzer
+from .rds_analyzer import RDSAnalyzer
 from .s3_analyzer import S3Analyzer
+from .region_fanout import analyze_regions, iter_region_records
 
-__all__ = ['EC2Analyzer', 'S3Analyzer']
\ No newline at end of file
+__all__ = ['EC2Analyzer', 'RDSAnalyzer', 'S3Analyzer', 'analyze_regions', 'iter_region_records']
\ No newline at end of file
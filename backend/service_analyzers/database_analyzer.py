@@ -1,30 +1,75 @@
-import boto3
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
+from ..metric_store import get_metric_store
+from ..resource_costs import get_resource_cost_index, savings_amount
+from ..utilization_profiles import DOWNSIZE_P95
+from ..utils.aws_utils import chunked, get_aws_client, paginate
+from ..utils.ce_cache import CachedCostExplorerClient
+from ..utils.concurrency import run_parallel
+from ..utils.cloudwatch import MAX_QUERIES_PER_REQUEST
+
+RDS_INSTANCE_METRICS = {
+    'cpu': 'CPUUtilization',
+    'memory': 'FreeableMemory',
+    'iops': 'ReadIOPS',
+    'free_storage': 'FreeStorageSpace'
+}
+
+DYNAMODB_TABLE_METRICS = {
+    'read_capacity': 'ConsumedReadCapacityUnits',
+    'write_capacity': 'ConsumedWriteCapacityUnits',
+    'throttled_requests': 'ThrottledRequests'
+}
+
+METRIC_STATISTICS = ('Average', 'Maximum', 'Minimum', 'Sum')
+
+METRIC_DAYS = 14
+
+# Resources whose metrics fit in a single GetMetricData call
+METRICS_CHUNK_SIZE = MAX_QUERIES_PER_REQUEST // (
+    max(len(RDS_INSTANCE_METRICS), len(DYNAMODB_TABLE_METRICS)) * len(METRIC_STATISTICS)
+)
+
+COST_DAYS = 30
 
 class DatabaseAnalyzer:
-    def __init__(self):
-        self.rds = boto3.client('rds')
-        self.dynamodb = boto3.client('dynamodb')
-        self.cloudwatch = boto3.client('cloudwatch')
+    def __init__(self, progress=None):
+        # progress(processed, total) is called as each database service finishes (background jobs)
+        self.progress = progress
+        self.rds = get_aws_client('rds')
+        self.dynamodb = get_aws_client('dynamodb')
+        self.cloudwatch = get_aws_client('cloudwatch')
+        self.ce = CachedCostExplorerClient(get_aws_client('ce', 'us-east-1'))
 
     def analyze_all_databases(self) -> Dict:
-        """Analyze all database services"""
-        return {
-            'rds': self.analyze_rds(),
-            'dynamodb': self.analyze_dynamodb(),
-            'recommendations': self._generate_recommendations()
-        }
+        """Analyze all database services, RDS and DynamoDB concurrently"""
+        finished = []
+
+        def on_complete(service):
+            finished.append(service)
+            if self.progress:
+                self.progress(len(finished), 2)
+
+        results, errors = run_parallel({
+            'rds': self.analyze_rds,
+            'dynamodb': self.analyze_dynamodb
+        }, on_complete=on_complete)
+        # A failed service is reported in place of its analysis; recommendations
+        # come from the services that answered
+        analysis = {service: {'error': error} for service, error in errors.items()}
+        analysis.update(results)
+        analysis['recommendations'] = self._generate_recommendations(results)
+        return analysis
 
     def analyze_rds(self) -> Dict:
         """Analyze RDS instances and clusters"""
-        instances = self.rds.describe_db_instances()
-        clusters = self.rds.describe_db_clusters()
+        instances = self._analyze_rds_instances(paginate(self.rds, 'describe_db_instances', 'DBInstances'))
+        clusters = paginate(self.rds, 'describe_db_clusters', 'DBClusters')
 
         analysis = {
-            'instances': self._analyze_rds_instances(instances['DBInstances']),
-            'clusters': self._analyze_rds_clusters(clusters['DBClusters']),
-            'metrics': self._get_rds_metrics(),
+            'instances': instances,
+            'clusters': self._analyze_rds_clusters(clusters),
+            'metrics': self._get_rds_metrics(instances),
             'costs': self._analyze_rds_costs()
         }
 
@@ -32,145 +77,208 @@ class DatabaseAnalyzer:
 
     def analyze_dynamodb(self) -> Dict:
         """Analyze DynamoDB tables"""
-        tables = self.dynamodb.list_tables()
-        
+        tables = self._analyze_dynamodb_tables(paginate(self.dynamodb, 'list_tables', 'TableNames'))
+
         analysis = {
-            'tables': self._analyze_dynamodb_tables(tables['TableNames']),
-            'metrics': self._get_dynamodb_metrics(),
+            'tables': tables,
+            'metrics': self._get_dynamodb_metrics(tables),
             'costs': self._analyze_dynamodb_costs()
         }
 
         return analysis
 
-    def _analyze_rds_instances(self, instances: List[Dict]) -> List[Dict]:
+    def _analyze_rds_instances(self, instances: Iterable[Dict]) -> List[Dict]:
         """Analyze individual RDS instances"""
         instance_analysis = []
         
-        for instance in instances:
-            metrics = self._get_instance_metrics(instance['DBInstanceIdentifier'])
-            
-            analysis = {
-                'identifier': instance['DBInstanceIdentifier'],
-                'instance_class': instance['DBInstanceClass'],
-                'engine': instance['Engine'],
-                'storage': {
-                    'allocated': instance['AllocatedStorage'],
-                    'used': self._get_storage_used(instance['DBInstanceIdentifier']),
-                    'type': instance['StorageType']
-                },
-                'performance': {
-                    'cpu_utilization': metrics['cpu'],
-                    'memory_utilization': metrics['memory'],
-                    'iops': metrics['iops']
-                },
-                'multi_az': instance.get('MultiAZ', False),
-                'optimization_opportunities': self._identify_instance_optimizations(instance, metrics)
-            }
-            
-            instance_analysis.append(analysis)
+        for instance_chunk in chunked(instances, METRICS_CHUNK_SIZE):
+            fleet_metrics = self._get_instance_metrics([i['DBInstanceIdentifier'] for i in instance_chunk])
+            instance_analysis.extend(
+                self._analyze_rds_instance(instance, fleet_metrics[instance['DBInstanceIdentifier']])
+                for instance in instance_chunk
+            )
 
         return instance_analysis
 
-    def _get_instance_metrics(self, instance_id: str) -> Dict:
-        """Get detailed metrics for an RDS instance"""
-        end_time = datetime.utcnow()
-        start_time = end_time - timedelta(days=14)
-
-        metrics = {
-            'cpu': self._get_metric_statistics(
-                'AWS/RDS', 'CPUUtilization',
-                [{'Name': 'DBInstanceIdentifier', 'Value': instance_id}],
-                start_time, end_time
-            ),
-            'memory': self._get_metric_statistics(
-                'AWS/RDS', 'FreeableMemory',
-                [{'Name': 'DBInstanceIdentifier', 'Value': instance_id}],
-                start_time, end_time
-            ),
-            'iops': self._get_metric_statistics(
-                'AWS/RDS', 'ReadIOPS',
-                [{'Name': 'DBInstanceIdentifier', 'Value': instance_id}],
-                start_time, end_time
-            )
+    def _analyze_rds_instance(self, instance: Dict, metrics: Dict) -> Dict:
+        """Analyze a single RDS instance"""
+        cost = self._resource_cost(instance.get('DBInstanceArn', ''))
+        return {
+            'identifier': instance['DBInstanceIdentifier'],
+            'instance_class': instance['DBInstanceClass'],
+            'engine': instance['Engine'],
+            'storage': {
+                'allocated': instance['AllocatedStorage'],
+                'used': self._get_storage_used(instance, metrics),
+                'type': instance['StorageType']
+            },
+            'performance': {
+                'cpu_utilization': metrics['cpu'],
+                'memory_utilization': metrics['memory'],
+                'iops': metrics['iops']
+            },
+            'multi_az': instance.get('MultiAZ', False),
+            'cost': cost,
+            'optimization_opportunities': _with_savings(self._identify_instance_optimizations(instance, metrics), cost)
         }
 
-        return metrics
+    def _analyze_rds_clusters(self, clusters: Iterable[Dict]) -> List[Dict]:
+        """Summarize Aurora clusters (capacity settings come from describe_db_clusters, no metrics)"""
+        return [
+            {
+                'identifier': cluster['DBClusterIdentifier'],
+                'engine': cluster['Engine'],
+                'engine_mode': cluster.get('EngineMode', 'provisioned'),
+                'status': cluster.get('Status'),
+                'members': len(cluster.get('DBClusterMembers', [])),
+                'multi_az': cluster.get('MultiAZ', False),
+                'serverless_v2_scaling': cluster.get('ServerlessV2ScalingConfiguration'),
+                'cost': self._resource_cost(cluster.get('DBClusterArn', ''))
+            }
+            for cluster in clusters
+        ]
+
+    def _get_storage_used(self, instance: Dict, metrics: Dict) -> Optional[float]:
+        """Used storage in GiB: allocated storage less average free space (None without datapoints)"""
+        if not metrics['free_storage']:
+            return None
+        return max(instance['AllocatedStorage'] - metrics['free_storage']['average'] / 1024 ** 3, 0.0)
+
+    def _get_rds_metrics(self, instances: List[Dict]) -> Dict:
+        """Fleet-wide summary of the analyzed instances' metrics"""
+        cpu = [i['performance']['cpu_utilization'] for i in instances if i['performance']['cpu_utilization']]
+        return {
+            'instance_count': len(instances),
+            'instances_with_metrics': len(cpu),
+            'average_cpu_utilization': sum(m['average'] for m in cpu) / len(cpu) if cpu else None,
+            'max_cpu_utilization': max((m['max'] for m in cpu), default=None),
+            'allocated_storage': sum(i['storage']['allocated'] for i in instances),
+            'used_storage': sum(i['storage']['used'] or 0 for i in instances)
+        }
+
+    def _analyze_rds_costs(self) -> Dict:
+        return self._service_costs('Amazon Relational Database Service')
+
+    def _get_instance_metrics(self, instance_ids: List[str]) -> Dict[str, Dict]:
+        """Get metric summaries for RDS instances, keyed by instance identifier"""
+        return self._get_metric_statistics(
+            'AWS/RDS', 'DBInstanceIdentifier', instance_ids, RDS_INSTANCE_METRICS
+        )
 
-    def _analyze_dynamodb_tables(self, table_names: List[str]) -> List[Dict]:
+    def _analyze_dynamodb_tables(self, table_names: Iterable[str]) -> List[Dict]:
         """Analyze DynamoDB tables"""
         table_analysis = []
 
-        for table_name in table_names:
-            table = self.dynamodb.describe_table(TableName=table_name)['Table']
-            metrics = self._get_dynamodb_table_metrics(table_name)
-
-            analysis = {
-                'table_name': table_name,
-                'size_bytes': table['TableSizeBytes'],
-                'item_count': table['ItemCount'],
-                'provisioned_capacity': {
-                    'read': table.get('ProvisionedThroughput', {}).get('ReadCapacityUnits', 0),
-                    'write': table.get('ProvisionedThroughput', {}).get('WriteCapacityUnits', 0)
-                },
-                'performance': {
-                    'consumed_read_capacity': metrics['read_capacity'],
-                    'consumed_write_capacity': metrics['write_capacity'],
-                    'throttled_requests': metrics['throttled_requests']
-                },
-                'optimization_opportunities': self._identify_table_optimizations(table, metrics)
-            }
-
-            table_analysis.append(analysis)
+        for name_chunk in chunked(table_names, METRICS_CHUNK_SIZE):
+            fleet_metrics = self._get_dynamodb_table_metrics(name_chunk)
+            table_analysis.extend(
+                self._analyze_dynamodb_table(table_name, fleet_metrics[table_name])
+                for table_name in name_chunk
+            )
 
         return table_analysis
 
-    def _get_dynamodb_table_metrics(self, table_name: str) -> Dict:
-        """Get metrics for a DynamoDB table"""
-        end_time = datetime.utcnow()
-        start_time = end_time - timedelta(days=14)
-
-        metrics = {
-            'read_capacity': self._get_metric_statistics(
-                'AWS/DynamoDB', 'ConsumedReadCapacityUnits',
-                [{'Name': 'TableName', 'Value': table_name}],
-                start_time, end_time
-            ),
-            'write_capacity': self._get_metric_statistics(
-                'AWS/DynamoDB', 'ConsumedWriteCapacityUnits',
-                [{'Name': 'TableName', 'Value': table_name}],
-                start_time, end_time
-            ),
-            'throttled_requests': self._get_metric_statistics(
-                'AWS/DynamoDB', 'ThrottledRequests',
-                [{'Name': 'TableName', 'Value': table_name}],
-                start_time, end_time
-            )
+    def _analyze_dynamodb_table(self, table_name: str, metrics: Dict) -> Dict:
+        """Analyze a single DynamoDB table"""
+        table = self.dynamodb.describe_table(TableName=table_name)['Table']
+        cost = self._resource_cost(table.get('TableArn', ''))
+
+        return {
+            'table_name': table_name,
+            'size_bytes': table['TableSizeBytes'],
+            'item_count': table['ItemCount'],
+            'provisioned_capacity': {
+                'read': table.get('ProvisionedThroughput', {}).get('ReadCapacityUnits', 0),
+                'write': table.get('ProvisionedThroughput', {}).get('WriteCapacityUnits', 0)
+            },
+            'performance': {
+                'consumed_read_capacity': metrics['read_capacity'],
+                'consumed_write_capacity': metrics['write_capacity'],
+                'throttled_requests': metrics['throttled_requests']
+            },
+            'cost': cost,
+            'optimization_opportunities': _with_savings(self._identify_table_optimizations(table, metrics), cost)
         }
 
-        return metrics
+    def _resource_cost(self, resource_id: str) -> Optional[Dict]:
+        # The shared index is loaded once per refresh; each lookup is a dict access
+        return get_resource_cost_index().summary(resource_id)
+
+    def _get_dynamodb_table_metrics(self, table_names: List[str]) -> Dict[str, Dict]:
+        """Get metric summaries for DynamoDB tables, keyed by table name"""
+        return self._get_metric_statistics(
+            'AWS/DynamoDB', 'TableName', table_names, DYNAMODB_TABLE_METRICS
+        )
+
+    def _get_dynamodb_metrics(self, tables: List[Dict]) -> Dict:
+        """Fleet-wide consumed capacity and throttling totals of the analyzed tables"""
+        def total(metric):
+            return sum(t['performance'][metric]['sum'] for t in tables if t['performance'][metric])
+
+        return {
+            'table_count': len(tables),
+            'consumed_read_capacity': total('consumed_read_capacity'),
+            'consumed_write_capacity': total('consumed_write_capacity'),
+            'throttled_requests': total('throttled_requests'),
+            'size_bytes': sum(t['size_bytes'] for t in tables)
+        }
 
-    def _get_metric_statistics(self, namespace: str, metric_name: str, 
-                             dimensions: List[Dict], start_time: datetime, 
-                             end_time: datetime) -> List[Dict]:
-        """Get CloudWatch metric statistics"""
-        response = self.cloudwatch.get_metric_statistics(
-            Namespace=namespace,
-            MetricName=metric_name,
-            Dimensions=dimensions,
-            StartTime=start_time,
-            EndTime=end_time,
-            Period=3600,
-            Statistics=['Average', 'Maximum', 'Minimum', 'Sum']
+    def _analyze_dynamodb_costs(self) -> Dict:
+        return self._service_costs('Amazon DynamoDB')
+
+    def _service_costs(self, service: str) -> Dict:
+        """Cost of one service over the last COST_DAYS days, by usage type"""
+        end_date = datetime.now().strftime('%Y-%m-%d')
+        start_date = (datetime.now() - timedelta(days=COST_DAYS)).strftime('%Y-%m-%d')
+        results = paginate(
+            self.ce, 'get_cost_and_usage', 'ResultsByTime',
+            TimePeriod={'Start': start_date, 'End': end_date},
+            Granularity='MONTHLY',
+            Metrics=['UnblendedCost'],
+            Filter={'Dimensions': {'Key': 'SERVICE', 'Values': [service]}},
+            GroupBy=[{'Type': 'DIMENSION', 'Key': 'USAGE_TYPE'}]
         )
-        return response['Datapoints']
+
+        by_usage_type = {}
+        for result in results:
+            for group in result['Groups']:
+                usage_type = group['Keys'][0]
+                by_usage_type[usage_type] = by_usage_type.get(usage_type, 0) + \
+                    float(group['Metrics']['UnblendedCost']['Amount'])
+
+        return {
+            'start_date': start_date,
+            'end_date': end_date,
+            'total_cost': sum(by_usage_type.values()),
+            'by_usage_type': dict(sorted(by_usage_type.items(), key=lambda item: item[1], reverse=True))
+        }
+
+    def _get_metric_statistics(self, namespace: str, dimension_name: str,
+                             resource_ids: List[str], metric_names: Dict[str, str]) -> Dict[str, Dict]:
+        """Summarize METRIC_DAYS of CloudWatch statistics for many resources.
+
+        Each alias maps to the resource's summary (average, p95, max, min,
+        sum, datapoints) or None without datapoints; the hourly series stay
+        in the shared metric store.
+        """
+        views = get_metric_store().fetch(
+            self.cloudwatch, namespace, dimension_name, resource_ids,
+            list(metric_names.values()), METRIC_DAYS, statistics=METRIC_STATISTICS
+        )
+
+        metrics = {resource_id: {} for resource_id in resource_ids}
+        for alias, metric_name in metric_names.items():
+            summaries = views[metric_name].summaries()
+            for resource_id in resource_ids:
+                metrics[resource_id][alias] = summaries.get(resource_id)
+        return metrics
 
     def _identify_instance_optimizations(self, instance: Dict, metrics: Dict) -> List[Dict]:
         """Identify optimization opportunities for RDS instance"""
         optimizations = []
 
-        # Check for underutilized instances
-        avg_cpu = sum(m['Average'] for m in metrics['cpu']) / len(metrics['cpu']) if metrics['cpu'] else 0
-        if avg_cpu < 40:
+        # Check for underutilized instances (p95 CPU, so peaks are not sized away)
+        if metrics['cpu'] and metrics['cpu']['p95'] < DOWNSIZE_P95:
             optimizations.append({
                 'type': 'instance_sizing',
                 'description': 'Instance is underutilized',
@@ -197,8 +305,8 @@ class DatabaseAnalyzer:
         provisioned_read = table.get('ProvisionedThroughput', {}).get('ReadCapacityUnits', 0)
         provisioned_write = table.get('ProvisionedThroughput', {}).get('WriteCapacityUnits', 0)
         
-        avg_read = sum(m['Average'] for m in metrics['read_capacity']) / len(metrics['read_capacity']) if metrics['read_capacity'] else 0
-        avg_write = sum(m['Average'] for m in metrics['write_capacity']) / len(metrics['write_capacity']) if metrics['write_capacity'] else 0
+        avg_read = metrics['read_capacity']['average'] if metrics['read_capacity'] else 0
+        avg_write = metrics['write_capacity']['average'] if metrics['write_capacity'] else 0
 
         if provisioned_read > 0 and (avg_read / provisioned_read) < 0.4:
             optimizations.append({
@@ -216,4 +324,23 @@ class DatabaseAnalyzer:
                 'potential_savings': '30-50%'
             })
 
-        return optimizations
\ No newline at end of file
+        return optimizations
+
+    def _generate_recommendations(self, analysis: Dict) -> List[Dict]:
+        """Every resource's optimization opportunities, highest dollar savings first"""
+        recommendations = []
+        for service, resources, name_key in (('rds', 'instances', 'identifier'),
+                                             ('dynamodb', 'tables', 'table_name')):
+            for resource in analysis.get(service, {}).get(resources, ()):
+                for optimization in resource['optimization_opportunities']:
+                    recommendations.append({'service': service, 'resource': resource[name_key], **optimization})
+        recommendations.sort(key=lambda r: r['estimated_monthly_savings'] or 0, reverse=True)
+        return recommendations
+
+def _with_savings(optimizations: List[Dict], cost: Optional[Dict]) -> List[Dict]:
+    """Attach the resource's monthly cost and the dollar value of each savings estimate"""
+    monthly_cost = cost['monthly_estimate'] if cost else None
+    for optimization in optimizations:
+        optimization['monthly_cost'] = monthly_cost
+        optimization['estimated_monthly_savings'] = savings_amount(monthly_cost, optimization['potential_savings'])
+    return optimizations
@@ -1,35 +1,57 @@
-import boto3
-import os
+import re
 from datetime import datetime, timedelta
+from ..instance_catalog import EC2_VARIANT, get_instance_catalog
+from ..metric_store import get_metric_store
+from ..resource_costs import get_resource_cost_index, savings_amount
+from ..utilization_profiles import UtilizationProfiles
+from ..utils.aws_utils import chunked, get_aws_client, paginate
+from ..utils.ce_cache import CachedCostExplorerClient
+from ..utils.cloudwatch import MAX_QUERIES_PER_REQUEST
+from .streaming import collect_analysis, drain_records, summary_record
+
+EC2_METRICS = ['CPUUtilization', 'NetworkIn', 'NetworkOut', 'DiskReadOps', 'DiskWriteOps']
+
+# Generic checks for instances the catalog gives no target for (regions, platforms or
+# families outside the bundled snapshot), with percentage estimates
+GRAVITON_ELIGIBLE_FAMILIES = ('t3', 'm5', 'c5', 'r5')
+GRAVITON_ESTIMATED_SAVINGS = 0.2
+OLD_GENERATION_FAMILIES = ('t2', 'm4', 'c4', 'r4')
+
+# Two weeks of hourly CPU give every hour of the week two samples
+PROFILE_DAYS = 14
+
+# Instances whose metrics fit in a single GetMetricData call (Average + Maximum per metric)
+METRICS_CHUNK_SIZE = MAX_QUERIES_PER_REQUEST // (len(EC2_METRICS) * 2)
 
 class EC2Analyzer:
-    def __init__(self):
-        self.ec2 = boto3.client('ec2',
-            aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
-        self.cloudwatch = boto3.client('cloudwatch')
-        self.ce = boto3.client('ce')
+    def __init__(self, region=None, account_id=None, progress=None):
+        # An explicit region scopes clients and cost data to that region (multi-region fan-out);
+        # an explicit account_id analyzes a member account (organization-wide analysis);
+        # progress(processed, total) is called as instances are analyzed (background jobs)
+        self.region = region
+        self.account_id = account_id
+        self.progress = progress
+        self.ec2 = get_aws_client('ec2', region, account_id)
+        self.cloudwatch = get_aws_client('cloudwatch', region, account_id)
+        self.ce = CachedCostExplorerClient(get_aws_client('ce', 'us-east-1', account_id), account_id=account_id)
 
     def analyze(self):
+        return collect_analysis(self.iter_analysis())
+
+    def iter_analysis(self):
+        """Yield analysis records as instances are analyzed (see service_analyzers.streaming)"""
         end_date = datetime.now().strftime('%Y-%m-%d')
         start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
 
-        instances = self.ec2.describe_instances()
-        cost_data = self.ce.get_cost_and_usage(
+        cost_results = paginate(
+            self.ce, 'get_cost_and_usage', 'ResultsByTime',
             TimePeriod={
                 'Start': start_date,
                 'End': end_date
             },
             Granularity='MONTHLY',
             Metrics=['UnblendedCost'],
-            Filter={
-                'Dimensions': {
-                    'Key': 'SERVICE',
-                    'Values': ['Amazon Elastic Compute Cloud - Compute']
-                }
-            }
+            Filter=self._cost_filter()
         )
 
         analysis = {
@@ -43,88 +65,173 @@ class EC2Analyzer:
         }
 
         # Calculate total cost
-        for result in cost_data['ResultsByTime']:
+        for result in cost_results:
             analysis['total_cost'] += float(result['Total']['UnblendedCost']['Amount'])
 
-        for reservation in instances['Reservations']:
-            for instance in reservation['Instances']:
-                analysis['total_instances'] += 1
-                instance_state = instance['State']['Name']
-                instance_type = instance['InstanceType']
-
-                if instance_state == 'running':
-                    analysis['running_instances'] += 1
-                elif instance_state == 'stopped':
-                    analysis['stopped_instances'] += 1
-
-                analysis['instance_types'][instance_type] = \
-                    analysis['instance_types'].get(instance_type, 0) + 1
-
-                # Get instance metrics
-                metrics = self._get_instance_metrics(instance['InstanceId'])
-                
-                instance_data = {
-                    'id': instance['InstanceId'],
-                    'type': instance_type,
-                    'state': instance_state,
-                    'launch_time': instance.get('LaunchTime', '').isoformat(),
-                    'metrics': metrics,
-                    'platform': instance.get('Platform', 'linux'),
-                    'vpc_id': instance.get('VpcId', ''),
-                    'tags': instance.get('Tags', [])
-                }
-
-                analysis['instances'].append(instance_data)
-
-                # Check for optimization opportunities
-                self._check_optimization_opportunities(instance, metrics, analysis)
+        # Per-instance cost comes from the shared resource cost index (one dict lookup per instance)
+        self.resource_costs = get_resource_cost_index()
+        # Rightsizing, generation and Graviton targets are priced from the instance catalog
+        self.catalog = get_instance_catalog('AmazonEC2')
+        self.catalog_region = self.region or self.ec2.meta.region_name
+        self._graviton_eligible = {'count': 0, 'monthly_cost': 0.0, 'monthly_savings': 0.0, 'without_cost': 0}
+
+        instances = (
+            instance
+            for reservation in paginate(self.ec2, 'describe_instances', 'Reservations')
+            for instance in reservation['Instances']
+        )
+        if self.progress:
+            # Progress needs a total, so read the instance list up front
+            instances = list(instances)
+            self.progress(0, len(instances))
+
+        # Instances stream in page by page; metrics are fetched in batched chunks
+        processed = 0
+        for instance_chunk in chunked(instances, METRICS_CHUNK_SIZE):
+            fleet_metrics, profiles = self._get_instance_metrics([i['InstanceId'] for i in instance_chunk])
+            for instance in instance_chunk:
+                self._analyze_instance(instance, fleet_metrics[instance['InstanceId']],
+                                       profiles.profile(instance['InstanceId']), analysis)
+                yield from drain_records(analysis)
+
+            processed += len(instance_chunk)
+            if self.progress:
+                self.progress(processed, len(instances))
 
         # Add Graviton opportunity if applicable
         self._check_graviton_opportunities(analysis)
+        yield from drain_records(analysis)
+
+        yield summary_record(analysis)
+
+    def _cost_filter(self):
+        service_filter = {
+            'Dimensions': {
+                'Key': 'SERVICE',
+                'Values': ['Amazon Elastic Compute Cloud - Compute']
+            }
+        }
+        if not self.region:
+            return service_filter
+        return {'And': [service_filter, {'Dimensions': {'Key': 'REGION', 'Values': [self.region]}}]}
+
+    def _analyze_instance(self, instance, metrics, profile, analysis):
+        analysis['total_instances'] += 1
+        instance_state = instance['State']['Name']
+        instance_type = instance['InstanceType']
+
+        if instance_state == 'running':
+            analysis['running_instances'] += 1
+        elif instance_state == 'stopped':
+            analysis['stopped_instances'] += 1
+
+        analysis['instance_types'][instance_type] = \
+            analysis['instance_types'].get(instance_type, 0) + 1
+
+        cost = self.resource_costs.summary(instance['InstanceId'])
+        if instance_state == 'running':
+            self._count_graviton_eligible(instance, cost)
+
+        instance_data = {
+            'id': instance['InstanceId'],
+            'type': instance_type,
+            'state': instance_state,
+            'launch_time': instance.get('LaunchTime', '').isoformat(),
+            'metrics': metrics,
+            'utilization_profile': profile,
+            'platform': instance.get('Platform', 'linux'),
+            'vpc_id': instance.get('VpcId', ''),
+            'tags': instance.get('Tags', []),
+            'cost': cost
+        }
+
+        analysis['instances'].append(instance_data)
+
+        # Check for optimization opportunities
+        self._check_optimization_opportunities(instance, profile, analysis)
+
+        monthly_cost = cost['monthly_estimate'] if cost else None
+        for opportunity in analysis['optimization_opportunities']:
+            if opportunity.get('instance_id') == instance['InstanceId']:
+                opportunity['monthly_cost'] = monthly_cost
+                # Catalog-priced opportunities already carry their exact saving
+                if 'estimated_monthly_savings' not in opportunity:
+                    opportunity['estimated_monthly_savings'] = savings_amount(monthly_cost, opportunity['estimated_savings'])
+
+    def _get_instance_metrics(self, instance_ids, days=PROFILE_DAYS):
+        """Metric summaries per instance and the chunk's CPU utilization profiles"""
+        # Series live in the shared metric store; only instances it has not seen yet are fetched
+        views = get_metric_store().fetch(
+            self.cloudwatch, 'AWS/EC2', 'InstanceId', instance_ids, EC2_METRICS, days,
+            scope=(self.cloudwatch.meta.region_name, self.account_id)
+        )
 
-        return analysis
-
-    def _get_instance_metrics(self, instance_id, days=7):
-        end_time = datetime.utcnow()
-        start_time = end_time - timedelta(days=days)
-
-        metrics = {}
-        for metric_name in ['CPUUtilization', 'NetworkIn', 'NetworkOut', 'DiskReadOps', 'DiskWriteOps']:
-            response = self.cloudwatch.get_metric_statistics(
-                Namespace='AWS/EC2',
-                MetricName=metric_name,
-                Dimensions=[{'Name': 'InstanceId', 'Value': instance_id}],
-                StartTime=start_time,
-                EndTime=end_time,
-                Period=3600,
-                Statistics=['Average', 'Maximum']
-            )
-
-            if response['Datapoints']:
-                metrics[metric_name] = {
-                    'average': sum(p['Average'] for p in response['Datapoints']) / len(response['Datapoints']),
-                    'max': max(p['Maximum'] for p in response['Datapoints'])
-                }
-
-        return metrics
-
-    def _check_optimization_opportunities(self, instance, metrics, analysis):
+        metrics = {instance_id: {} for instance_id in instance_ids}
+        for metric_name, view in views.items():
+            for instance_id, summary in view.summaries().items():
+                metrics[instance_id][metric_name] = summary
+
+        return metrics, UtilizationProfiles.from_view(views['CPUUtilization'])
+
+    def _check_optimization_opportunities(self, instance, profile, analysis):
         instance_id = instance['InstanceId']
+        instance_type = instance['InstanceType']
+        variant = self._variant(instance)
 
-        # Check CPU utilization
-        if metrics.get('CPUUtilization', {}).get('average', 0) < 20:
+        # Rightsizing follows the CPU profile's percentiles and pattern, not the mean
+        pattern = profile['pattern'] if profile else None
+        if pattern == 'idle':
             analysis['optimization_opportunities'].append({
                 'instance_id': instance_id,
-                'type': 'Low CPU Utilization',
-                'description': 'Consider downsizing instance due to low CPU usage',
-                'current_value': f"{metrics['CPUUtilization']['average']:.1f}%",
-                'estimated_savings': '30%'
+                'type': 'Idle Instance',
+                'description': 'CPU stayed idle for the whole period; consider stopping or terminating the instance',
+                'current_value': f"p99 {profile['p99']:.1f}%",
+                'estimated_savings': '100%'
+            })
+        elif pattern == 'underutilized':
+            target = self.catalog.rightsizing_target(instance_type, self.catalog_region, variant, profile['p95'])
+            if target:
+                analysis['optimization_opportunities'].append(_catalog_opportunity(
+                    instance_id, 'Low CPU Utilization',
+                    f"p95 CPU fits {target['target']['instance_type']}; consider downsizing from {instance_type}",
+                    f"p95 {profile['p95']:.1f}%, p99 {profile['p99']:.1f}%", target
+                ))
+            elif not self.catalog.get(instance_type, self.catalog_region, variant):
+                # Types the catalog does not price keep the generic one-size-down estimate
+                analysis['optimization_opportunities'].append({
+                    'instance_id': instance_id,
+                    'type': 'Low CPU Utilization',
+                    'description': 'p95 and p99 CPU fit one size smaller; consider downsizing instance',
+                    'current_value': f"p95 {profile['p95']:.1f}%, p99 {profile['p99']:.1f}%",
+                    'estimated_savings': '50%'
+                })
+        elif pattern == 'scheduled':
+            off_hours = 100 * (1 - profile['active_share'])
+            analysis['optimization_opportunities'].append({
+                'instance_id': instance_id,
+                'type': 'Scheduled Workload',
+                'description': 'CPU is busy only part of the day; consider an instance schedule or batch/Spot capacity',
+                'current_value': f"busy {100 * profile['active_share']:.0f}% of hours",
+                'estimated_savings': f'{off_hours:.0f}%'
+            })
+        elif pattern == 'bursty' and not re.match(r't\d', instance_type):
+            analysis['optimization_opportunities'].append({
+                'instance_id': instance_id,
+                'type': 'Bursty CPU Utilization',
+                'description': 'Low baseline CPU with short peaks; consider a burstable (T family) instance',
+                'current_value': f"p50 {profile['p50']:.1f}%, peak {profile['peak']:.1f}%",
+                'estimated_savings': '20-40%'
             })
 
-        # Check for old generation instances
-        instance_type = instance['InstanceType']
-        instance_family = instance_type.split('.')[0]
-        if instance_family in ['t2', 'm4', 'c4', 'r4']:
+        # Check for old generation instances: a newer generation at least as large costs less
+        upgrade = self.catalog.upgrade_target(instance_type, self.catalog_region, variant)
+        if upgrade:
+            analysis['optimization_opportunities'].append(_catalog_opportunity(
+                instance_id, 'Old Generation Instance',
+                f"Consider upgrading {instance_type} to {upgrade['target']['instance_type']}",
+                instance_type, upgrade
+            ))
+        elif instance_type.split('.')[0] in OLD_GENERATION_FAMILIES:
             analysis['optimization_opportunities'].append({
                 'instance_id': instance_id,
                 'type': 'Old Generation Instance',
@@ -147,22 +254,49 @@ class EC2Analyzer:
                         'estimated_savings': '100%'
                     })
 
+    def _count_graviton_eligible(self, instance, cost):
+        eligible = self._graviton_eligible
+        instance_type = instance['InstanceType']
+        graviton = self.catalog.graviton_target(instance_type, self.catalog_region, self._variant(instance))
+        if graviton:
+            eligible['count'] += 1
+            eligible['monthly_cost'] += graviton['monthly_cost']
+            eligible['monthly_savings'] += graviton['monthly_savings']
+        elif instance_type.startswith(GRAVITON_ELIGIBLE_FAMILIES):
+            eligible['count'] += 1
+            if cost:
+                eligible['monthly_cost'] += cost['monthly_estimate']
+                eligible['monthly_savings'] += cost['monthly_estimate'] * GRAVITON_ESTIMATED_SAVINGS
+            else:
+                eligible['without_cost'] += 1
+
     def _check_graviton_opportunities(self, analysis):
-        graviton_eligible_count = 0
-        total_eligible_cost = 0
-
-        for instance in analysis['instances']:
-            instance_type = instance['type']
-            if instance_type.startswith(('t3', 'm5', 'c5', 'r5')):
-                graviton_eligible_count += 1
-                # Rough estimation of instance cost
-                total_eligible_cost += analysis['total_cost'] / analysis['total_instances']
-
-        if graviton_eligible_count > 0:
-            estimated_savings = total_eligible_cost * 0.2  # Assuming 20% cost reduction
+        eligible = self._graviton_eligible
+        if eligible['count'] > 0:
+            # Each instance's price gap to its cheapest Graviton equivalent; instances the catalog
+            # does not price are estimated from their cost (else the fleet average)
+            fallback_cost = eligible['without_cost'] * analysis['total_cost'] / analysis['total_instances']
+            estimated_savings = eligible['monthly_savings'] + fallback_cost * GRAVITON_ESTIMATED_SAVINGS
             analysis['optimization_opportunities'].append({
                 'type': 'Graviton Migration Opportunity',
-                'description': f'{graviton_eligible_count} instances eligible for Graviton migration',
-                'current_value': f'{graviton_eligible_count} instances',
-                'estimated_savings': f'${estimated_savings:.2f}'
-            })
\ No newline at end of file
+                'description': f"{eligible['count']} instances eligible for Graviton migration",
+                'current_value': f"{eligible['count']} instances",
+                'monthly_cost': eligible['monthly_cost'] + fallback_cost,
+                'estimated_savings': f'${estimated_savings:.2f}',
+                'estimated_monthly_savings': estimated_savings
+            })
+
+    def _variant(self, instance):
+        # The catalog prices Linux; other platforms get no catalog-based targets
+        return EC2_VARIANT if instance.get('Platform', 'linux') == 'linux' else None
+
+def _catalog_opportunity(instance_id, opportunity_type, description, current_value, saving):
+    return {
+        'instance_id': instance_id,
+        'type': opportunity_type,
+        'description': description,
+        'current_value': current_value,
+        'recommended_instance_type': saving['target']['instance_type'],
+        'estimated_savings': f"{saving['savings_percent']:.0f}%",
+        'estimated_monthly_savings': saving['monthly_savings']
+    }
@@ -1,35 +1,50 @@
-import boto3
-import os
 from datetime import datetime, timedelta
+from ..instance_catalog import get_instance_catalog, rds_variant
+from ..metric_store import get_metric_store
+from ..resource_costs import get_resource_cost_index
+from ..utilization_profiles import UtilizationProfiles
+from ..utils.aws_utils import chunked, get_aws_client, paginate
+from ..utils.ce_cache import CachedCostExplorerClient
+from ..utils.cloudwatch import MAX_QUERIES_PER_REQUEST
+from .streaming import collect_analysis, drain_records, summary_record
+
+RDS_METRICS = ['CPUUtilization', 'DatabaseConnections', 'FreeStorageSpace']
+
+# Two weeks of hourly CPU give every hour of the week two samples
+PROFILE_DAYS = 14
+
+# Instances whose metrics fit in a single GetMetricData call (Average + Maximum per metric)
+METRICS_CHUNK_SIZE = MAX_QUERIES_PER_REQUEST // (len(RDS_METRICS) * 2)
 
 class RDSAnalyzer:
-    def __init__(self):
-        self.rds = boto3.client('rds',
-            aws_access_key_id=os.environ.get('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.environ.get('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.environ.get('AWS_REGION', 'us-east-1')
-        )
-        self.cloudwatch = boto3.client('cloudwatch')
-        self.ce = boto3.client('ce')
+    def __init__(self, region=None, account_id=None, progress=None):
+        # An explicit region scopes clients and cost data to that region (multi-region fan-out);
+        # an explicit account_id analyzes a member account (organization-wide analysis);
+        # progress(processed, total) is called as instances are analyzed (background jobs)
+        self.region = region
+        self.account_id = account_id
+        self.progress = progress
+        self.rds = get_aws_client('rds', region, account_id)
+        self.cloudwatch = get_aws_client('cloudwatch', region, account_id)
+        self.ce = CachedCostExplorerClient(get_aws_client('ce', 'us-east-1', account_id), account_id=account_id)
 
     def analyze(self):
+        return collect_analysis(self.iter_analysis())
+
+    def iter_analysis(self):
+        """Yield analysis records as instances are analyzed (see service_analyzers.streaming)"""
         end_date = datetime.now().strftime('%Y-%m-%d')
         start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
 
-        instances = self.rds.describe_db_instances()
-        cost_data = self.ce.get_cost_and_usage(
+        cost_results = paginate(
+            self.ce, 'get_cost_and_usage', 'ResultsByTime',
             TimePeriod={
                 'Start': start_date,
                 'End': end_date
             },
             Granularity='MONTHLY',
             Metrics=['UnblendedCost'],
-            Filter={
-                'Dimensions': {
-                    'Key': 'SERVICE',
-                    'Values': ['Amazon Relational Database Service']
-                }
-            }
+            Filter=self._cost_filter()
         )
 
         analysis = {
@@ -41,66 +56,120 @@ class RDSAnalyzer:
         }
 
         # Calculate total cost
-        for result in cost_data['ResultsByTime']:
+        for result in cost_results:
             analysis['total_cost'] += float(result['Total']['UnblendedCost']['Amount'])
 
-        for instance in instances['DBInstances']:
-            analysis['total_instances'] += 1
-            engine = instance['Engine']
-            analysis['engine_types'][engine] = analysis['engine_types'].get(engine, 0) + 1
-
-            # Get instance metrics
-            metrics = self._get_instance_metrics(instance['DBInstanceIdentifier'])
-
-            instance_data = {
-                'identifier': instance['DBInstanceIdentifier'],
-                'engine': engine,
-                'status': instance['DBInstanceStatus'],
-                'size': instance['DBInstanceClass'],
-                'storage': instance['AllocatedStorage'],
-                'multi_az': instance.get('MultiAZ', False),
-                'metrics': metrics
-            }
-            analysis['instances'].append(instance_data)
-
-            # Check for optimization opportunities
-            self._check_optimization_opportunities(instance, metrics, analysis)
-
-        return analysis
-
-    def _get_instance_metrics(self, instance_id, days=7):
-        end_time = datetime.utcnow()
-        start_time = end_time - timedelta(days=days)
-
-        metrics = {}
-        for metric_name in ['CPUUtilization', 'DatabaseConnections', 'FreeStorageSpace']:
-            response = self.cloudwatch.get_metric_statistics(
-                Namespace='AWS/RDS',
-                MetricName=metric_name,
-                Dimensions=[{'Name': 'DBInstanceIdentifier', 'Value': instance_id}],
-                StartTime=start_time,
-                EndTime=end_time,
-                Period=3600,
-                Statistics=['Average', 'Maximum']
+        # Per-instance cost comes from the shared resource cost index (one dict lookup per instance)
+        self.resource_costs = get_resource_cost_index()
+        # Rightsizing targets are priced from the instance catalog
+        self.catalog = get_instance_catalog('AmazonRDS')
+        self.catalog_region = self.region or self.rds.meta.region_name
+
+        instances = paginate(self.rds, 'describe_db_instances', 'DBInstances')
+        if self.progress:
+            # Progress needs a total, so read the instance list up front
+            instances = list(instances)
+            self.progress(0, len(instances))
+
+        processed = 0
+        for instance_chunk in chunked(instances, METRICS_CHUNK_SIZE):
+            fleet_metrics, profiles = self._get_instance_metrics(
+                [i['DBInstanceIdentifier'] for i in instance_chunk]
             )
+            for instance in instance_chunk:
+                self._analyze_instance(instance, fleet_metrics[instance['DBInstanceIdentifier']],
+                                       profiles.profile(instance['DBInstanceIdentifier']), analysis)
+                yield from drain_records(analysis)
+
+            processed += len(instance_chunk)
+            if self.progress:
+                self.progress(processed, len(instances))
+
+        yield summary_record(analysis)
+
+    def _cost_filter(self):
+        service_filter = {
+            'Dimensions': {
+                'Key': 'SERVICE',
+                'Values': ['Amazon Relational Database Service']
+            }
+        }
+        if not self.region:
+            return service_filter
+        return {'And': [service_filter, {'Dimensions': {'Key': 'REGION', 'Values': [self.region]}}]}
+
+    def _analyze_instance(self, instance, metrics, profile, analysis):
+        analysis['total_instances'] += 1
+        engine = instance['Engine']
+        analysis['engine_types'][engine] = analysis['engine_types'].get(engine, 0) + 1
+        cost = self.resource_costs.summary(instance.get('DBInstanceArn', ''))
+
+        instance_data = {
+            'identifier': instance['DBInstanceIdentifier'],
+            'engine': engine,
+            'status': instance['DBInstanceStatus'],
+            'size': instance['DBInstanceClass'],
+            'storage': instance['AllocatedStorage'],
+            'multi_az': instance.get('MultiAZ', False),
+            'metrics': metrics,
+            'utilization_profile': profile,
+            'cost': cost
+        }
+        analysis['instances'].append(instance_data)
+
+        # Check for optimization opportunities
+        self._check_optimization_opportunities(instance, metrics, profile, analysis)
+        for opportunity in analysis['optimization_opportunities']:
+            if opportunity['instance_id'] == instance['DBInstanceIdentifier']:
+                opportunity['monthly_cost'] = cost['monthly_estimate'] if cost else None
+
+    def _get_instance_metrics(self, instance_ids, days=PROFILE_DAYS):
+        """Metric summaries per instance and the chunk's CPU utilization profiles"""
+        # Series live in the shared metric store; only instances it has not seen yet are fetched
+        views = get_metric_store().fetch(
+            self.cloudwatch, 'AWS/RDS', 'DBInstanceIdentifier', instance_ids, RDS_METRICS, days,
+            scope=(self.cloudwatch.meta.region_name, self.account_id)
+        )
 
-            if response['Datapoints']:
-                metrics[metric_name] = {
-                    'average': sum(p['Average'] for p in response['Datapoints']) / len(response['Datapoints']),
-                    'max': max(p['Maximum'] for p in response['Datapoints'])
-                }
+        metrics = {instance_id: {} for instance_id in instance_ids}
+        for metric_name, view in views.items():
+            for instance_id, summary in view.summaries().items():
+                metrics[instance_id][metric_name] = summary
 
-        return metrics
+        return metrics, UtilizationProfiles.from_view(views['CPUUtilization'])
 
-    def _check_optimization_opportunities(self, instance, metrics, analysis):
-        # Check CPU utilization
-        if metrics.get('CPUUtilization', {}).get('average', 0) < 20:
+    def _check_optimization_opportunities(self, instance, metrics, profile, analysis):
+        # Rightsizing follows the CPU profile's percentiles and pattern, not the mean;
+        # scheduled and bursty databases keep their size for their peaks
+        pattern = profile['pattern'] if profile else None
+        if pattern == 'idle':
             analysis['optimization_opportunities'].append({
                 'instance_id': instance['DBInstanceIdentifier'],
-                'type': 'Low CPU Utilization',
-                'description': 'Consider downsizing instance due to low CPU usage',
-                'current_value': f"{metrics['CPUUtilization']['average']:.1f}%"
+                'type': 'Idle Database',
+                'description': 'CPU stayed idle for the whole period; consider stopping or removing the instance',
+                'current_value': f"p99 {profile['p99']:.1f}%"
             })
+        elif pattern == 'underutilized':
+            instance_class = instance['DBInstanceClass']
+            variant = rds_variant(instance['Engine'], instance.get('MultiAZ', False))
+            target = self.catalog.rightsizing_target(instance_class, self.catalog_region, variant, profile['p95'])
+            if target:
+                analysis['optimization_opportunities'].append({
+                    'instance_id': instance['DBInstanceIdentifier'],
+                    'type': 'Low CPU Utilization',
+                    'description': f"p95 CPU fits {target['target']['instance_type']}; consider downsizing from {instance_class}",
+                    'current_value': f"p95 {profile['p95']:.1f}%, p99 {profile['p99']:.1f}%",
+                    'recommended_instance_class': target['target']['instance_type'],
+                    'estimated_savings': f"{target['savings_percent']:.0f}%",
+                    'estimated_monthly_savings': target['monthly_savings']
+                })
+            elif not self.catalog.get(instance_class, self.catalog_region, variant):
+                analysis['optimization_opportunities'].append({
+                    'instance_id': instance['DBInstanceIdentifier'],
+                    'type': 'Low CPU Utilization',
+                    'description': 'p95 and p99 CPU fit one size smaller; consider downsizing instance',
+                    'current_value': f"p95 {profile['p95']:.1f}%, p99 {profile['p99']:.1f}%"
+                })
 
         # Check storage utilization
         if 'FreeStorageSpace' in metrics:
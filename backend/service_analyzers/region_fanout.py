@@ -0,0 +1,153 @@
+import contextvars
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional
+from ..utils.aws_utils import get_aws_client
+from ..utils.logger import get_logger
+from .streaming import AnalysisRecord
+
+logger = get_logger(__name__)
+
+# Per-resource lists in an analysis that get tagged with their region when merged
+TAGGED_LISTS = ('instances', 'optimization_opportunities')
+
+# Records buffered between region analyzers and a slow streaming client
+STREAM_QUEUE_SIZE = 1000
+
+def get_enabled_regions() -> List[str]:
+    """Regions to analyze: AWS_REGIONS if set, otherwise every region enabled for the account"""
+    configured = os.environ.get('AWS_REGIONS')
+    if configured:
+        return [region.strip() for region in configured.split(',') if region.strip()]
+
+    ec2 = get_aws_client('ec2')
+    # Without AllRegions, describe_regions only returns regions enabled for the account
+    return sorted(region['RegionName'] for region in ec2.describe_regions()['Regions'])
+
+def analyze_regions(analyzer_cls, regions: Optional[List[str]] = None,
+                    max_workers: Optional[int] = None, **analyzer_kwargs) -> Dict:
+    """Run analyzer_cls(region=...).analyze() for every region concurrently and merge the results.
+
+    Analyzers run on a bounded pool, so total latency tracks the slowest
+    region rather than the sum of all regions. Extra keyword arguments
+    (account_id) are passed to every analyzer.
+    """
+    regions = regions or get_enabled_regions()
+    if not regions:
+        # e.g. AWS_REGIONS lists no region; a pool of zero workers is invalid
+        return {'regions': {}}
+    max_workers = max_workers or int(os.environ.get('REGION_FANOUT_WORKERS', 8))
+    analyzers = {region: analyzer_cls(region=region, **analyzer_kwargs) for region in regions}
+
+    results = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(regions))) as pool:
+        futures = {pool.submit(analyzer.analyze): region for region, analyzer in analyzers.items()}
+        for future in as_completed(futures):
+            region = futures[future]
+            try:
+                results[region] = future.result()
+            except Exception as e:
+                logger.error(f'{analyzer_cls.__name__} failed in {region}: {str(e)}')
+                errors[region] = str(e)
+
+    merged = merge_region_analyses(results)
+    merged['regions'] = {
+        region: {'status': 'error', 'error': errors[region]} if region in errors else {'status': 'ok'}
+        for region in regions
+    }
+    return merged
+
+def iter_region_records(analyzer_cls, regions: Optional[List[str]] = None,
+                        max_workers: Optional[int] = None, **analyzer_kwargs) -> Iterator[AnalysisRecord]:
+    """Streaming counterpart of analyze_regions.
+
+    Regions are analyzed concurrently and their instance/opportunity records
+    are yielded, tagged with their region, in the order they arrive; a
+    single merged summary record (with the per-region status map) comes
+    last. A bounded queue applies backpressure to the analyzers, and closing
+    the generator (e.g. the client disconnected) stops them.
+    """
+    regions = regions or get_enabled_regions()
+    if not regions:
+        yield 'summary', {'regions': {}}
+        return
+    max_workers = max_workers or int(os.environ.get('REGION_FANOUT_WORKERS', 8))
+    analyzers = {region: analyzer_cls(region=region, **analyzer_kwargs) for region in regions}
+    records = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    cancelled = threading.Event()
+
+    def put(item):
+        while not cancelled.is_set():
+            try:
+                records.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(region, analyzer):
+        try:
+            for kind, record in analyzer.iter_analysis():
+                if not put((region, kind, record)):
+                    return
+        except Exception as e:
+            logger.error(f'{analyzer_cls.__name__} failed in {region}: {str(e)}')
+            put((region, 'error', str(e)))
+        finally:
+            put((region, None, None))
+
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(regions)))
+    for region, analyzer in analyzers.items():
+        pool.submit(contextvars.copy_context().run, produce, region, analyzer)
+
+    summaries = {}
+    errors = {}
+    running = len(regions)
+    try:
+        while running:
+            region, kind, record = records.get()
+            if kind is None:
+                running -= 1
+            elif kind == 'summary':
+                summaries[region] = record
+            elif kind == 'error':
+                errors[region] = record
+            else:
+                yield kind, {**record, 'region': region}
+    finally:
+        cancelled.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    summary = merge_region_analyses(summaries)
+    summary['regions'] = {
+        region: {'status': 'error', 'error': errors[region]} if region in errors else {'status': 'ok'}
+        for region in regions
+    }
+    yield 'summary', summary
+
+def merge_region_analyses(results: Dict[str, Dict]) -> Dict:
+    """Merge per-region analysis dicts.
+
+    Numeric counters are summed, histogram dicts (instance_types,
+    engine_types) are merged by key, and instance/opportunity lists are
+    concatenated with a ``region`` tag on every entry.
+    """
+    merged = {}
+    for region in sorted(results):
+        for key, value in results[region].items():
+            if key in TAGGED_LISTS:
+                merged.setdefault(key, []).extend({**item, 'region': region} for item in value)
+            elif isinstance(value, list):
+                merged.setdefault(key, []).extend(value)
+            elif isinstance(value, dict):
+                histogram = merged.setdefault(key, {})
+                for name, count in value.items():
+                    histogram[name] = histogram.get(name, 0) + count
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                merged[key] = merged.get(key, 0) + value
+            else:
+                merged.setdefault(key, value)
+    return merged
@@ -1,58 +1,257 @@
+import os
+from datetime import datetime, timedelta
+from functools import partial
 from typing import Dict, List
-import boto3
+from botocore.exceptions import ClientError
+from ..utils.aws_utils import get_aws_client, paginate
+from ..utils.cloudwatch import get_metric_series
+from ..utils.concurrency import run_parallel
+from ..utils.logger import get_logger
+from ..utils.s3_inventory import find_inventory_manifest, read_inventory_totals
+
+logger = get_logger(__name__)
+
+# CloudWatch BucketSizeBytes StorageType -> S3 storage class; unlisted
+# types (object overhead, staging) are reported under their own name
+STORAGE_TYPE_CLASSES = {
+    'StandardStorage': 'STANDARD',
+    'StandardIAStorage': 'STANDARD_IA',
+    'OneZoneIAStorage': 'ONEZONE_IA',
+    'ReducedRedundancyStorage': 'REDUCED_REDUNDANCY',
+    'GlacierInstantRetrievalStorage': 'GLACIER_IR',
+    'GlacierStorage': 'GLACIER',
+    'DeepArchiveStorage': 'DEEP_ARCHIVE',
+    'IntelligentTieringFAStorage': 'INTELLIGENT_TIERING',
+    'IntelligentTieringIAStorage': 'INTELLIGENT_TIERING',
+    'IntelligentTieringAIAStorage': 'INTELLIGENT_TIERING',
+    'IntelligentTieringAAStorage': 'INTELLIGENT_TIERING',
+    'IntelligentTieringDAAStorage': 'INTELLIGENT_TIERING'
+}
+
+# get_bucket_location values that are not region names
+LEGACY_LOCATIONS = {
+    None: 'us-east-1',
+    '': 'us-east-1',
+    'EU': 'eu-west-1'
+}
+
+EMPTY_SIZE = {'size_bytes': 0, 'object_count': 0, 'storage_classes': {}, 'source': 'cloudwatch'}
+
+# STANDARD bytes above which a bucket without lifecycle rules gets a recommendation
+LIFECYCLE_STANDARD_BYTES = 100 * 1024 ** 3
 
 class S3Analyzer:
-    def __init__(self):
-        self.s3 = boto3.client('s3')
+    def __init__(self, exact_sizes=None, max_workers=None, bucket_timeout=None, inventory_timeout=None,
+                 progress=None):
+        self.s3 = get_aws_client('s3')
+        # progress(processed, total) is called as buckets are inspected (background jobs)
+        self.progress = progress
+        # Exact mode totals the latest S3 Inventory report instead of the daily storage metrics
+        if exact_sizes is None:
+            exact_sizes = os.environ.get('S3_EXACT_SIZES', '').lower() in ('1', 'true', 'yes')
+        self.exact_sizes = exact_sizes
+        self.max_workers = max_workers or int(os.environ.get('S3_INSPECTION_WORKERS', 16))
+        self.bucket_timeout = bucket_timeout or float(os.environ.get('S3_BUCKET_TIMEOUT', 30))
+        # Inventory reports of large buckets take minutes to stream, so they get their own budget
+        self.inventory_timeout = inventory_timeout or float(os.environ.get('S3_INVENTORY_TIMEOUT', 900))
 
     def analyze_buckets(self) -> Dict:
+        """Inspect every bucket in one pass.
+
+        Buckets are inspected on a bounded pool with region-local clients
+        (no cross-region redirects); a bucket that exceeds the per-bucket
+        timeout is reported with an error instead of stalling the result.
+        In exact mode the inventory reports are then read as a separate stage
+        under S3_INVENTORY_TIMEOUT. Buckets still without a size (no report,
+        or the read failed or timed out) get storage metric sizes, fetched
+        once per region.
+        """
         buckets = self._get_all_buckets()
+        inspected = []
+        if self.progress:
+            self.progress(0, len(buckets))
+
+        def on_complete(bucket_name):
+            inspected.append(bucket_name)
+            if self.progress:
+                self.progress(len(inspected), len(buckets))
+
+        inspections, errors = run_parallel(
+            {bucket['Name']: partial(self._inspect_bucket, bucket['Name']) for bucket in buckets},
+            timeout=self.bucket_timeout,
+            max_workers=self.max_workers,
+            on_complete=on_complete
+        )
+
+        if self.exact_sizes:
+            self._add_inventory_sizes(inspections)
+
+        by_region = {}
+        for bucket_name, inspection in inspections.items():
+            if 'size' not in inspection:
+                by_region.setdefault(inspection['region'], []).append(bucket_name)
+        sizes, size_errors = run_parallel({
+            region: partial(self._get_storage_metric_sizes, region, bucket_names)
+            for region, bucket_names in by_region.items()
+        })
+        for region_sizes in sizes.values():
+            for bucket_name, size in region_sizes.items():
+                inspections[bucket_name]['size'] = size
+        # A failed storage metric lookup leaves the size unknown, not zero
+        for region, error in size_errors.items():
+            for bucket_name in by_region[region]:
+                inspections[bucket_name]['size_error'] = error
+
+        bucket_details = []
+        recommendations = []
+        for bucket in buckets:
+            bucket_name = bucket['Name']
+            detail = {
+                'name': bucket_name,
+                'creation_date': bucket['CreationDate'].isoformat()
+            }
+            inspection = inspections.get(bucket_name)
+            if inspection is None:
+                detail['error'] = errors.get(bucket_name, 'not inspected')
+                bucket_details.append(detail)
+                continue
+
+            detail.update({
+                'region': inspection['region'],
+                'has_lifecycle': inspection['has_lifecycle']
+            })
+            if 'size_error' in inspection:
+                detail.update({
+                    'size': None,
+                    'object_count': None,
+                    'storage_classes': {},
+                    'size_error': inspection['size_error']
+                })
+            else:
+                size = inspection.get('size', EMPTY_SIZE)
+                detail.update({
+                    'size': size['size_bytes'],
+                    'object_count': size['object_count'],
+                    'storage_classes': size['storage_classes'],
+                    'size_source': size['source']
+                })
+            bucket_details.append(detail)
+            recommendations.extend(self._generate_recommendations(detail, inspection))
+
         return {
             'total_buckets': len(buckets),
-            'bucket_details': self._get_bucket_details(buckets),
-            'recommendations': self._generate_recommendations(buckets)
+            'bucket_details': bucket_details,
+            'recommendations': recommendations
         }
 
     def _get_all_buckets(self) -> List:
         response = self.s3.list_buckets()
         return response['Buckets']
 
-    def _get_bucket_details(self, buckets: List) -> List:
-        details = []
-        for bucket in buckets:
-            try:
-                lifecycle = self.s3.get_bucket_lifecycle_configuration(Bucket=bucket['Name'])
-            except:
-                lifecycle = None
-
-            details.append({
-                'name': bucket['Name'],
-                'creation_date': bucket['CreationDate'].isoformat(),
-                'has_lifecycle': lifecycle is not None,
-                'size': self._get_bucket_size(bucket['Name'])
-            })
-        return details
-
-    def _get_bucket_size(self, bucket_name: str) -> int:
-        total_size = 0
-        paginator = self.s3.get_paginator('list_objects_v2')
-        for page in paginator.paginate(Bucket=bucket_name):
-            if 'Contents' in page:
-                for obj in page['Contents']:
-                    total_size += obj['Size']
-        return total_size
-
-    def _generate_recommendations(self, buckets: List) -> List:
+    def _inspect_bucket(self, bucket_name: str) -> Dict:
+        """Region, lifecycle and versioning of one bucket via its region's client"""
+        location = self.s3.get_bucket_location(Bucket=bucket_name).get('LocationConstraint')
+        region = LEGACY_LOCATIONS.get(location, location)
+        s3 = get_aws_client('s3', region)
+
+        try:
+            s3.get_bucket_lifecycle_configuration(Bucket=bucket_name)
+            has_lifecycle = True
+        except ClientError:
+            has_lifecycle = False
+
+        try:
+            # No Status means versioning was never enabled
+            versioning = s3.get_bucket_versioning(Bucket=bucket_name).get('Status', '')
+        except ClientError:
+            # Unknown (e.g. AccessDenied); no recommendation is made
+            versioning = None
+
+        return {
+            'region': region,
+            'has_lifecycle': has_lifecycle,
+            'versioning': versioning
+        }
+
+    def _add_inventory_sizes(self, inspections: Dict[str, Dict]):
+        sizes, errors = run_parallel(
+            {
+                bucket_name: partial(self._get_inventory_size, inspection['region'], bucket_name)
+                for bucket_name, inspection in inspections.items()
+            },
+            timeout=self.inventory_timeout,
+            max_workers=self.max_workers
+        )
+        for bucket_name, error in errors.items():
+            logger.warning(f'No S3 Inventory size for {bucket_name}, using storage metrics: {error}')
+        for bucket_name, size in sizes.items():
+            if size:
+                inspections[bucket_name]['size'] = size
+
+    def _get_inventory_size(self, region: str, bucket_name: str):
+        s3 = get_aws_client('s3', region)
+        try:
+            manifest = find_inventory_manifest(s3, bucket_name)
+            if manifest:
+                return {**read_inventory_totals(s3, *manifest), 'source': 'inventory'}
+        except Exception as e:
+            logger.error(f'Error reading S3 Inventory for {bucket_name}: {str(e)}')
+        # No usable inventory report; the caller falls back to storage metrics
+        return None
+
+    def _get_storage_metric_sizes(self, region: str, bucket_names: List[str]) -> Dict[str, Dict]:
+        """Size per storage class and object count from the daily AWS/S3 storage metrics.
+
+        Storage metrics live in the bucket's region. ListMetrics discovers
+        which (bucket, storage type) series exist, so only those are queried,
+        in batched GetMetricData calls; no objects are listed.
+        """
+        cloudwatch = get_aws_client('cloudwatch', region)
+        sizes = {bucket_name: {**EMPTY_SIZE, 'storage_classes': {}} for bucket_name in bucket_names}
+
+        requests = []
+        for metric_name in ('BucketSizeBytes', 'NumberOfObjects'):
+            for metric in paginate(cloudwatch, 'list_metrics', 'Metrics',
+                                   Namespace='AWS/S3', MetricName=metric_name):
+                dimensions = {d['Name']: d['Value'] for d in metric['Dimensions']}
+                if dimensions.get('BucketName') in sizes:
+                    requests.append(((metric_name, dimensions['BucketName'], dimensions['StorageType']),
+                                     'AWS/S3', metric_name, metric['Dimensions']))
+
+        # Storage metrics are emitted once a day; the last three days always hold the latest one
+        end_time = datetime.utcnow()
+        series = get_metric_series(cloudwatch, requests, end_time - timedelta(days=3), end_time,
+                                   period=86400, statistics=('Average',))
+
+        for (metric_name, bucket_name, storage_type), metric_series in series.items():
+            if not metric_series:
+                continue
+            latest = int(metric_series['Average'][1][-1])
+            size = sizes[bucket_name]
+            if metric_name == 'NumberOfObjects':
+                size['object_count'] += latest
+                continue
+            storage_class = STORAGE_TYPE_CLASSES.get(storage_type, storage_type)
+            size['storage_classes'][storage_class] = size['storage_classes'].get(storage_class, 0) + latest
+            size['size_bytes'] += latest
+        return sizes
+
+    def _generate_recommendations(self, detail: Dict, inspection: Dict) -> List:
         recommendations = []
-        for bucket in buckets:
-            try:
-                versioning = self.s3.get_bucket_versioning(Bucket=bucket['Name'])
-                if 'Status' not in versioning:
-                    recommendations.append({
-                        'bucket_name': bucket['Name'],
-                        'type': 'enable_versioning',
-                        'message': f'Consider enabling versioning for bucket {bucket["Name"]} for data protection'
-                    })
-            except:
-                pass
-        return recommendations
\ No newline at end of file
+        if inspection['versioning'] == '':
+            recommendations.append({
+                'bucket_name': detail['name'],
+                'type': 'enable_versioning',
+                'message': f'Consider enabling versioning for bucket {detail["name"]} for data protection'
+            })
+
+        standard_bytes = detail['storage_classes'].get('STANDARD', 0)
+        if not detail['has_lifecycle'] and standard_bytes > LIFECYCLE_STANDARD_BYTES:
+            recommendations.append({
+                'bucket_name': detail['name'],
+                'type': 'add_lifecycle_policy',
+                'message': f'Bucket {detail["name"]} holds {standard_bytes / 1024 ** 3:.0f} GiB in STANDARD '
+                           f'with no lifecycle rules; consider transitioning infrequently accessed data '
+                           f'to STANDARD_IA or Glacier'
+            })
+        return recommendations
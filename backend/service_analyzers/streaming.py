@@ -0,0 +1,33 @@
+from typing import Dict, Iterable, Iterator, Tuple
+
+# Per-resource analysis lists and the record kind each of their items is streamed as
+RECORD_LISTS = {
+    'instances': 'instance',
+    'optimization_opportunities': 'optimization_opportunity'
+}
+
+# (kind, record): 'instance' / 'optimization_opportunity' records as resources
+# are analyzed, followed by a single 'summary' record with the counters
+AnalysisRecord = Tuple[str, Dict]
+
+def drain_records(analysis: Dict) -> Iterator[AnalysisRecord]:
+    """Yield and clear the per-resource items accumulated in an analysis dict"""
+    for key, kind in RECORD_LISTS.items():
+        items = analysis.get(key)
+        if items:
+            yield from ((kind, item) for item in items)
+            items.clear()
+
+def summary_record(analysis: Dict) -> AnalysisRecord:
+    return 'summary', {key: value for key, value in analysis.items() if key not in RECORD_LISTS}
+
+def collect_analysis(records: Iterable[AnalysisRecord]) -> Dict:
+    """Rebuild the classic analysis dict from a record stream"""
+    collected = {key: [] for key in RECORD_LISTS}
+    kinds = {kind: key for key, kind in RECORD_LISTS.items()}
+    for kind, record in records:
+        if kind == 'summary':
+            collected.update(record)
+        else:
+            collected[kinds[kind]].append(record)
+    return collected
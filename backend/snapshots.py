@@ -0,0 +1,240 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+from flask import jsonify
+from .utils.aws_utils import get_client_registry
+from .utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.expanduser('~'), '.aws-cost-analyzer', 'snapshots.sqlite3')
+
+SNAPSHOT_AGE_HEADER = 'X-Snapshot-Age'
+
+# Seconds between checks while another worker builds a missing snapshot
+MISSING_POLL_INTERVAL = 0.2
+
+# Lease that lets one worker process run each scheduler pass
+SCHEDULER_LEASE = '__scheduler__'
+
+class SnapshotStore:
+    """Latest precomputed payload per key, stored in SQLite and shared by every worker.
+
+    A refresh lease per key makes sure only one worker process recomputes a
+    stale payload at a time; leases expire on their own if a refresh dies.
+    """
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS snapshots ('
+                ' key TEXT PRIMARY KEY,'
+                ' payload BLOB NOT NULL,'
+                ' computed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)')
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps this safe across threads and processes
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(payload, computed_at) of the latest snapshot, or None"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT payload, computed_at FROM snapshots WHERE key = ?', (key,)).fetchone()
+        return (json.loads(zlib.decompress(row[0])), row[1]) if row else None
+
+    def put(self, key: str, payload: Any):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO snapshots (key, payload, computed_at) VALUES (?, ?, ?)',
+                (key, zlib.compress(json.dumps(payload, default=str).encode()), time.time())
+            )
+
+    def acquire_lease(self, key: str, seconds: float) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT expires_at FROM leases WHERE key = ?', (key,)).fetchone()
+            if row and row[0] > now:
+                conn.execute('COMMIT')
+                return False
+            conn.execute('INSERT OR REPLACE INTO leases (key, expires_at) VALUES (?, ?)', (key, now + seconds))
+            conn.execute('COMMIT')
+            return True
+
+    def release_lease(self, key: str):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM leases WHERE key = ?', (key,))
+
+class SnapshotService:
+    """Serves dashboard payloads from precomputed snapshots (stale-while-revalidate).
+
+    Payload builders are registered by name. Reads return the last snapshot
+    immediately and, once it is older than ``stale_after`` seconds, kick off a
+    background refresh; only a missing snapshot is built inline. A scheduler
+    thread refreshes every registered payload on the same cadence (one
+    worker process per pass), so dashboard reads normally never wait on Cost
+    Explorer. Expensive payloads can be registered with a longer
+    ``stale_after``, or ``on_demand`` so the scheduler leaves them alone and
+    they are only built and refreshed when read. Snapshots are kept per AWS
+    account.
+    """
+
+    def __init__(self, store: SnapshotStore, stale_after: float = 900, refresh_timeout: float = 600):
+        self.store = store
+        self.stale_after = stale_after
+        self.refresh_timeout = refresh_timeout
+        self._builders: Dict[str, Callable[[], Any]] = {}
+        self._stale_after: Dict[str, float] = {}
+        self._on_demand = set()
+        # (client registry, account id) the snapshot keys are scoped to
+        self._account: Optional[Tuple[Any, str]] = None
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='snapshot')
+        self._scheduler_pid = None
+        self._scheduler_lock = threading.Lock()
+
+    def register(self, name: str, builder: Callable[[], Any], stale_after: Optional[float] = None,
+                 on_demand: bool = False):
+        self._builders[name] = builder
+        self._stale_after[name] = stale_after or self.stale_after
+        if on_demand:
+            self._on_demand.add(name)
+        else:
+            self._on_demand.discard(name)
+
+    def get(self, name: str) -> Tuple[Any, float]:
+        """(payload, age in seconds) for a registered payload"""
+        snapshot = self.store.get(self._key(name))
+        if snapshot is None:
+            return self._build_missing(name), 0.0
+
+        payload, computed_at = snapshot
+        age = time.time() - computed_at
+        if age > self._stale_after[name]:
+            self.refresh_async(name)
+        return payload, age
+
+    def _build_missing(self, name: str) -> Any:
+        """Build a payload that has no snapshot yet, once across threads and workers"""
+        key = self._key(name)
+        deadline = time.monotonic() + self.refresh_timeout
+        while not self.store.acquire_lease(key, self.refresh_timeout):
+            # Someone else is building it; wait for their snapshot
+            time.sleep(MISSING_POLL_INTERVAL)
+            snapshot = self.store.get(key)
+            if snapshot is not None:
+                return snapshot[0]
+            if time.monotonic() > deadline:
+                return self.refresh(name)
+        try:
+            return self.refresh(name)
+        finally:
+            self.store.release_lease(key)
+
+    def refresh(self, name: str) -> Any:
+        payload = self._builders[name]()
+        self.store.put(self._key(name), payload)
+        return payload
+
+    def refresh_async(self, name: str):
+        key = self._key(name)
+        if self.store.acquire_lease(key, self.refresh_timeout):
+            self._pool.submit(self._refresh_leased, name, key)
+
+    def _refresh_leased(self, name: str, key: str):
+        try:
+            self.refresh(name)
+            logger.info(f'Refreshed snapshot {key}')
+        except Exception as e:
+            # The previous snapshot keeps being served until a refresh succeeds
+            logger.error(f'Error refreshing snapshot {key}: {str(e)}')
+        finally:
+            self.store.release_lease(key)
+
+    def refresh_stale(self):
+        for name in list(self._builders):
+            if name in self._on_demand:
+                continue
+            snapshot = self.store.get(self._key(name))
+            if snapshot is None or time.time() - snapshot[1] > self._stale_after[name]:
+                self.refresh_async(name)
+
+    def start_scheduler(self, interval: Optional[float] = None):
+        """Start the refresh loop once per process (call from a request hook so it survives forking)"""
+        with self._scheduler_lock:
+            if self._scheduler_pid == os.getpid():
+                return
+            self._scheduler_pid = os.getpid()
+
+        interval = interval or min(self.stale_after, 60)
+
+        def loop():
+            while True:
+                try:
+                    # Every worker runs a scheduler; the lease gives each pass to one of them
+                    if self.store.acquire_lease(SCHEDULER_LEASE, interval):
+                        self.refresh_stale()
+                except Exception as e:
+                    logger.error(f'Snapshot scheduler error: {str(e)}')
+                time.sleep(interval)
+
+        threading.Thread(target=loop, name='snapshot-scheduler', daemon=True).start()
+
+    def _key(self, name: str) -> str:
+        return f'{self._account_id()}:{name}'
+
+    def _account_id(self) -> str:
+        """Caller account, resolved once per client registry (STS failures fall back to 'default')"""
+        registry = get_client_registry()
+        account = self._account
+        if account is None or account[0] is not registry:
+            try:
+                account_id = registry.caller_account_id()
+            except Exception as e:
+                logger.warning(f'Could not resolve the AWS account for snapshots, using default: {str(e)}')
+                account_id = 'default'
+            account = self._account = (registry, account_id)
+        return account[1]
+
+def snapshot_response(name: str):
+    """JSON response for a snapshot, with its age in the X-Snapshot-Age header"""
+    payload, age = get_snapshot_service().get(name)
+    response = jsonify(payload)
+    response.headers[SNAPSHOT_AGE_HEADER] = str(int(age))
+    return response
+
+def init_snapshot_scheduler(app):
+    if os.environ.get('SNAPSHOT_SCHEDULER', 'true').lower() in ('0', 'false', 'no'):
+        return
+
+    @app.before_request
+    def ensure_snapshot_scheduler():
+        get_snapshot_service().start_scheduler()
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_snapshot_service() -> SnapshotService:
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = SnapshotService(
+                SnapshotStore(os.environ.get('SNAPSHOT_STORE_PATH') or DEFAULT_SNAPSHOT_PATH),
+                stale_after=float(os.environ.get('SNAPSHOT_STALE_AFTER', 900))
+            )
+        return _service
@@ -0,0 +1,203 @@
+import os
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .resource_costs import cost_resource_id, load_resource_costs
+from .utils.aws_utils import get_aws_client, paginate
+from .utils.logger import get_logger
+from .utils.memo import ArtifactMemo
+
+logger = get_logger(__name__)
+
+DEFAULT_TAG_KEYS = ['team', 'env', 'project']
+
+TOP_RESOURCES = 20
+
+TAG_COLUMNS = ['resource_id', 'key', 'value']
+
+class TagIndex:
+    """In-memory inverted index from tag key/value to resources and their cost rows.
+
+    Built once from resource-day cost rows and the tags of those resources
+    (only ``tag_keys`` are indexed). Resources and days are integer-coded,
+    so a filter such as ``team=X AND env=prod`` is answered with boolean
+    masks and bincounts instead of new AWS calls. Filters OR the values of
+    one key and AND different keys; an empty value matches resources that
+    lack the key.
+    """
+
+    def __init__(self, rows: pd.DataFrame, tags: pd.DataFrame, tag_keys: List[str]):
+        self.tag_keys = list(tag_keys)
+        self.cost = rows['cost'].to_numpy(dtype='float64')
+        self.resource_codes, self.resources = pd.factorize(rows['resource_id'])
+        self.day_codes, self.days = pd.factorize(rows['date'], sort=True)
+        self.service_codes, self.services = pd.factorize(rows['service'])
+        self.resource_cost = np.bincount(self.resource_codes, weights=self.cost, minlength=len(self.resources))
+
+        tags = tags[tags['key'].isin(self.tag_keys)]
+        codes = self.resources.get_indexer(tags['resource_id'])
+        tags = tags.assign(code=codes)[codes >= 0]
+
+        # Per key: the value code of every resource (-1 when untagged) and the value names
+        self.value_codes: Dict[str, np.ndarray] = {}
+        self.values: Dict[str, pd.Index] = {}
+        self.postings: Dict[tuple, np.ndarray] = {}
+        for key in self.tag_keys:
+            key_tags = tags[tags['key'] == key]
+            value_codes, values = pd.factorize(key_tags['value'], sort=True)
+            per_resource = np.full(len(self.resources), -1, dtype=np.int64)
+            per_resource[key_tags['code'].to_numpy()] = value_codes
+            self.value_codes[key] = per_resource
+            self.values[key] = values
+
+            order = np.argsort(value_codes, kind='stable')
+            sorted_resources = key_tags['code'].to_numpy()[order]
+            bounds = np.searchsorted(value_codes[order], np.arange(len(values) + 1))
+            for i, value in enumerate(values):
+                self.postings[(key, value)] = sorted_resources[bounds[i]:bounds[i + 1]]
+
+    def match(self, filters: Dict[str, List[str]]) -> np.ndarray:
+        """Boolean mask over resources matching every key's filter"""
+        mask = np.ones(len(self.resources), dtype=bool)
+        for key, values in filters.items():
+            if key not in self.value_codes:
+                raise ValueError(f'Tag key {key} is not indexed (indexed: {", ".join(self.tag_keys)})')
+            key_mask = np.zeros(len(self.resources), dtype=bool)
+            for value in values:
+                if value == '':
+                    key_mask |= self.value_codes[key] < 0
+                else:
+                    key_mask[self.postings.get((key, value), [])] = True
+            mask &= key_mask
+        return mask
+
+    def query(self, filters: Optional[Dict[str, List[str]]] = None, group_by: Optional[str] = None) -> Dict:
+        """Cost of the resources matching ``filters``, optionally split by the values of ``group_by``"""
+        resource_mask = self.match(filters or {})
+        row_weights = self.cost * resource_mask[self.resource_codes]
+
+        result = {
+            'filters': filters or {},
+            'total_cost': float(row_weights.sum()),
+            'resource_count': int(resource_mask.sum()),
+            'daily_costs': [
+                {'date': day.strftime('%Y-%m-%d'), 'cost': float(cost)}
+                for day, cost in zip(self.days, np.bincount(self.day_codes, row_weights, len(self.days)))
+            ],
+            'services': _named_costs(self.services, np.bincount(self.service_codes, row_weights, len(self.services))),
+            'top_resources': self._top_resources(resource_mask)
+        }
+        if group_by:
+            result['group_by'] = group_by
+            result['groups'] = self._split(resource_mask, group_by)
+        return result
+
+    def untagged(self) -> Dict:
+        """Spend of resources missing every indexed key, and per key"""
+        missing_all = np.ones(len(self.resources), dtype=bool)
+        by_key = {}
+        for key in self.tag_keys:
+            missing = self.value_codes[key] < 0
+            missing_all &= missing
+            by_key[key] = float(self.resource_cost[missing].sum())
+
+        total = float(self.resource_cost.sum())
+        untagged = float(self.resource_cost[missing_all].sum())
+        return {
+            'total_cost': total,
+            'untagged_cost': untagged,
+            'untagged_percent': untagged / total * 100 if total else 0.0,
+            'untagged_resource_count': int(missing_all.sum()),
+            'missing_by_key': by_key,
+            'top_resources': self._top_resources(missing_all)
+        }
+
+    def tag_values(self) -> Dict[str, List[Dict]]:
+        """Indexed keys with the cost of each of their values"""
+        return {key: self._split(np.ones(len(self.resources), dtype=bool), key) for key in self.tag_keys}
+
+    def _split(self, resource_mask: np.ndarray, key: str) -> List[Dict]:
+        if key not in self.value_codes:
+            raise ValueError(f'Tag key {key} is not indexed (indexed: {", ".join(self.tag_keys)})')
+        values = self.values[key]
+        # Shift by one so untagged resources (-1) land in bucket 0
+        costs = np.bincount(self.value_codes[key][resource_mask] + 1,
+                            self.resource_cost[resource_mask], len(values) + 1)
+        groups = _named_costs(values, costs[1:])
+        if costs[0]:
+            groups.append({'name': '', 'cost': float(costs[0])})
+        return groups
+
+    def _top_resources(self, resource_mask: np.ndarray) -> List[Dict]:
+        candidates = np.flatnonzero(resource_mask)
+        top = candidates[np.argsort(self.resource_cost[candidates])[::-1][:TOP_RESOURCES]]
+        return [
+            {
+                'resource_id': self.resources[code],
+                'cost': float(self.resource_cost[code]),
+                'tags': {
+                    key: self.values[key][self.value_codes[key][code]]
+                    for key in self.tag_keys if self.value_codes[key][code] >= 0
+                }
+            }
+            for code in top
+        ]
+
+def _named_costs(names, costs: np.ndarray) -> List[Dict]:
+    order = np.argsort(costs)[::-1]
+    return [{'name': names[i], 'cost': float(costs[i])} for i in order if costs[i]]
+
+def parse_tag_filters(expressions: List[str]) -> Dict[str, List[str]]:
+    """['team:X', 'team:Y', 'env:prod'] -> {'team': ['X', 'Y'], 'env': ['prod']}"""
+    filters: Dict[str, List[str]] = {}
+    for expression in expressions:
+        key, separator, value = expression.partition(':')
+        if not separator or not key:
+            raise ValueError(f'Tag filter must look like key:value, got {expression!r}')
+        filters.setdefault(key, []).append(value)
+    return filters
+
+class TagCostIngestor:
+    """Pulls resource-day cost and the resources' tags to build a TagIndex.
+
+    Resource-level cost comes from resource_costs (Cost Explorer's daily
+    RESOURCE_ID grouping, or CUR line items with COST_SOURCE=cur); tags come
+    from the Resource Groups Tagging API in a single paginated scan.
+    """
+
+    def __init__(self, tag_keys: List[str], region: Optional[str] = None):
+        self.tag_keys = tag_keys
+        self.tagging = get_aws_client('resourcegroupstaggingapi', region)
+
+    def build(self) -> TagIndex:
+        rows = load_resource_costs()
+        tags = self.fetch_tags()
+        index = TagIndex(rows, tags, self.tag_keys)
+        logger.info(f'Built tag index over {len(rows)} cost rows and {len(index.resources)} resources')
+        return index
+
+    def fetch_tags(self) -> pd.DataFrame:
+        records = [
+            (cost_resource_id(resource['ResourceARN']), tag['Key'], tag['Value'])
+            # No TagFilters: they AND their keys, which would drop partially tagged resources
+            for resource in paginate(self.tagging, 'get_resources', 'ResourceTagMappingList')
+            for tag in resource.get('Tags', [])
+            if tag['Key'] in self.tag_keys
+        ]
+        return pd.DataFrame.from_records(records, columns=TAG_COLUMNS)
+
+_memo = None
+_memo_lock = threading.Lock()
+
+def get_tag_index() -> TagIndex:
+    """Process-wide tag index, rebuilt once TAG_INDEX_TTL seconds have passed"""
+    global _memo
+    with _memo_lock:
+        if _memo is None:
+            _memo = ArtifactMemo(ttl=float(os.environ.get('TAG_INDEX_TTL', 3600)))
+    return _memo.get_or_compute('tag_index', lambda: TagCostIngestor(tag_allocation_keys()).build())
+
+def tag_allocation_keys() -> List[str]:
+    keys = os.environ.get('TAG_ALLOCATION_KEYS')
+    return [key.strip() for key in keys.split(',') if key.strip()] if keys else DEFAULT_TAG_KEYS
@@ -0,0 +1,20 @@
+import os
+import sys
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.dirname(BACKEND_DIR), BACKEND_DIR]
+
+@pytest.fixture
+def daily_matrix():
+    """Build a days x services cost matrix: daily_matrix(start, days, {service: values or constant})"""
+    def build(start: date, days: int, services: dict) -> pd.DataFrame:
+        index = pd.date_range(start, periods=days, freq='D')
+        return pd.DataFrame(
+            {name: np.broadcast_to(np.asarray(values, dtype='float64'), days) for name, values in services.items()},
+            index=index
+        )
+    return build
@@ -0,0 +1,78 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+from backend import anomaly_engine
+
+START = date(2026, 1, 1)
+DAYS = 90
+
+def noisy(seed, level=100.0, spread=2.0):
+    return level + np.random.default_rng(seed).normal(0, spread, DAYS)
+
+def test_injected_spike_is_flagged(daily_matrix):
+    ec2 = noisy(1)
+    ec2[75] += 80
+    matrix = daily_matrix(START, DAYS, {'EC2': ec2, 'S3': noisy(2)})
+
+    anomalies = anomaly_engine.detect_anomalies(matrix)
+
+    assert list(anomalies['service']) == ['EC2']
+    assert anomalies['date'][0] == matrix.index[75]
+    assert anomalies['impact'][0] > 70
+    assert anomalies['expected_cost'][0] < 110
+
+def test_weekly_pattern_is_not_flagged(daily_matrix):
+    # Weekend spend triples every week; the seasonal z-score keeps it quiet
+    weekly = np.where(pd.date_range(START, periods=DAYS).dayofweek >= 5, 300.0, 100.0)
+    matrix = daily_matrix(START, DAYS, {'Batch': weekly + np.random.default_rng(3).normal(0, 2, DAYS)})
+
+    assert anomaly_engine.detect_anomalies(matrix).empty
+
+def test_flat_series_has_no_anomalies(daily_matrix):
+    assert anomaly_engine.detect_anomalies(daily_matrix(START, DAYS, {'EC2': 50.0})).empty
+
+def test_since_drops_earlier_spikes(daily_matrix):
+    ec2 = noisy(4)
+    ec2[60] += 80
+    matrix = daily_matrix(START, DAYS, {'EC2': ec2})
+
+    assert len(anomaly_engine.detect_anomalies(matrix)) == 1
+    assert anomaly_engine.detect_anomalies(matrix, since=matrix.index[61].date()).empty
+
+def test_min_impact_ignores_small_spikes(daily_matrix):
+    # Unusual for a near-constant series, but only worth a few cents
+    tiny = np.full(DAYS, 0.10) + np.random.default_rng(5).normal(0, 0.001, DAYS)
+    tiny[75] = 0.50
+    matrix = daily_matrix(START, DAYS, {'Lambda': tiny})
+
+    assert anomaly_engine.detect_anomalies(matrix).empty
+    assert len(anomaly_engine.detect_anomalies(matrix, min_impact=0.1)) == 1
+
+def test_short_history_is_not_scored(daily_matrix):
+    values = np.full(5, 10.0)
+    values[-1] = 1000.0
+    matrix = daily_matrix(START, 5, {'EC2': values})
+
+    assert anomaly_engine.detect_anomalies(matrix).empty
+
+def test_cost_matrix_zero_fills_missing_days_and_services():
+    costs = pd.DataFrame({
+        'date': pd.to_datetime(['2026-01-01', '2026-01-03', '2026-01-03']),
+        'service': ['EC2', 'EC2', 'S3'],
+        'cost': [1.0, 2.0, 3.0]
+    })
+
+    matrix = anomaly_engine.cost_matrix(costs, date(2026, 1, 1), date(2026, 1, 5))
+
+    assert list(matrix.index.strftime('%Y-%m-%d')) == ['2026-01-01', '2026-01-02', '2026-01-03', '2026-01-04']
+    assert matrix['EC2'].tolist() == [1.0, 0.0, 2.0, 0.0]
+    assert matrix['S3'].tolist() == [0.0, 0.0, 3.0, 0.0]
+
+def test_empty_costs_give_empty_anomalies():
+    costs = pd.DataFrame(columns=['date', 'service', 'cost'])
+    matrix = anomaly_engine.cost_matrix(costs, date(2026, 1, 1), date(2026, 3, 1))
+
+    anomalies = anomaly_engine.detect_anomalies(matrix)
+
+    assert anomalies.empty
+    assert list(anomalies.columns) == anomaly_engine.ANOMALY_COLUMNS
@@ -0,0 +1,47 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+from backend.cost_forecast import ForecastModel
+
+def test_linear_trend_is_extrapolated(daily_matrix):
+    matrix = daily_matrix(date(2026, 1, 1), 90, {'EC2': 100.0 + np.arange(90), 'S3': 20.0})
+
+    forecast = ForecastModel.fit(matrix).predict(date(2026, 4, 1), date(2026, 4, 11))
+
+    assert list(forecast.columns) == ['EC2', 'S3']
+    assert len(forecast) == 10
+    assert forecast['EC2'].to_numpy() == pytest.approx(100.0 + np.arange(90, 100))
+    assert forecast['S3'].to_numpy() == pytest.approx(np.full(10, 20.0))
+
+def test_weekday_pattern_is_kept(daily_matrix):
+    days = pd.date_range(date(2026, 1, 5), periods=84)
+    weekly = np.where(days.dayofweek >= 5, 10.0, 50.0)
+    matrix = daily_matrix(date(2026, 1, 5), 84, {'Batch': weekly})
+
+    forecast = ForecastModel.fit(matrix).predict(date(2026, 3, 30), date(2026, 4, 6))
+
+    assert forecast['Batch'].to_numpy() == pytest.approx([50.0] * 5 + [10.0] * 2)
+
+def test_declining_service_is_never_negative(daily_matrix):
+    matrix = daily_matrix(date(2026, 1, 1), 60, {'Legacy': 60.0 - np.arange(60)})
+
+    forecast = ForecastModel.fit(matrix).predict(date(2026, 3, 15), date(2026, 4, 1))
+
+    assert (forecast['Legacy'] >= 0).all()
+    assert forecast['Legacy'].iloc[-1] == 0.0
+
+def test_fit_uses_only_the_trailing_window(daily_matrix):
+    # A step change long before the window does not leak into the fit
+    values = np.concatenate([np.full(100, 500.0), np.full(90, 10.0)])
+    matrix = daily_matrix(date(2025, 10, 1), 190, {'EC2': values})
+
+    model = ForecastModel.fit(matrix, fit_days=90)
+
+    assert model.origin == matrix.index[100]
+    assert model.predict(date(2026, 4, 9), date(2026, 4, 10))['EC2'].iloc[0] == pytest.approx(10.0)
+
+def test_empty_range_predicts_nothing(daily_matrix):
+    model = ForecastModel.fit(daily_matrix(date(2026, 1, 1), 30, {'EC2': 1.0}))
+
+    assert model.predict(date(2026, 2, 1), date(2026, 2, 1)).empty
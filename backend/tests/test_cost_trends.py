@@ -0,0 +1,84 @@
+from datetime import date
+import pandas as pd
+import pytest
+from backend import anomaly_engine
+from backend.cost_trends import cost_trends
+
+def service(trends, name):
+    return next(s for s in trends['services'] if s['name'] == name)
+
+def test_empty_store_gives_zero_totals_and_no_percent():
+    matrix = anomaly_engine.cost_matrix(pd.DataFrame(columns=['date', 'service', 'cost']),
+                                        date(2026, 2, 1), date(2026, 3, 15))
+
+    trends = cost_trends(matrix, 'month')
+
+    assert trends['total_cost'] == 0.0
+    assert trends['services'] == []
+    for delta in (trends['day_over_day'], trends['month_over_month']):
+        assert delta == {'current': 0.0, 'previous': 0.0, 'change': 0.0, 'percent': None}
+
+def test_zero_baseline_gives_no_percent(daily_matrix):
+    # New service: nothing yesterday or last month
+    new = [0.0] * 44 + [5.0]
+    matrix = daily_matrix(date(2026, 2, 1), 45, {'EC2': 10.0, 'Bedrock': new})
+
+    trends = cost_trends(matrix, 'week')
+
+    assert service(trends, 'Bedrock')['day_over_day'] == {'current': 5.0, 'previous': 0.0, 'change': 5.0, 'percent': None}
+    assert service(trends, 'Bedrock')['month_over_month']['percent'] is None
+    assert service(trends, 'EC2')['day_over_day']['percent'] == 0.0
+
+def test_month_over_month_compares_the_same_days_of_the_previous_month(daily_matrix):
+    # February costs 1/day, March 2/day; matrix ends on March 3
+    values = [1.0] * 28 + [2.0] * 3
+    matrix = daily_matrix(date(2026, 2, 1), 31, {'EC2': values})
+
+    month_over_month = cost_trends(matrix, 'month')['month_over_month']
+
+    assert month_over_month == {'current': 6.0, 'previous': 3.0, 'change': 3.0, 'percent': 100.0}
+
+def test_month_over_month_caps_at_a_shorter_previous_month(daily_matrix):
+    # March 31 month to date against all of February (28 days), not into March
+    values = [1.0] * 28 + [2.0] * 31
+    matrix = daily_matrix(date(2026, 2, 1), 59, {'EC2': values})
+
+    month_over_month = cost_trends(matrix, 'month')['month_over_month']
+
+    assert month_over_month['current'] == 62.0
+    assert month_over_month['previous'] == 28.0
+
+def test_month_over_month_across_the_year_boundary(daily_matrix):
+    # January 10 against December 1-10 of the previous year
+    values = [3.0] * 31 + [1.5] * 10
+    matrix = daily_matrix(date(2025, 12, 1), 41, {'EC2': values})
+
+    month_over_month = cost_trends(matrix, 'month')['month_over_month']
+
+    assert month_over_month['current'] == 15.0
+    assert month_over_month['previous'] == 30.0
+    assert month_over_month['percent'] == -50.0
+
+def test_day_over_day_on_the_first_of_the_month(daily_matrix):
+    matrix = daily_matrix(date(2026, 2, 1), 29, {'EC2': [4.0] * 28 + [6.0]})
+
+    trends = cost_trends(matrix, 'week')
+
+    assert trends['day_over_day']['previous'] == 4.0
+    assert trends['day_over_day']['percent'] == 50.0
+    assert trends['end_date'] == '2026-03-02'
+
+def test_quarter_is_resampled_into_monday_weeks(daily_matrix):
+    matrix = daily_matrix(date(2026, 1, 1), 120, {'EC2': 1.0, 'S3': 2.0})
+
+    trends = cost_trends(matrix, 'quarter')
+
+    assert trends['granularity'] == 'WEEKLY'
+    assert all(pd.Timestamp(p['start']).dayofweek == 0 for p in trends['periods'])
+    assert sum(p['cost'] for p in trends['periods']) == pytest.approx(91 * 3.0)
+    assert [s['name'] for s in trends['services']] == ['S3', 'EC2']
+    assert len(service(trends, 'EC2')['series']) == len(trends['periods'])
+
+def test_unsupported_time_range(daily_matrix):
+    with pytest.raises(ValueError):
+        cost_trends(daily_matrix(date(2026, 1, 1), 10, {'EC2': 1.0}), 'decade')
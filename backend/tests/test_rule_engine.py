@@ -0,0 +1,149 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from backend.rule_engine import RESOURCES_PER_RULE, Rule, RuleEngine
+
+def instances():
+    return pd.DataFrame({
+        'resource_id': ['i-1', 'i-2', 'i-3', 'i-4'],
+        'state': ['running', 'running', 'stopped', 'running'],
+        'cpu_p95': [5.0, 80.0, 1.0, np.nan],
+        'monthly_cost': [100.0, 200.0, 50.0, 300.0]
+    })
+
+def idle_rule(**overrides):
+    spec = {
+        'id': 'idle',
+        'table': 'ec2',
+        'when': ["state == 'running'", 'cpu_p95 < 10'],
+        'title': 'Stop idle instances',
+        'service': 'EC2',
+        'savings': 'monthly_cost',
+        'columns': ['cpu_p95'],
+        'description': '{resource_count} idle, ${estimated_monthly_savings:.2f}/month'
+    }
+    spec.update(overrides)
+    return spec
+
+def test_matching_rows_become_one_recommendation():
+    engine = RuleEngine()
+    engine.register(idle_rule())
+
+    recommendations, errors = engine.evaluate(tables={'ec2': instances()})
+
+    assert errors == {}
+    [recommendation] = recommendations
+    assert recommendation['rule_id'] == 'idle'
+    assert recommendation['resource_count'] == 1
+    assert recommendation['estimated_monthly_savings'] == 100.0
+    assert recommendation['description'] == '1 idle, $100.00/month'
+    assert recommendation['resources'] == [
+        {'resource_id': 'i-1', 'cpu_p95': 5.0, 'estimated_monthly_savings': 100.0}
+    ]
+
+def test_missing_values_never_match():
+    def low_cpu(frame):
+        # Unknown where there is no metric, like a nullable comparison
+        return (frame['cpu_p95'] < 10).astype(object).where(frame['cpu_p95'].notna(), None)
+
+    engine = RuleEngine()
+    engine.register(idle_rule(when=[low_cpu]))
+    engine.register(idle_rule(id='busy', when=['cpu_p95 >= 10']))
+
+    recommendations, errors = engine.evaluate(tables={'ec2': instances()})
+
+    assert errors == {}
+    matched = {r['rule_id']: {res['resource_id'] for res in r['resources']} for r in recommendations}
+    assert matched == {'idle': {'i-1', 'i-3'}, 'busy': {'i-2'}}
+
+def test_conditions_that_fail_to_evaluate_are_reported():
+    engine = RuleEngine()
+    engine.register(idle_rule(id='typo', when=['cpu_p59 < 10']))
+    engine.register(idle_rule(id='broken', when=[lambda frame: 1 / 0]))
+    engine.register(idle_rule())
+
+    recommendations, errors = engine.evaluate(tables={'ec2': instances()})
+
+    assert [r['rule_id'] for r in recommendations] == ['idle']
+    assert set(errors) == {'typo', 'broken'}
+    assert 'cpu_p59' in errors['typo']
+
+def test_tables_that_fail_to_build_are_reported():
+    engine = RuleEngine()
+    engine.register_table('ec2', lambda: (_ for _ in ()).throw(RuntimeError('throttled')))
+    engine.register(idle_rule())
+    engine.register(idle_rule(id='unknown', table='nope'))
+
+    recommendations, errors = engine.evaluate()
+
+    assert recommendations == []
+    assert errors['ec2'] == 'throttled'
+    assert 'nope' in errors['nope']
+
+def test_shared_conditions_and_tables_are_computed_once():
+    engine = RuleEngine()
+    calls = {'table': 0, 'condition': 0}
+
+    def table():
+        calls['table'] += 1
+        return instances()
+
+    def running(frame):
+        calls['condition'] += 1
+        return frame['state'] == 'running'
+
+    engine.register_table('ec2', table)
+    engine.register(idle_rule(when=[running, 'cpu_p95 < 10']))
+    engine.register(idle_rule(id='expensive', when=[running, 'monthly_cost > 150']))
+    engine.evaluate()
+    engine.evaluate()
+
+    assert calls == {'table': 1, 'condition': 2}
+
+def test_recommendations_are_ordered_by_savings():
+    engine = RuleEngine()
+    engine.register(idle_rule())
+    engine.register(idle_rule(id='expensive', when=['monthly_cost > 150']))
+    engine.register(idle_rule(id='no-savings', when=['monthly_cost > 0'], savings=None))
+
+    recommendations, _ = engine.evaluate(tables={'ec2': instances()})
+
+    assert [r['rule_id'] for r in recommendations] == ['expensive', 'idle', 'no-savings']
+    assert [r['resource_id'] for r in recommendations[0]['resources']] == ['i-4', 'i-2']
+    assert recommendations[2]['savings_potential'] is None
+
+def test_resources_are_capped_per_rule():
+    many = pd.DataFrame({'resource_id': [f'i-{i}' for i in range(RESOURCES_PER_RULE * 2)], 'cost': 1.0})
+    engine = RuleEngine()
+    engine.register(Rule('all', 'ec2', 'cost > 0', title='All', service='EC2', savings='cost'))
+
+    [recommendation], _ = engine.evaluate(tables={'ec2': many})
+
+    assert recommendation['resource_count'] == RESOURCES_PER_RULE * 2
+    assert len(recommendation['resources']) == RESOURCES_PER_RULE
+    assert recommendation['estimated_monthly_savings'] == RESOURCES_PER_RULE * 2
+
+def test_rules_load_from_json_and_describe_themselves(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps([idle_rule(), idle_rule(id='other')]))
+    engine = RuleEngine()
+
+    assert engine.load_rules(str(path)) == 2
+    assert engine.rules['idle'].to_dict()['when'] == ["state == 'running'", 'cpu_p95 < 10']
+
+def test_decorated_rules_register_their_function():
+    engine = RuleEngine()
+
+    @engine.rule('stopped', 'ec2', title='Stopped', service='EC2')
+    def stopped(frame):
+        return frame['state'] == 'stopped'
+
+    [recommendation], _ = engine.evaluate(tables={'ec2': instances()})
+
+    assert recommendation['resources'] == [{'resource_id': 'i-3'}]
+    assert engine.rules['stopped'].to_dict()['when'] == ['stopped']
+
+def test_unknown_rule_id_raises():
+    with pytest.raises(KeyError):
+        RuleEngine().evaluate(rule_ids=['missing'])
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+from backend.tag_allocation import TagIndex, parse_tag_filters
+
+def cost_rows():
+    return pd.DataFrame({
+        'resource_id': ['i-a', 'i-a', 'i-b', 'i-c', 'i-d'],
+        'date': pd.to_datetime(['2026-01-01', '2026-01-02', '2026-01-01', '2026-01-02', '2026-01-02']),
+        'service': ['EC2', 'EC2', 'EC2', 'RDS', 'S3'],
+        'cost': [10.0, 10.0, 5.0, 30.0, 1.0]
+    })
+
+def tags():
+    return pd.DataFrame({
+        'resource_id': ['i-a', 'i-a', 'i-b', 'i-b', 'i-c', 'i-c', 'i-x'],
+        'key': ['team', 'env', 'team', 'env', 'team', 'owner', 'team'],
+        'value': ['web', 'prod', 'data', 'dev', 'web', 'alice', 'ghost']
+    })
+
+@pytest.fixture
+def index():
+    return TagIndex(cost_rows(), tags(), ['team', 'env'])
+
+def test_filters_and_keys_and_or_values(index):
+    assert index.query({'team': ['web']})['total_cost'] == 50.0
+    assert index.query({'team': ['web', 'data']})['total_cost'] == 55.0
+    assert index.query({'team': ['web'], 'env': ['prod']})['total_cost'] == 20.0
+    assert index.query({'team': ['nobody']})['total_cost'] == 0.0
+
+def test_empty_value_matches_resources_without_the_key(index):
+    result = index.query({'env': ['']})
+
+    assert result['total_cost'] == 31.0
+    assert {r['resource_id'] for r in result['top_resources']} == {'i-c', 'i-d'}
+
+def test_query_breaks_down_by_day_service_and_group(index):
+    result = index.query({'team': ['web']}, group_by='env')
+
+    assert result['resource_count'] == 2
+    assert result['daily_costs'] == [{'date': '2026-01-01', 'cost': 10.0}, {'date': '2026-01-02', 'cost': 40.0}]
+    assert result['services'] == [{'name': 'RDS', 'cost': 30.0}, {'name': 'EC2', 'cost': 20.0}]
+    assert result['groups'] == [{'name': 'prod', 'cost': 20.0}, {'name': '', 'cost': 30.0}]
+    assert result['top_resources'][0] == {'resource_id': 'i-c', 'cost': 30.0, 'tags': {'team': 'web'}}
+
+def test_untagged_spend(index):
+    untagged = index.untagged()
+
+    assert untagged['total_cost'] == 56.0
+    assert untagged['untagged_cost'] == 1.0
+    assert untagged['untagged_resource_count'] == 1
+    assert untagged['missing_by_key'] == {'team': 1.0, 'env': 31.0}
+
+def test_tags_of_resources_without_cost_and_unindexed_keys_are_ignored(index):
+    assert [v['name'] for v in index.tag_values()['team']] == ['web', 'data', '']
+    with pytest.raises(ValueError):
+        index.query({'owner': ['alice']})
+    with pytest.raises(ValueError):
+        index.query(group_by='owner')
+
+def test_no_cost_rows_gives_zero_untagged_percent():
+    empty = TagIndex(cost_rows().iloc[:0], tags(), ['team'])
+
+    assert empty.query()['total_cost'] == 0.0
+    assert empty.untagged()['untagged_percent'] == 0.0
+
+def test_parse_tag_filters():
+    assert parse_tag_filters(['team:web', 'team:data', 'env:', 'path:a:b']) == {
+        'team': ['web', 'data'], 'env': [''], 'path': ['a:b']
+    }
+    with pytest.raises(ValueError):
+        parse_tag_filters(['team'])
+    with pytest.raises(ValueError):
+        parse_tag_filters([':web'])
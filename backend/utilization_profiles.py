@@ -0,0 +1,131 @@
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from .metric_store import MetricView, nan_percentile
+
+PERCENTILES = (50, 95, 99)
+
+HOURS_PER_WEEK = 168
+# The Unix epoch fell on a Thursday; shifting by three days makes hour 0 Monday 00:00 UTC
+EPOCH_HOUR_OF_WEEK = 72
+
+# Every hour (p99) stays under this: the resource is idle
+IDLE_P99 = 5.0
+# p95 and p99 both fit in half the capacity: one size down still leaves headroom
+DOWNSIZE_P95 = 40.0
+DOWNSIZE_P99 = 50.0
+# Busy at recurring hours covering at most this share of the day: a scheduled or
+# batch workload, not an oversized one (see active_share below)
+SCHEDULED_ACTIVE_SHARE = 0.5
+ACTIVE_RATIO = 0.5
+RECURRING_SHARE = 0.5
+# Peak at least this many times the mean: bursty
+BURSTY_PEAK_TO_MEAN = 4.0
+
+class UtilizationProfiles:
+    """Utilization profile of every resource in a resources x hours matrix.
+
+    From one pass over the fleet's matrix (NaN where there is no datapoint)
+    it derives per resource: p50/p95/p99, mean, peak and peak-to-mean
+    ratio, a 7 x 24 hour-of-week heatmap of mean utilization (UTC, Monday
+    first) and a usage pattern:
+
+    - ``idle``: p99 below IDLE_P99
+    - ``underutilized``: p95 and p99 leave room to go one size down
+    - ``scheduled``: busy only in part of the day (batch, business hours)
+    - ``bursty``: low baseline with peaks far above the mean
+    - ``steady``: everything else, ``no_data`` without datapoints
+
+    Rightsizing is driven from the pattern rather than a single average,
+    so batch and bursty workloads are not flagged for downsizing.
+    """
+
+    def __init__(self, resource_ids: Sequence[str], values: np.ndarray, timestamps: np.ndarray,
+                 peaks: Optional[np.ndarray] = None):
+        self.resource_ids = list(resource_ids)
+        self._rows = {resource_id: row for row, resource_id in enumerate(self.resource_ids)}
+        values = np.asarray(values, dtype=np.float32)
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0)
+
+        self.datapoints = present.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.mean = filled.sum(axis=1, dtype=np.float64) / self.datapoints
+        self.percentiles = nan_percentile(values, list(PERCENTILES))
+        if peaks is None:
+            peaks = np.where(present, values, -np.inf).max(axis=1, initial=-np.inf)
+        self.peak = np.where(self.datapoints > 0, peaks, np.nan).astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.peak_to_mean = np.where(self.mean > 0, self.peak / self.mean, np.nan)
+
+        hour_of_week = (np.asarray(timestamps, dtype=np.int64) // 3600 + EPOCH_HOUR_OF_WEEK) % HOURS_PER_WEEK
+        self.heatmap = _bucket_means(filled, present, hour_of_week, HOURS_PER_WEEK)
+        # Share of the day's hours that are busy (above ACTIVE_RATIO of the busiest hour)
+        # on at least RECURRING_SHARE of the days; random bursts do not recur at the same hour
+        highest = np.where(present, values, -np.inf).max(axis=1, initial=-np.inf)
+        with np.errstate(invalid='ignore'):
+            busy = (filled > ACTIVE_RATIO * highest[:, None]).astype(np.float32)
+        busy_days = _bucket_means(busy, present, hour_of_week % 24, 24)
+        observed_hours = (~np.isnan(busy_days)).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.active_share = np.where(
+                observed_hours > 0, (busy_days >= RECURRING_SHARE).sum(axis=1) / observed_hours, np.nan
+            )
+
+        p95, p99 = self.percentile(95), self.percentile(99)
+        self.patterns = np.select(
+            [
+                self.datapoints == 0,
+                p99 < IDLE_P99,
+                (p95 < DOWNSIZE_P95) & (p99 < DOWNSIZE_P99),
+                (self.active_share > 0) & (self.active_share <= SCHEDULED_ACTIVE_SHARE),
+                self.peak_to_mean >= BURSTY_PEAK_TO_MEAN
+            ],
+            ['no_data', 'idle', 'underutilized', 'scheduled', 'bursty'],
+            'steady'
+        )
+
+    @classmethod
+    def from_view(cls, view: MetricView, statistic: str = 'Average') -> 'UtilizationProfiles':
+        """Profiles of a metric store view: hourly ``statistic`` values, peaks from Maximum when fetched"""
+        peaks = view.max('Maximum') if 'Maximum' in view.statistics else None
+        return cls(view.resource_ids, view.matrix(statistic), view.timestamps, peaks)
+
+    def __len__(self):
+        return len(self.resource_ids)
+
+    def percentile(self, q: int) -> np.ndarray:
+        return self.percentiles[:, PERCENTILES.index(q)]
+
+    def profile(self, resource_id: str) -> Optional[Dict]:
+        """Profile record for one resource (None without datapoints)"""
+        row = self._rows.get(resource_id)
+        if row is None or not self.datapoints[row]:
+            return None
+        return {
+            'pattern': str(self.patterns[row]),
+            'datapoints': int(self.datapoints[row]),
+            'mean': float(self.mean[row]),
+            **{f'p{q}': float(self.percentiles[row, i]) for i, q in enumerate(PERCENTILES)},
+            'peak': float(self.peak[row]),
+            'peak_to_mean': _optional(self.peak_to_mean[row]),
+            'active_share': _optional(self.active_share[row]),
+            'heatmap': _heatmap_record(self.heatmap[row])
+        }
+
+def _bucket_means(filled: np.ndarray, present: np.ndarray, buckets: np.ndarray, size: int) -> np.ndarray:
+    """Mean of each row per bucket (NaN for buckets without datapoints), as two matrix products"""
+    one_hot = np.zeros((len(buckets), size), dtype=np.float32)
+    one_hot[np.arange(len(buckets)), buckets] = 1
+    sums = filled @ one_hot
+    counts = present.astype(np.float32) @ one_hot
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+def _heatmap_record(heatmap: np.ndarray) -> List[List[Optional[float]]]:
+    return [
+        [None if np.isnan(value) else round(float(value), 2) for value in day]
+        for day in heatmap.reshape(7, 24)
+    ]
+
+def _optional(value) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
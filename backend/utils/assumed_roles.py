@@ -0,0 +1,57 @@
+import threading
+from typing import Dict, Optional
+from botocore.credentials import RefreshableCredentials
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class AssumedRoleCredentialPool:
+    """Caches sts:AssumeRole credentials for member accounts.
+
+    Credentials are cached per account and wrapped in botocore's
+    RefreshableCredentials, which re-assumes the role shortly before the
+    current credentials expire, so long-lived clients built on them keep
+    working across expiry.
+    """
+
+    def __init__(self, sts_client, role_name: str, external_id: Optional[str] = None,
+                 session_name: str = 'aws-cost-analyzer', duration_seconds: int = 3600):
+        self.role_name = role_name
+        self.external_id = external_id
+        self.session_name = session_name
+        self.duration_seconds = duration_seconds
+        self._sts = sts_client
+        self._credentials: Dict[str, RefreshableCredentials] = {}
+        self._lock = threading.Lock()
+
+    def _assume_role(self, account_id: str) -> Dict:
+        kwargs = {
+            'RoleArn': f'arn:aws:iam::{account_id}:role/{self.role_name}',
+            'RoleSessionName': self.session_name,
+            'DurationSeconds': self.duration_seconds
+        }
+        if self.external_id:
+            kwargs['ExternalId'] = self.external_id
+
+        logger.info(f'Assuming {self.role_name} in {account_id}')
+        credentials = self._sts.assume_role(**kwargs)['Credentials']
+        return {
+            'access_key': credentials['AccessKeyId'],
+            'secret_key': credentials['SecretAccessKey'],
+            'token': credentials['SessionToken'],
+            'expiry_time': credentials['Expiration'].isoformat()
+        }
+
+    def credentials(self, account_id: str) -> RefreshableCredentials:
+        with self._lock:
+            credentials = self._credentials.get(account_id)
+        if credentials:
+            return credentials
+
+        credentials = RefreshableCredentials.create_from_metadata(
+            metadata=self._assume_role(account_id),
+            refresh_using=lambda: self._assume_role(account_id),
+            method='sts-assume-role'
+        )
+        with self._lock:
+            return self._credentials.setdefault(account_id, credentials)
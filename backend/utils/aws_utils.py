@@ -1,28 +1,157 @@
-import boto3
+import os
+import threading
+import botocore.session
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from functools import wraps
-from typing import Any, Callable
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from .assumed_roles import AssumedRoleCredentialPool
+from .instrumentation import count_upstream_call
 from .logger import get_logger
 
 logger = get_logger(__name__)
 
-def get_aws_client(service_name: str, region: str = None) -> boto3.client:
-    """Get AWS client with proper configuration and retry handling"""
-    try:
-        return boto3.client(
-            service_name,
-            region_name=region,
-            config=boto3.Config(
-                retries=dict(
-                    max_attempts=5,
-                    mode='adaptive'
+# operation -> (request parameter, response field) carrying the continuation token
+PAGINATION_TOKENS = {
+    'get_cost_and_usage': ('NextPageToken', 'NextPageToken'),
+    'get_cost_and_usage_with_resources': ('NextPageToken', 'NextPageToken'),
+    'get_reservation_purchase_recommendation': ('NextPageToken', 'NextPageToken'),
+    'get_ec2_instance_recommendations': ('nextToken', 'nextToken'),
+    'describe_instances': ('NextToken', 'NextToken'),
+    'describe_db_instances': ('Marker', 'Marker'),
+    'describe_db_clusters': ('Marker', 'Marker'),
+    'list_tables': ('ExclusiveStartTableName', 'LastEvaluatedTableName'),
+    'list_accounts': ('NextToken', 'NextToken'),
+    'list_metrics': ('NextToken', 'NextToken'),
+    'get_resources': ('PaginationToken', 'PaginationToken'),
+}
+
+class ClientRegistry:
+    """Thread-safe, process-wide cache of boto3 clients.
+
+    One botocore session is kept per credential set (the default credentials
+    plus one per assumed member account) and clients are cached per
+    (service, region, account), so each client's connection pool and TLS
+    sessions are reused across requests instead of being rebuilt by every
+    analyzer. botocore clients are safe to share between threads; only their
+    creation is serialized.
+    """
+
+    def __init__(self, max_pool_connections: int = 50, max_attempts: int = 5,
+                 retry_mode: str = 'adaptive'):
+        self.config = Config(
+            max_pool_connections=max_pool_connections,
+            retries={'max_attempts': max_attempts, 'mode': retry_mode}
+        )
+        self.default_region = os.environ.get('AWS_REGION', 'us-east-1')
+        self._clients = {}
+        self._sessions = {}
+        self._caller_account_id = None
+        self._role_credentials = None
+        self._lock = threading.RLock()
+
+    def client(self, service_name: str, region: Optional[str] = None,
+               account_id: Optional[str] = None):
+        region = region or self.default_region
+        if account_id and account_id == self.caller_account_id():
+            account_id = None
+        key = (service_name, region, account_id)
+
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._session(account_id).create_client(
+                        service_name, region_name=region, config=self.config
+                    )
+                    client.meta.events.register('before-call', count_upstream_call)
+                    self._clients[key] = client
+        return client
+
+    def caller_account_id(self) -> str:
+        if self._caller_account_id is None:
+            self._caller_account_id = self.client('sts').get_caller_identity()['Account']
+        return self._caller_account_id
+
+    def _session(self, account_id: Optional[str]) -> botocore.session.Session:
+        session = self._sessions.get(account_id)
+        if session is None:
+            session = botocore.session.get_session()
+            if account_id:
+                session._credentials = self._role_credential_pool().credentials(account_id)
+            elif os.environ.get('AWS_ACCESS_KEY_ID'):
+                session.set_credentials(
+                    os.environ['AWS_ACCESS_KEY_ID'],
+                    os.environ.get('AWS_SECRET_ACCESS_KEY'),
+                    os.environ.get('AWS_SESSION_TOKEN')
                 )
+            self._sessions[account_id] = session
+        return session
+
+    def _role_credential_pool(self) -> AssumedRoleCredentialPool:
+        if self._role_credentials is None:
+            self._role_credentials = AssumedRoleCredentialPool(
+                self.client('sts'),
+                os.environ.get('ORG_ROLE_NAME', 'OrganizationAccountAccessRole'),
+                external_id=os.environ.get('ORG_EXTERNAL_ID') or None
             )
-        )
+        return self._role_credentials
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_client_registry() -> ClientRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry(
+                max_pool_connections=int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', 50)),
+                max_attempts=int(os.environ.get('AWS_MAX_ATTEMPTS', 5)),
+                retry_mode=os.environ.get('AWS_RETRY_MODE', 'adaptive')
+            )
+        return _registry
+
+def get_aws_client(service_name: str, region: str = None, account_id: str = None):
+    """Get a shared AWS client with pooled connections and adaptive retries.
+
+    account_id selects a member account reached through ORG_ROLE_NAME; the
+    caller's own account (or None) uses the default credentials.
+    """
+    try:
+        return get_client_registry().client(service_name, region, account_id)
     except Exception as e:
         logger.error(f'Error creating AWS client for {service_name}: {str(e)}')
         raise
 
+def iter_pages(client, operation: str, **kwargs) -> Iterator[Dict]:
+    """Call a paginated AWS operation, yielding each response page as it arrives"""
+    request_token, response_token = PAGINATION_TOKENS[operation]
+    method = getattr(client, operation)
+    while True:
+        page = method(**kwargs)
+        yield page
+
+        next_token = page.get(response_token)
+        if not next_token:
+            break
+        kwargs[request_token] = next_token
+
+def paginate(client, operation: str, result_key: str, **kwargs) -> Iterator[Any]:
+    """Lazily yield the items under result_key across every page of an operation"""
+    for page in iter_pages(client, operation, **kwargs):
+        yield from page.get(result_key, [])
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    """Group a (possibly lazy) iterable into lists of at most size items"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            break
+        yield chunk
+
 def handle_aws_error(func: Callable) -> Callable:
     """Decorator to handle AWS API errors"""
     @wraps(func)
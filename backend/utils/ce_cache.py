@@ -0,0 +1,219 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.aws-cost-analyzer', 'ce_cache.sqlite3')
+
+# Cost Explorer operations whose responses are cached
+CACHED_OPERATIONS = ('get_cost_and_usage',)
+
+class CostExplorerCache:
+    """Size-bounded LRU cache for Cost Explorer responses, stored in SQLite.
+
+    Entries live on local disk so every gunicorn worker on the host shares
+    them. Requests covering only settled days are kept for ``closed_ttl``
+    seconds since those figures no longer change. Cost Explorer keeps
+    restating the last ``settle_days`` days, and the previous month until its
+    bill is finalized on day ``bill_final_day``; requests touching either
+    expire after ``current_ttl`` seconds.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = 256 * 1024 * 1024,
+                 current_ttl: int = 900, closed_ttl: int = 30 * 24 * 3600,
+                 settle_days: int = 3, bill_final_day: int = 5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.current_ttl = current_ttl
+        self.closed_ttl = closed_ttl
+        self.settle_days = settle_days
+        self.bill_final_day = bill_final_day
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                ' key TEXT PRIMARY KEY,'
+                ' value BLOB NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' expires_at REAL NOT NULL,'
+                ' last_access REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps this safe across threads and processes
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT value, expires_at FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row and row[1] > now:
+                conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (now, key))
+            elif row:
+                conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                row = None
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def set(self, key: str, value: Dict, ttl: int):
+        blob = zlib.compress(json.dumps(value).encode('utf-8'))
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, value, size, expires_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, blob, len(blob), now + ttl, now)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        conn.execute('DELETE FROM entries WHERE expires_at <= ?', (time.time(),))
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY last_access'):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM entries WHERE key = ?', evicted)
+
+        with self._lock:
+            self.evictions += len(evicted)
+
+    def ttl_for(self, request: Dict) -> int:
+        """Settled periods are effectively immutable; anything still being restated is not"""
+        end = request.get('TimePeriod', {}).get('End')
+        today = datetime.utcnow().date()
+        settled = today - timedelta(days=self.settle_days)
+        if today.day < self.bill_final_day:
+            # The previous month's bill is not final yet, so its days are still open
+            settled = min(settled, (today.replace(day=1) - timedelta(days=1)).replace(day=1))
+        if end and end <= settled.strftime('%Y-%m-%d'):
+            return self.closed_ttl
+        return self.current_ttl
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM entries')
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            entries, size = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+            ).fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0,
+                'entries': entries,
+                'size_bytes': size,
+                'max_bytes': self.max_bytes
+            }
+
+def make_cache_key(operation: str, request: Dict, account_id: Optional[str] = None) -> str:
+    """Build a stable key from the normalized request parameters"""
+    key = {'operation': operation, 'request': _normalize(request)}
+    if account_id:
+        key['account_id'] = account_id
+    return json.dumps(key, sort_keys=True, separators=(',', ':'))
+
+def _normalize(value: Any, key: Optional[str] = None) -> Any:
+    if isinstance(value, dict):
+        return {k: _normalize(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        items = [_normalize(v) for v in value]
+        # GroupBy order shapes the response Keys, every other list is a set
+        if key != 'GroupBy':
+            items.sort(key=lambda v: json.dumps(v, sort_keys=True))
+        return items
+    return value
+
+class CachedCostExplorerClient:
+    """Drop-in wrapper for a boto3 ``ce`` client that caches read calls.
+
+    ``account_id`` namespaces the cache keys, so clients holding credentials
+    for different accounts never share cached results.
+    """
+
+    def __init__(self, client, cache: Optional[CostExplorerCache] = None,
+                 account_id: Optional[str] = None):
+        self._client = client
+        self._cache = cache or get_ce_cache()
+        self._account_id = account_id
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if name in CACHED_OPERATIONS:
+            return lambda **kwargs: self._cached_call(name, attr, kwargs)
+        return attr
+
+    def _cached_call(self, operation: str, method, kwargs: Dict) -> Dict:
+        key = make_cache_key(operation, kwargs, self._account_id)
+        try:
+            cached = self._cache.get(key)
+        except sqlite3.Error as e:
+            logger.warning(f'Cost Explorer cache read failed: {str(e)}')
+            cached = None
+        if cached is not None:
+            return cached
+
+        response = method(**kwargs)
+        response.pop('ResponseMetadata', None)
+        try:
+            self._cache.set(key, response, self._cache.ttl_for(kwargs))
+        except sqlite3.Error as e:
+            logger.warning(f'Cost Explorer cache write failed: {str(e)}')
+        return response
+
+_ce_cache = None
+_ce_cache_lock = threading.Lock()
+
+def get_ce_cache() -> CostExplorerCache:
+    """Process-wide cache instance configured from the environment"""
+    global _ce_cache
+    with _ce_cache_lock:
+        if _ce_cache is None:
+            _ce_cache = CostExplorerCache(
+                path=os.environ.get('CE_CACHE_PATH') or DEFAULT_CACHE_PATH,
+                max_bytes=int(os.environ.get('CE_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+                current_ttl=int(os.environ.get('CE_CACHE_CURRENT_TTL', 900)),
+                closed_ttl=int(os.environ.get('CE_CACHE_CLOSED_TTL', 30 * 24 * 3600)),
+                settle_days=int(os.environ.get('CE_CACHE_SETTLE_DAYS', 3)),
+                bill_final_day=int(os.environ.get('CE_CACHE_BILL_FINAL_DAY', 5))
+            )
+        return _ce_cache
@@ -0,0 +1,78 @@
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+# GetMetricData accepts at most 500 MetricDataQuery entries per call
+MAX_QUERIES_PER_REQUEST = 500
+
+# (key, namespace, metric_name, dimensions)
+MetricRequest = Tuple[Hashable, str, str, List[Dict]]
+
+# statistic -> (timestamps, values), both ascending by timestamp
+MetricSeries = Dict[str, Tuple[List[datetime], List[float]]]
+
+def get_metric_series(cloudwatch, requests: Iterable[MetricRequest],
+                      start_time: datetime, end_time: datetime,
+                      period: int = 3600,
+                      statistics: Sequence[str] = ('Average', 'Maximum')) -> Dict[Hashable, MetricSeries]:
+    """Fetch many CloudWatch metrics with batched GetMetricData calls.
+
+    Every (request, statistic) pair becomes one metric query and queries are
+    packed up to MAX_QUERIES_PER_REQUEST per call. The result maps each request
+    key to its per-statistic columns; keys without data map to an empty dict.
+    """
+    queries = []
+    series = {}
+    for key, namespace, metric_name, dimensions in requests:
+        series[key] = {}
+        for statistic in statistics:
+            queries.append((key, statistic, {
+                'Id': f'q{len(queries)}',
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': namespace,
+                        'MetricName': metric_name,
+                        'Dimensions': dimensions
+                    },
+                    'Period': period,
+                    'Stat': statistic
+                },
+                'ReturnData': True
+            }))
+
+    for offset in range(0, len(queries), MAX_QUERIES_PER_REQUEST):
+        batch = queries[offset:offset + MAX_QUERIES_PER_REQUEST]
+        by_id = {query['Id']: (key, statistic) for key, statistic, query in batch}
+
+        for result in _get_metric_data(cloudwatch, [query for _, _, query in batch],
+                                       start_time, end_time):
+            if not result['Timestamps']:
+                continue
+            key, statistic = by_id[result['Id']]
+            timestamps, values = series[key].setdefault(statistic, ([], []))
+            timestamps.extend(result['Timestamps'])
+            values.extend(result['Values'])
+
+    return series
+
+def _get_metric_data(cloudwatch, queries: List[Dict], start_time: datetime,
+                     end_time: datetime) -> Iterable[Dict]:
+    """Yield MetricDataResults for one batch, following NextToken"""
+    kwargs = {
+        'MetricDataQueries': queries,
+        'StartTime': start_time,
+        'EndTime': end_time,
+        'ScanBy': 'TimestampAscending'
+    }
+    while True:
+        response = cloudwatch.get_metric_data(**kwargs)
+        for message in response.get('Messages', []):
+            logger.warning(f"GetMetricData: {message.get('Code')} - {message.get('Value')}")
+        yield from response['MetricDataResults']
+
+        next_token = response.get('NextToken')
+        if not next_token:
+            break
+        kwargs['NextToken'] = next_token
@@ -0,0 +1,92 @@
+import contextvars
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CALL_TIMEOUT = 30
+
+QUEUED_POLL_INTERVAL = 0.1
+
+def run_parallel(calls: Dict[str, Callable[[], Any]], timeout: Optional[float] = None,
+                 timeouts: Optional[Dict[str, float]] = None,
+                 max_workers: Optional[int] = None,
+                 on_complete: Optional[Callable[[str], None]] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Run independent (blocking boto3) calls on threads and collect whatever finishes in time.
+
+    Returns ``(results, errors)`` keyed like ``calls``: a call that raises or
+    runs longer than its timeout (``timeouts[name]``, else ``timeout``, else
+    PARALLEL_CALL_TIMEOUT) lands in ``errors`` while the others still return,
+    so endpoint latency is bounded by the slowest call rather than the sum.
+    Timeouts count from when a call starts, so calls queued behind a bounded
+    ``max_workers`` pool are not penalized for waiting. Each call runs in a
+    copy of the caller's context, so the Flask request context (and
+    ``flask.g``) stays available inside it. A fresh pool per invocation keeps
+    nested use deadlock free; timed-out calls are abandoned rather than waited for.
+    ``on_complete(name)`` is invoked on the calling thread as each call
+    succeeds, fails or times out (progress reporting).
+    """
+    if not calls:
+        return {}, {}
+    default_timeout = timeout or float(os.environ.get('PARALLEL_CALL_TIMEOUT', DEFAULT_CALL_TIMEOUT))
+    timeouts = timeouts or {}
+    limits = {name: timeouts.get(name, default_timeout) for name in calls}
+    workers = min(max_workers or len(calls), len(calls))
+
+    started = {}
+
+    def run(name, call):
+        started[name] = time.monotonic()
+        return call()
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='parallel')
+    futures = {
+        pool.submit(contextvars.copy_context().run, run, name, call): name
+        for name, call in calls.items()
+    }
+    # Backstop for calls that never get a worker because abandoned ones still hold them all
+    deadline = time.monotonic() + max(limits.values()) * math.ceil(len(calls) / workers)
+
+    results = {}
+    errors = {}
+    pending = set(futures)
+    try:
+        while pending:
+            now = time.monotonic()
+            for future in list(pending):
+                name = futures[future]
+                if future.done():
+                    continue
+                if (name in started and now - started[name] >= limits[name]) or now >= deadline:
+                    logger.error(f'{name} timed out after {limits[name]}s')
+                    errors[name] = 'timed out'
+                    pending.discard(future)
+                    if on_complete:
+                        on_complete(name)
+            if not pending:
+                break
+
+            next_expiry = min(
+                [started[futures[f]] + limits[futures[f]] for f in pending if futures[f] in started] + [deadline]
+            )
+            if any(futures[f] not in started for f in pending):
+                # Queued calls start without notice; re-check soon so their timeouts begin on time
+                next_expiry = min(next_expiry, now + QUEUED_POLL_INTERVAL)
+            done, _ = wait(pending, timeout=max(next_expiry - now, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                pending.discard(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logger.error(f'{name} failed: {str(e)}')
+                    errors[name] = str(e)
+                if on_complete:
+                    on_complete(name)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results, errors
@@ -0,0 +1,52 @@
+import threading
+from collections import Counter
+from typing import Dict
+from flask import g, has_request_context, request
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+UPSTREAM_CALLS_HEADER = 'X-Upstream-Calls'
+
+class UpstreamCallCounter:
+    """Thread-safe tally of the AWS API calls made while serving one request"""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, operation: str):
+        with self._lock:
+            self._counts[operation] += 1
+
+    @property
+    def total(self) -> int:
+        with self._lock:
+            return sum(self._counts.values())
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+def count_upstream_call(event_name: str, **kwargs):
+    """botocore before-call handler; event_name is before-call.<service>.<Operation>"""
+    if has_request_context():
+        counter = g.get('upstream_calls')
+        if counter is not None:
+            counter.record(event_name.split('.', 1)[1])
+
+def init_upstream_call_metrics(app):
+    """Report the upstream AWS calls behind every response (header + log line)"""
+
+    @app.before_request
+    def start_upstream_call_counter():
+        g.upstream_calls = UpstreamCallCounter()
+
+    @app.after_request
+    def report_upstream_calls(response):
+        counter = g.get('upstream_calls')
+        if counter is not None:
+            response.headers[UPSTREAM_CALLS_HEADER] = str(counter.total)
+            if counter.total:
+                logger.info(f'{request.endpoint} made {counter.total} upstream calls: {counter.snapshot()}')
+        return response
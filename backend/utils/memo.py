@@ -0,0 +1,53 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+from flask import g, has_request_context
+
+class ArtifactMemo:
+    """Computes each expensive AWS-derived artifact at most once per dashboard load.
+
+    Results are shared for the rest of the current request (through
+    ``flask.g``) and, for ``ttl`` seconds, with every other request in the
+    process, so the separate endpoints a dashboard calls together reuse each
+    other's work. Concurrent callers of a missing key wait for the one
+    computation in flight instead of repeating it. Failures are not cached.
+    """
+
+    def __init__(self, ttl: float = 60):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        request_memo = g.setdefault('artifact_memo', {}) if has_request_context() else {}
+        if key in request_memo:
+            return request_memo[key]
+
+        found, value = self._lookup(key)
+        if not found:
+            with self._key_lock(key):
+                found, value = self._lookup(key)
+                if not found:
+                    value = compute()
+                    with self._lock:
+                        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+        request_memo[key] = value
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return True, entry[1]
+            self._entries.pop(key, None)
+            return False, None
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
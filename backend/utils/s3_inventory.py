@@ -0,0 +1,103 @@
+import gzip
+import io
+import json
+import re
+from typing import Dict, Iterator, Optional, Tuple
+import pandas as pd
+
+# Delivery folders under <prefix>/<bucket>/<config-id>/ are named like 2024-01-31T01-00Z
+DELIVERY_FOLDER = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}-\d{2}Z/$')
+
+# Rows handed to pandas at a time while streaming a CSV inventory file
+CSV_CHUNK_ROWS = 1_000_000
+
+def find_inventory_manifest(s3, bucket_name: str) -> Optional[Tuple[str, str]]:
+    """(destination bucket, manifest key) of the latest S3 Inventory report for a bucket.
+
+    Returns None when the bucket has no enabled inventory configuration
+    that includes object sizes and storage classes, or nothing was delivered yet.
+    """
+    response = s3.list_bucket_inventory_configurations(Bucket=bucket_name)
+    for config in response.get('InventoryConfigurationList', []):
+        fields = set(config.get('OptionalFields', []))
+        if not config.get('IsEnabled') or not {'Size', 'StorageClass'} <= fields:
+            continue
+
+        destination = config['Destination']['S3BucketDestination']
+        destination_bucket = destination['Bucket'].split(':::', 1)[-1]
+        prefix = '/'.join(
+            part for part in (destination.get('Prefix', '').strip('/'), bucket_name, config['Id']) if part
+        )
+
+        deliveries = [
+            common_prefix
+            for common_prefix in _list_common_prefixes(s3, destination_bucket, f'{prefix}/')
+            if DELIVERY_FOLDER.search(common_prefix)
+        ]
+        if deliveries:
+            return destination_bucket, f'{max(deliveries)}manifest.json'
+    return None
+
+def _list_common_prefixes(s3, bucket_name: str, prefix: str) -> Iterator[str]:
+    """Immediate "subfolders" of prefix; only folder names are listed, never the objects"""
+    kwargs = {'Bucket': bucket_name, 'Prefix': prefix, 'Delimiter': '/'}
+    while True:
+        page = s3.list_objects_v2(**kwargs)
+        yield from (common_prefix['Prefix'] for common_prefix in page.get('CommonPrefixes', []))
+        if not page.get('IsTruncated'):
+            break
+        kwargs['ContinuationToken'] = page['NextContinuationToken']
+
+def read_inventory_totals(s3, destination_bucket: str, manifest_key: str) -> Dict:
+    """Stream an inventory report and total object count and bytes per storage class.
+
+    Data files are read one at a time (CSV in chunks through the pandas C
+    parser, Parquet in record batches), so memory stays flat however many
+    objects the bucket holds.
+    """
+    manifest = json.loads(s3.get_object(Bucket=destination_bucket, Key=manifest_key)['Body'].read())
+    file_format = manifest['fileFormat'].upper()
+    schema = [field.strip() for field in manifest['fileSchema'].split(',')]
+
+    storage_classes = {}
+    object_count = 0
+    for data_file in manifest['files']:
+        body = s3.get_object(Bucket=destination_bucket, Key=data_file['key'])['Body']
+        if file_format == 'CSV':
+            chunks = _read_csv_chunks(body, schema)
+        elif file_format == 'PARQUET':
+            chunks = _read_parquet_chunks(body)
+        else:
+            raise ValueError(f'Unsupported S3 Inventory format: {manifest["fileFormat"]}')
+
+        for chunk in chunks:
+            object_count += len(chunk)
+            for storage_class, size in chunk.groupby('storage_class')['size'].sum().items():
+                storage_classes[storage_class] = storage_classes.get(storage_class, 0) + int(size)
+
+    return {
+        'size_bytes': sum(storage_classes.values()),
+        'object_count': object_count,
+        'storage_classes': storage_classes
+    }
+
+def _read_csv_chunks(body, schema) -> Iterator[pd.DataFrame]:
+    # CSV inventory files are gzipped and have no header row
+    columns = {schema.index('Size'): 'size', schema.index('StorageClass'): 'storage_class'}
+    reader = pd.read_csv(
+        gzip.GzipFile(fileobj=body), header=None, usecols=list(columns),
+        dtype={index: ('float64' if name == 'size' else 'object') for index, name in columns.items()},
+        chunksize=CSV_CHUNK_ROWS
+    )
+    for chunk in reader:
+        chunk = chunk.rename(columns=columns)
+        # Delete markers have no size
+        yield chunk.fillna({'size': 0})
+
+def _read_parquet_chunks(body) -> Iterator[pd.DataFrame]:
+    import pyarrow.parquet as pq
+
+    # Parquet needs a seekable file; inventory data files are bounded in size
+    parquet_file = pq.ParquetFile(io.BytesIO(body.read()))
+    for batch in parquet_file.iter_batches(columns=['size', 'storage_class']):
+        yield batch.to_pandas().fillna({'size': 0})
@@ -29,7 +29,8 @@ const useCostData = () => {
         }
 
         if (recsRes?.data) {
-          setRecommendations(recsRes.data);
+          // Sources that failed are listed in recsRes.data.errors
+          setRecommendations(recsRes.data.recommendations);
         }
 
       } catch (err) {
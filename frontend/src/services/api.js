@@ -22,4 +22,40 @@ export const getCostsByService = async () => {
 
 export const getOptimizationRecommendations = () => {
   return axios.get(`${API_BASE_URL}/api/v1/optimization/recommendations`);
-};
\ No newline at end of file
+};
+
+// Streams /api/v1/services/<service> as NDJSON. onRecord is called with every
+// {type, data} record as it arrives ('instance', 'optimization_opportunity',
+// then a final 'summary'), so large fleets can render progressively.
+export const streamServiceAnalysis = async (service, onRecord, params = {}) => {
+  const query = new URLSearchParams({ ...params, stream: '1' });
+  const headers = { Accept: 'application/x-ndjson' };
+  const authToken = localStorage.getItem('token');
+  if (authToken) {
+    headers.Authorization = `Bearer ${authToken}`;
+  }
+
+  const response = await fetch(`${API_BASE_URL}/api/v1/services/${service}?${query}`, { headers });
+  if (!response.ok) {
+    throw new Error(`Analysis request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+    const lines = buffered.split('\n');
+    buffered = lines.pop();
+    lines.filter((line) => line.trim()).forEach((line) => onRecord(JSON.parse(line)));
+
+    if (done) {
+      if (buffered.trim()) {
+        onRecord(JSON.parse(buffered));
+      }
+      break;
+    }
+  }
+};